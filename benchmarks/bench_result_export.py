@@ -0,0 +1,86 @@
+"""
+Benchmark: chunked result export (utils.result_export) for large result sets.
+
+Rows are generated lazily, so with --memory the peak reported is that of the
+export itself (tracemalloc slows every run several-fold, so timings taken with
+--memory are not comparable to those without). With --baseline the rows are
+also materialized and written through a pandas DataFrame into an in-memory CSV,
+the approach the export replaces.
+
+Usage:
+    python benchmarks/bench_result_export.py [--rows 1000000] [--chunk-rows 10000] [--memory] [--baseline]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.result_export import format_size, parquet_available, write_export
+
+
+def generate_rows(count: int):
+    """Rows resembling an Oracle query result"""
+    for i in range(count):
+        yield {
+            "ORDER_ID": i,
+            "CUSTOMER": f"Customer {i % 5000}",
+            "STATUS": ("OPEN", "SHIPPED", "CLOSED")[i % 3],
+            "AMOUNT": round(i * 0.37 % 10000, 2),
+            "CREATED_AT": f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}T10:{i % 60:02d}:00",
+        }
+
+
+def measure(label: str, run, trace_memory: bool) -> None:
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - started
+    peak = ""
+    if trace_memory:
+        peak = f"  peak {format_size(tracemalloc.get_traced_memory()[1]):>10}"
+        tracemalloc.stop()
+    print(f"{label:<22} {elapsed:7.2f}s{peak}  {result}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=10_000)
+    parser.add_argument("--memory", action="store_true", help="report peak memory (tracemalloc)")
+    parser.add_argument("--baseline", action="store_true", help="also run the in-memory pandas baseline")
+    args = parser.parse_args()
+
+    variants = [("csv", None), ("csv", "gzip")]
+    if parquet_available():
+        variants += [("parquet", "snappy"), ("parquet", "zstd")]
+    else:
+        print("pyarrow not installed; skipping Parquet")
+
+    print(f"{args.rows} rows, {args.chunk_rows} rows per chunk")
+    with tempfile.TemporaryDirectory() as directory:
+        for fmt, compression in variants:
+            def run(fmt=fmt, compression=compression):
+                export = write_export(generate_rows(args.rows), fmt, compression,
+                                      chunk_rows=args.chunk_rows, directory=directory)
+                return f"{format_size(export.size)} on disk, {export.rows / export.elapsed:,.0f} rows/s"
+            measure(f"{fmt} ({compression or 'none'})", run, args.memory)
+
+    if args.baseline:
+        import pandas as pd
+
+        def baseline():
+            buffer = io.StringIO()
+            pd.DataFrame(list(generate_rows(args.rows))).to_csv(buffer, index=False)
+            return f"{format_size(len(buffer.getvalue()))} in memory"
+        measure("pandas in-memory csv", baseline, args.memory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Micro-benchmark: utils.sse parser vs. the previous iter_lines() loop.
+
+Usage:
+    python benchmarks/bench_sse_parser.py [--events 100000]
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import requests
+from urllib3 import HTTPResponse
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.sse import iter_sse_events
+
+
+def build_stream(event_count: int) -> bytes:
+    """Build a synthetic SSE body resembling a pipeline run"""
+    parts = []
+    for i in range(event_count):
+        if i % 10 == 9:
+            parts.append(f"id: {i}\nevent: heartbeat\ndata: {{\"timestamp\": {i}}}\n\n")
+        else:
+            payload = json.dumps({
+                "step": f"Step {i % 6 + 1}",
+                "message": f"Processing item {i}",
+                "details": {"phase": "tool_selection", "toolCount": i % 7}
+            })
+            parts.append(f"id: {i}\nevent: progress\ndata: {payload}\n\n")
+    parts.append('event: final\ndata: {"answer": "done"}\n\n')
+    return "".join(parts).encode("utf-8")
+
+
+def make_response(body: bytes) -> requests.Response:
+    """Wrap a byte body in a streamed requests.Response"""
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = HTTPResponse(body=io.BytesIO(body), preload_content=False, decode_content=False)
+    return response
+
+
+def legacy_loop(response) -> int:
+    """The line-based loop previously used by both call sites"""
+    count = 0
+    current_event = None
+    current_data = []
+    for line in response.iter_lines():
+        if not line:
+            if current_event and current_data:
+                '\n'.join(current_data)
+                count += 1
+                current_event = None
+                current_data = []
+            continue
+        line = line.decode('utf-8') if isinstance(line, bytes) else line
+        if line.startswith('event: '):
+            current_event = line[7:].strip()
+        elif line.startswith('data: '):
+            current_data.append(line[6:])
+    return count
+
+
+def incremental_parser(response) -> int:
+    """The shared incremental parser"""
+    count = 0
+    for _ in iter_sse_events(response):
+        count += 1
+    return count
+
+
+def run(name: str, func, body: bytes, repeat: int) -> None:
+    best = float("inf")
+    count = 0
+    for _ in range(repeat):
+        response = make_response(body)
+        start = time.perf_counter()
+        count = func(response)
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<22} {count:>8} events  {best * 1000:8.1f} ms  {count / best:>12,.0f} events/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    body = build_stream(args.events)
+    print(f"Synthetic stream: {args.events} events, {len(body) / 1024 / 1024:.1f} MiB")
+    run("iter_lines loop", legacy_loop, body, args.repeat)
+    run("incremental parser", incremental_parser, body, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""
+Load test: replay prompts as conversations against an Agents-MCP-Host backend.
+
+Prompts come from a JSON Lines file (one object per line with "prompt", "body",
+"content" or "title", optionally "agent") or a CSV file ("prompt" column, else
+the first one, optionally "agent"). They are spread round-robin over the agents
+of utils.agents.AGENT_CONFIGS and sent through MCPApiClient.stream_conversation,
+the same resumable, deadline-bound stream the chat page uses.
+
+Closed loop (--concurrency N): N workers send back to back.
+Open loop (--rate R): conversations start as a Poisson process of R per second,
+whatever the backend's pace, up to --max-inflight at once. Latencies are then
+measured from the scheduled start, so queueing behind a slow backend is counted
+(no coordinated omission); arrivals beyond --max-inflight are counted as dropped.
+
+Reported per agent and overall: time to first event, time to 'final', outcome
+rates (errors, timeouts, ...) and throughput. With --report DIR, an HdrHistogram
+style percentile distribution (.hgrm, milliseconds) per latency and a summary.json
+are written there.
+
+With --stand-in, the conversations go to benchmarks/stand_in_backend.py started
+in-process on a free port, and that script's profile and fault options apply.
+
+Usage:
+    python benchmarks/load_test.py PROMPTS [--base-url URL] [--agents A,B] [--requests 100 | --duration 60]
+                                   [--concurrency 8 | --rate 2.0 --max-inflight 64] [--report DIR]
+                                   [--stand-in [--disconnect-rate 0.2 ...]]
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.agents import AGENT_CONFIGS
+from utils.api_client import DEFAULT_BASE_URL, MCPApiClient
+from utils.stream_deadlines import StreamDeadlines, StreamTimeout
+from utils.stream_resume import RECONNECTING_EVENT, TERMINAL_EVENTS
+from benchmarks.stand_in_backend import add_profile_arguments, profile_from_args, serve_in_thread
+
+# Prompt fields tried in order for JSON Lines files
+PROMPT_FIELDS = ("prompt", "body", "content", "title")
+
+# Percentiles of the console report
+REPORT_PERCENTILES = (50, 75, 90, 95, 99, 99.9)
+
+# Reporting steps per halving of the remaining distance to 100% in .hgrm files
+HGRM_TICKS_PER_HALF = 5
+
+
+class Prompt:
+    __slots__ = ("text", "agent")
+
+    def __init__(self, text: str, agent: Optional[str] = None):
+        self.text = text
+        self.agent = agent
+
+
+class Result:
+    """Outcome and timings (seconds) of one conversation"""
+
+    __slots__ = ("agent", "outcome", "first_event", "final", "duration", "events", "bytes", "reconnects", "error")
+
+    def __init__(self, agent: str):
+        self.agent = agent
+        self.outcome = "incomplete"
+        self.first_event: Optional[float] = None
+        self.final: Optional[float] = None
+        self.duration = 0.0
+        self.events = 0
+        self.bytes = 0
+        self.reconnects = 0
+        self.error: Optional[str] = None
+
+
+def load_prompts(path: str) -> List[Prompt]:
+    """Prompts of a .jsonl/.json Lines or .csv file"""
+    prompts = []
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            reader = csv.DictReader(f)
+            column = "prompt" if "prompt" in (reader.fieldnames or []) else (reader.fieldnames or [None])[0]
+            for row in reader:
+                if column and row.get(column):
+                    prompts.append(Prompt(row[column], row.get("agent") or None))
+        else:
+            for line in f:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                text = next((data[field] for field in PROMPT_FIELDS if data.get(field)), None)
+                if text:
+                    prompts.append(Prompt(text, data.get("agent")))
+    if not prompts:
+        raise ValueError(f"No prompts found in {path}")
+    return prompts
+
+
+def build_payload(prompt: str, agent: str) -> Dict[str, Any]:
+    """Request body the chat page sends for a first turn"""
+    config = AGENT_CONFIGS[agent]
+    payload = {"messages": [{"role": "user", "content": prompt}]}
+    if config["backstory"]:
+        payload["backstory"] = config["backstory"]
+    if config["guidance"]:
+        payload["guidance"] = config["guidance"]
+    return payload
+
+
+def run_conversation(client: MCPApiClient, prompt: str, agent: str, scheduled: float) -> Result:
+    """Stream one conversation to its terminal event; times are measured from `scheduled`"""
+    result = Result(agent)
+    deadlines = StreamDeadlines.from_config(AGENT_CONFIGS[agent].get("deadlines"))
+    stream = client.stream_conversation(build_payload(prompt, agent), deadlines=deadlines)
+    try:
+        for event in stream:
+            if event.event == RECONNECTING_EVENT:
+                continue
+            result.events += 1
+            if result.first_event is None:
+                result.first_event = time.monotonic() - scheduled
+            if event.event in TERMINAL_EVENTS:
+                result.outcome = event.event
+                if event.event == 'final':
+                    result.final = time.monotonic() - scheduled
+                break
+    except (StreamTimeout, requests.exceptions.Timeout) as e:
+        result.outcome, result.error = "timeout", str(e)
+    except requests.exceptions.HTTPError as e:
+        result.outcome, result.error = "http_error", str(e)
+    except requests.exceptions.RequestException as e:
+        result.outcome, result.error = "connection_error", str(e)
+    except Exception as e:
+        result.outcome, result.error = "client_error", str(e)
+    finally:
+        result.duration = time.monotonic() - scheduled
+        result.bytes = stream.bytes_received
+        result.reconnects = stream.state.reconnects
+        stream.close()
+    return result
+
+
+def assignments(prompts: List[Prompt], agents: List[str]) -> Iterator[Tuple[str, str]]:
+    """Endless (prompt, agent) pairs: prompts in order, agents round-robin unless a prompt names one"""
+    i = 0
+    while True:
+        prompt = prompts[i % len(prompts)]
+        agent = prompt.agent if prompt.agent in AGENT_CONFIGS else agents[i % len(agents)]
+        yield prompt.text, agent
+        i += 1
+
+
+def closed_loop(client, work, concurrency: int, count: Optional[int], end: float) -> List[Result]:
+    results: List[Result] = []
+    lock = threading.Lock()
+    issued = [0]
+
+    def worker():
+        while time.monotonic() < end:
+            with lock:
+                if count is not None and issued[0] >= count:
+                    return
+                issued[0] += 1
+                prompt, agent = next(work)
+            result = run_conversation(client, prompt, agent, time.monotonic())
+            with lock:
+                results.append(result)
+
+    threads = [threading.Thread(target=worker, name=f"load-{i}", daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def open_loop(client, work, rate: float, max_inflight: int, count: Optional[int], end: float,
+              seed: Optional[int]) -> Tuple[List[Result], int]:
+    rng = random.Random(seed)
+    inflight = threading.BoundedSemaphore(max_inflight)
+    futures = []
+    dropped = 0
+    issued = 0
+    next_start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="load") as executor:
+        while next_start < end and (count is None or issued < count):
+            delay = next_start - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            issued += 1
+            prompt, agent = next(work)
+            if inflight.acquire(blocking=False):
+                def task(prompt=prompt, agent=agent, scheduled=next_start):
+                    try:
+                        return run_conversation(client, prompt, agent, scheduled)
+                    finally:
+                        inflight.release()
+                futures.append(executor.submit(task))
+            else:
+                dropped += 1
+            next_start += rng.expovariate(rate)
+    return [future.result() for future in futures], dropped
+
+
+def percentile_ticks(count: int) -> List[float]:
+    """Percentiles (0..1) reported in an .hgrm distribution, finer towards the tail"""
+    ticks = []
+    level = 0
+    while True:
+        low, high = 1 - 0.5 ** level, 1 - 0.5 ** (level + 1)
+        for step in range(HGRM_TICKS_PER_HALF):
+            ticks.append(low + (high - low) * step / HGRM_TICKS_PER_HALF)
+        if 1 / (1 - high) > count:
+            break
+        level += 1
+    ticks.append(1.0)
+    return ticks
+
+
+def format_hgrm(values_ms: np.ndarray) -> str:
+    """HdrHistogram-style percentile distribution of latencies in milliseconds"""
+    ordered = np.sort(values_ms)
+    lines = [f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}", ""]
+    for tick in percentile_ticks(len(ordered)):
+        value = float(np.quantile(ordered, tick, method="inverted_cdf"))
+        total = int(np.searchsorted(ordered, value, side="right"))
+        inverse = f"{1 / (1 - tick):14.2f}" if tick < 1 else ""
+        lines.append(f"{value:12.3f} {tick:14.12f} {total:10d} {inverse}")
+    lines.append(f"#[Mean    = {ordered.mean():12.3f}, StdDeviation   = {ordered.std():12.3f}]")
+    lines.append(f"#[Max     = {ordered[-1]:12.3f}, Total count    = {len(ordered):12d}]")
+    return "\n".join(lines) + "\n"
+
+
+def latency_summary(values: List[float]) -> Optional[Dict[str, float]]:
+    """Count, mean, percentiles and max in milliseconds"""
+    if not values:
+        return None
+    array = np.asarray(values) * 1000
+    summary = {"count": int(array.size), "mean": float(array.mean()), "min": float(array.min())}
+    for p, value in zip(REPORT_PERCENTILES, np.percentile(array, REPORT_PERCENTILES, method="inverted_cdf")):
+        summary[f"p{p:g}"] = float(value)
+    summary["max"] = float(array.max())
+    return summary
+
+
+def summarize(results: List[Result], elapsed: float, dropped: int = 0) -> Dict[str, Any]:
+    outcomes: Dict[str, int] = {}
+    for result in results:
+        outcomes[result.outcome] = outcomes.get(result.outcome, 0) + 1
+    total = len(results)
+    completed = outcomes.get("final", 0)
+    return {
+        "conversations": total,
+        "dropped": dropped,
+        "elapsed_s": elapsed,
+        "throughput_per_s": completed / elapsed if elapsed > 0 else 0.0,
+        "outcomes": outcomes,
+        "error_rate": (total - completed - outcomes.get("timeout", 0)) / total if total else 0.0,
+        "timeout_rate": outcomes.get("timeout", 0) / total if total else 0.0,
+        "events": sum(result.events for result in results),
+        "bytes": sum(result.bytes for result in results),
+        "reconnects": sum(result.reconnects for result in results),
+        "time_to_first_event_ms": latency_summary([r.first_event for r in results if r.first_event is not None]),
+        "time_to_final_ms": latency_summary([r.final for r in results if r.final is not None]),
+    }
+
+
+def print_summary(title: str, summary: Dict[str, Any]) -> None:
+    print(f"\n== {title} ==")
+    print(f"conversations {summary['conversations']}  dropped {summary['dropped']}  "
+          f"elapsed {summary['elapsed_s']:.1f}s  throughput {summary['throughput_per_s']:.2f} final/s")
+    print("outcomes      " + ", ".join(f"{name} {count}" for name, count in sorted(summary["outcomes"].items())))
+    print(f"error rate    {summary['error_rate']:.1%}  timeout rate {summary['timeout_rate']:.1%}  "
+          f"reconnects {summary['reconnects']}  {summary['bytes'] / 1024:.0f} KB in {summary['events']} events")
+    header = "".join(f"{name:>10}" for name in ["count", "mean"] + [f"p{p:g}" for p in REPORT_PERCENTILES] + ["max"])
+    print(f"{'(ms)':<16}{header}")
+    for label, key in (("first event", "time_to_first_event_ms"), ("final", "time_to_final_ms")):
+        latency = summary[key]
+        if latency is None:
+            print(f"{label:<16}{'-':>10}")
+            continue
+        cells = [f"{latency['count']:>10d}"] + [
+            f"{latency[name]:>10.1f}" for name in ["mean"] + [f"p{p:g}" for p in REPORT_PERCENTILES] + ["max"]]
+        print(f"{label:<16}{''.join(cells)}")
+
+
+def write_report(directory: str, results: List[Result], summary: Dict[str, Any]) -> None:
+    os.makedirs(directory, exist_ok=True)
+    for name, values in (("time_to_first_event", [r.first_event for r in results if r.first_event is not None]),
+                         ("time_to_final", [r.final for r in results if r.final is not None])):
+        if values:
+            with open(os.path.join(directory, f"{name}.hgrm"), "w") as f:
+                f.write(format_hgrm(np.asarray(values) * 1000))
+    with open(os.path.join(directory, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("prompts", help="Prompt file (.jsonl or .csv)")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--agents", help="Comma-separated agent names (default: every agent with a backstory)")
+    parser.add_argument("--requests", type=int, help="Conversations to send (default 100 unless --duration)")
+    parser.add_argument("--duration", type=float, help="Seconds to keep sending")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--concurrency", type=int, default=4, help="Closed loop: conversations in flight")
+    mode.add_argument("--rate", type=float, help="Open loop: conversations started per second (Poisson)")
+    parser.add_argument("--max-inflight", type=int, default=64, help="Open loop: cap on conversations in flight")
+    parser.add_argument("--seed", type=int, help="Random seed of the open-loop arrivals")
+    parser.add_argument("--report", help="Directory for .hgrm distributions and summary.json")
+    parser.add_argument("--stand-in", action="store_true", help="Run against an in-process stand-in backend")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    if args.agents:
+        agents = [name.strip() for name in args.agents.split(",")]
+        unknown = [name for name in agents if name not in AGENT_CONFIGS]
+        if unknown:
+            parser.error(f"Unknown agents: {', '.join(unknown)} (known: {', '.join(AGENT_CONFIGS)})")
+    else:
+        agents = [name for name, config in AGENT_CONFIGS.items() if config["backstory"]]
+    count = args.requests if args.requests is not None else (None if args.duration else 100)
+    end = time.monotonic() + args.duration if args.duration else float("inf")
+
+    prompts = load_prompts(args.prompts)
+    stand_in = None
+    if args.stand_in:
+        stand_in = serve_in_thread(profile_from_args(args))
+        args.base_url = stand_in.base_url
+    in_flight = args.max_inflight if args.rate else args.concurrency
+    client = MCPApiClient(args.base_url, use_cache=False, stream_pool_size=in_flight)
+    work = assignments(prompts, agents)
+    target = f"{args.rate:g}/s open loop" if args.rate else f"concurrency {args.concurrency}"
+    print(f"{len(prompts)} prompts × {len(agents)} agents against {args.base_url}, {target}")
+
+    started = time.monotonic()
+    dropped = 0
+    try:
+        if args.rate:
+            results, dropped = open_loop(client, work, args.rate, args.max_inflight, count, end, args.seed)
+        else:
+            results = closed_loop(client, work, args.concurrency, count, end)
+    finally:
+        client.close()
+        if stand_in is not None:
+            stand_in.shutdown()
+    elapsed = time.monotonic() - started
+
+    summary = summarize(results, elapsed, dropped)
+    summary["agents"] = {}
+    for agent in agents:
+        agent_results = [result for result in results if result.agent == agent]
+        if agent_results:
+            summary["agents"][agent] = summarize(agent_results, elapsed)
+            print_summary(agent, summary["agents"][agent])
+    print_summary("All agents", summary)
+    errors = {}
+    for result in results:
+        if result.error:
+            errors[result.error] = errors.get(result.error, 0) + 1
+    for error, times in sorted(errors.items(), key=lambda item: -item[1])[:5]:
+        print(f"  {times}× {error}")
+    if args.report:
+        write_report(args.report, results, summary)
+        print(f"\nReport written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,666 @@
+"""
+Local stand-in for the Agents-MCP-Host /host/v1 API.
+
+Serves the status, MCP and conversation endpoints the app uses, so the pages,
+MCPApiClient and the load test can run without the Java backend. Conversations
+follow the backend's event vocabulary: 'connected', progress events with phases
+('host_started', 'llm_request', 'llm_response', 'schema_matching', 'sql_query',
+'sql_result', ...), pipeline.* levels, "Step N" progress, tool_start/tool_complete,
+milestone.* completions, heartbeats and a terminal 'final'. The pipeline depth
+follows the request's guidance like the real host: no tools, SQL only, or the
+full six steps with result rows.
+
+Every session keeps its event log, so GET /conversations/{id}/stream with
+Last-Event-ID resumes a dropped stream, and interrupt and DELETE stop it.
+
+Timing, sizes and faults are configurable: injected latency, dropped
+connections, stalls, slow heartbeats, oversized payloads, error answers and
+HTTP errors, each with a rate. Tool statistics in /mcp/tools grow with the
+simulated tool calls.
+
+Usage:
+    python benchmarks/stand_in_backend.py [--port 8080] [--step-delay 0.25] [--heartbeat-interval 2]
+                                          [--latency 0] [--disconnect-rate 0] [--stall-rate 0]
+                                          [--slow-heartbeat-rate 0] [--oversized-rate 0] [--error-rate 0]
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+API_PREFIX = "/host/v1"
+
+# Sessions kept for status and resume; the oldest finished ones are dropped first
+MAX_SESSIONS = 1000
+
+# The six pipeline steps: (step name, tool, MCP client, milestone, kind of phase details)
+PIPELINE_STEPS = (
+    ("Intent Extraction", "evaluate_query_intent", "QueryIntentEvaluation", "intent", "llm"),
+    ("Schema Exploration", "match_oracle_schema", "OracleSchemaIntelligence", "schema", "schema_matching"),
+    ("Data Analysis", "explore_table_metadata", "OracleSchemaIntelligence", None, "metadata_exploration"),
+    ("SQL Generation", "generate_oracle_sql", "OracleSQLGeneration", "sql", "sql_query"),
+    ("Query Execution", "run_oracle_query", "OracleQueryExecution", "execution", "sql_result"),
+    ("Natural Response", "format_results", "OracleQueryAnalysis", None, "llm"),
+)
+
+# Steps run per depth of the request (see pipeline_depth)
+DEPTH_STEPS = {"direct": 0, "sql": 4, "full": 6}
+
+MCP_CLIENTS = (
+    "OracleQueryAnalysis", "OracleSchemaIntelligence", "BusinessMapping", "OracleSQLGeneration",
+    "OracleSQLValidation", "OracleQueryExecution", "QueryIntentEvaluation", "StrategyGeneration",
+    "IntentAnalysis", "StrategyOrchestrator", "StrategyLearning",
+)
+
+
+class Profile:
+    """Timing, size and fault settings of the stand-in (seconds, rates are probabilities)"""
+
+    def __init__(self, step_delay: float = 0.25, events_per_step: int = 2, jitter: float = 0.3,
+                 heartbeat_interval: float = 2.0, rows: int = 20, answer_chars: int = 600,
+                 latency: float = 0.0, first_event_delay: float = 0.0, interrupt_delay: float = 0.2,
+                 disconnect_rate: float = 0.0, disconnect_after: Optional[int] = None, replay_overlap: int = 0,
+                 stall_rate: float = 0.0, stall_seconds: float = 30.0,
+                 slow_heartbeat_rate: float = 0.0, slow_heartbeat_factor: float = 5.0,
+                 oversized_rate: float = 0.0, oversized_kb: int = 1024, error_rate: float = 0.0,
+                 http_error_rate: float = 0.0, resume_errors: int = 0, resume_retry_after: Optional[int] = None,
+                 seed: Optional[int] = None):
+        self.step_delay = step_delay  # Mean duration of a pipeline step
+        self.events_per_step = events_per_step  # Extra progress events per step
+        self.jitter = jitter  # Relative spread of every delay
+        self.heartbeat_interval = heartbeat_interval
+        self.rows = rows  # Result rows of a full-pipeline answer
+        self.answer_chars = answer_chars
+        self.latency = latency  # Added before every response
+        self.first_event_delay = first_event_delay  # Before a conversation's 'connected' event
+        self.interrupt_delay = interrupt_delay  # From interrupt_acknowledged to interrupted
+        self.disconnect_rate = disconnect_rate  # Per stream connection: drop it mid-stream
+        self.disconnect_after = disconnect_after  # Events before a drop (default: random, 1 to 20)
+        self.replay_overlap = replay_overlap  # Events before Last-Event-ID sent again on resume
+        self.stall_rate = stall_rate  # Per conversation: go silent (no heartbeats either) once
+        self.stall_seconds = stall_seconds
+        self.slow_heartbeat_rate = slow_heartbeat_rate  # Per heartbeat: stretch the interval
+        self.slow_heartbeat_factor = slow_heartbeat_factor
+        self.oversized_rate = oversized_rate  # Per progress event: attach oversized_kb of payload
+        self.oversized_kb = oversized_kb
+        self.error_rate = error_rate  # Per conversation: end with an 'error' event
+        self.http_error_rate = http_error_rate  # Per request: answer 503
+        self.resume_errors = resume_errors  # Per session: answer 503 to the first resume requests
+        self.resume_retry_after = resume_retry_after  # Retry-After (seconds) sent with those 503s
+        self.rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def chance(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._rng_lock:
+            return self.rng.random() < rate
+
+    def spread(self, seconds: float) -> float:
+        """seconds varied by the jitter"""
+        with self._rng_lock:
+            return max(0.0, seconds * (1 + self.rng.uniform(-self.jitter, self.jitter)))
+
+    def randint(self, low: int, high: int) -> int:
+        with self._rng_lock:
+            return self.rng.randint(low, high)
+
+
+class Stopped(Exception):
+    """The session was interrupted or cancelled"""
+
+
+class Session:
+    """One conversation: its event log, shared by every stream connection to it"""
+
+    def __init__(self, session_id: str, profile: Profile):
+        self.session_id = session_id
+        self.profile = profile
+        self.created = time.time()
+        self.events: List[Tuple[str, str, str]] = []  # (id, event, JSON data)
+        self.finished = False
+        self.cancelled = False
+        self.stalled_until = 0.0  # Heartbeats are held back during a stall
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+
+    def emit(self, event: str, data: Dict[str, Any]) -> None:
+        with self._condition:
+            if self.finished:
+                return
+            self.events.append((str(len(self.events)), event, json.dumps(data)))
+            self._condition.notify_all()
+
+    def finish(self, event: Optional[str] = None, data: Optional[Dict[str, Any]] = None) -> None:
+        if event is not None:
+            self.emit(event, data or {})
+        with self._condition:
+            self.finished = True
+            self._stop.set()
+            self._condition.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        """Sleep, raising Stopped as soon as the session is interrupted or cancelled"""
+        if self._stop.wait(seconds):
+            raise Stopped()
+
+    def interrupt(self, reason: str) -> bool:
+        if self.finished:
+            return False
+        self.emit('interrupt_acknowledged', {"sessionId": self.session_id, "reason": reason})
+        self._stop.set()
+        return True
+
+    def cancel(self) -> bool:
+        if self.finished:
+            return False
+        self.cancelled = True
+        self._stop.set()
+        return True
+
+    def wait_events(self, index: int, timeout: float) -> Tuple[List[Tuple[str, str, str]], bool]:
+        """Events from index on (waiting up to timeout for some), and whether the session is over"""
+        with self._condition:
+            if len(self.events) <= index and not self.finished:
+                self._condition.wait(timeout)
+            return self.events[index:], self.finished
+
+
+def pipeline_depth(payload: Dict[str, Any]) -> str:
+    """'direct', 'sql' or 'full', from the guidance as the host derives it"""
+    guidance = (payload.get("guidance") or "").lower()
+    if "do not use any database tools" in guidance or "depth should be 0" in guidance:
+        return "direct"
+    if "never execute" in guidance or "sql generation and validation only" in guidance:
+        return "sql"
+    return "full"
+
+
+class Backend:
+    """State of the stand-in: sessions, simulated tool statistics and the request counters"""
+
+    def __init__(self, profile: Profile):
+        self.profile = profile
+        self.started = time.time()
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.requests = 0
+        self._resume_errors: Dict[str, int] = {}  # Session id -> injected resume 503s so far
+        self._lock = threading.Lock()
+        # Cumulative tool statistics: name -> [calls, successes, total duration ms]
+        self.tool_stats: Dict[str, List[float]] = {tool: [0, 0, 0.0] for _, tool, _, _, _ in PIPELINE_STEPS}
+
+    # Conversations
+
+    def start_session(self, payload: Dict[str, Any]) -> Session:
+        session = Session(uuid.uuid4().hex, self.profile)
+        with self._lock:
+            self.sessions[session.session_id] = session
+            while len(self.sessions) > MAX_SESSIONS:
+                oldest = next((key for key, value in self.sessions.items() if value.finished),
+                              next(iter(self.sessions)))
+                del self.sessions[oldest]
+                self._resume_errors.pop(oldest, None)
+        threading.Thread(target=self._run, args=(session, payload), name="stand-in-session", daemon=True).start()
+        threading.Thread(target=self._heartbeats, args=(session,), name="stand-in-heartbeat", daemon=True).start()
+        return session
+
+    def session(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            return self.sessions.get(session_id)
+
+    def fail_resume(self, session_id: str) -> bool:
+        """Whether this resume of the session should get an injected 503"""
+        with self._lock:
+            failed = self._resume_errors.get(session_id, 0)
+            if failed >= self.profile.resume_errors:
+                return False
+            self._resume_errors[session_id] = failed + 1
+            return True
+
+    def _heartbeats(self, session: Session) -> None:
+        profile = self.profile
+        while not session.finished:
+            interval = profile.heartbeat_interval
+            if profile.chance(profile.slow_heartbeat_rate):
+                interval *= profile.slow_heartbeat_factor
+            time.sleep(interval)
+            if time.time() >= session.stalled_until:
+                session.emit('heartbeat', {"timestamp": int(time.time() * 1000)})
+
+    def _run(self, session: Session, payload: Dict[str, Any]) -> None:
+        try:
+            self._pipeline(session, payload)
+        except Stopped:
+            if session.cancelled:
+                session.finish('interrupted', {"message": "Session cancelled"})
+            else:
+                time.sleep(self.profile.spread(self.profile.interrupt_delay))
+                session.finish('interrupted', {"message": "Request was interrupted by the user"})
+        except Exception as e:
+            session.finish('error', {"message": f"Stand-in failure: {e}"})
+
+    def _step_pause(self, session: Session, parts: int = 1) -> None:
+        session.pause(self.profile.spread(self.profile.step_delay / parts))
+
+    def _progress(self, session: Session, step: str, message: str, details: Dict[str, Any]) -> None:
+        profile = self.profile
+        if profile.chance(profile.oversized_rate):
+            details = dict(details, payload="x" * (profile.oversized_kb * 1024))
+        session.emit('progress', {"step": step, "message": message, "details": details,
+                                  "timestamp": int(time.time() * 1000)})
+
+    def _pipeline(self, session: Session, payload: Dict[str, Any]) -> None:
+        profile = self.profile
+        messages = payload.get("messages") or []
+        question = messages[-1].get("content", "") if messages else ""
+        depth = pipeline_depth(payload)
+        steps = PIPELINE_STEPS[:DEPTH_STEPS[depth]]
+        stall_at = profile.randint(0, len(steps)) if profile.chance(profile.stall_rate) else None
+        fail_at = profile.randint(0, max(len(steps) - 1, 0)) if profile.chance(profile.error_rate) else None
+
+        session.pause(profile.first_event_delay)
+        session.emit('connected', {"sessionId": session.session_id, "streamId": session.session_id})
+        self._progress(session, "host_started", "Host started", {"phase": "host_started"})
+        session.emit('pipeline.depth_determined', {"query_type": depth, "execution_depth": len(steps)})
+        if steps:
+            session.emit('pipeline.execution_start', {"total_levels": len(steps)})
+
+        sql = "SELECT customer_name, SUM(amount) AS total FROM orders GROUP BY customer_name ORDER BY total DESC"
+        for number, (name, tool, client, milestone, phase) in enumerate(steps, start=1):
+            self._stall(session, number - 1 == stall_at)
+            step = f"Step {number}"
+            session.emit('pipeline.level_start', {"level": number, "description": name})
+            self._progress(session, step, name, {"phase": "step_start"})
+            for i in range(profile.events_per_step):
+                self._step_pause(session, profile.events_per_step + 2)
+                self._progress(session, step, f"{name}: working ({i + 1}/{profile.events_per_step})",
+                               {"phase": "tool_selection", "strategy": depth, "toolCount": 1,
+                                "selectedTools": [tool]})
+            session.emit('tool_start', {"tool": tool, "description": f"{name} via {client}"})
+            started = time.monotonic()
+            self._step_pause(session, 2)
+            success = number - 1 != fail_at
+            self._record_tool(tool, success, (time.monotonic() - started) * 1000)
+            session.emit('tool_complete', {"tool": tool, "success": success})
+            if not success:
+                session.finish('error', {"message": f"{tool} failed (injected error)"})
+                return
+            self._phase_details(session, step, phase, number, sql)
+            if milestone:
+                session.emit(f'milestone.{milestone}', {"milestone_name": milestone,
+                                                        "message": f"{milestone} - {name} complete"})
+            self._step_pause(session, profile.events_per_step + 2)
+        if steps:
+            session.emit('pipeline.execution_complete', {"levels_completed": len(steps)})
+        else:
+            # No tools: one LLM call as long as a pipeline step
+            self._step_pause(session)
+            self._phase_details(session, "Direct", "llm", 0, sql)
+
+        self._stall(session, len(steps) == stall_at)
+        answer = (f"Stand-in answer to: {question} " * (profile.answer_chars // 40 + 1))[:profile.answer_chars]
+        if depth == "full":
+            rows = self._rows()
+            session.finish('final', {"answer": answer, "type": "data", "sql": sql, "data": rows,
+                                     "row_count": len(rows)})
+        elif depth == "sql":
+            session.finish('final', {"answer": answer, "type": "sql", "sql": sql})
+        else:
+            session.finish('final', {"answer": answer, "type": "natural_response"})
+
+    def _stall(self, session: Session, stall: bool) -> None:
+        """Go silent, heartbeats included, for stall_seconds"""
+        if stall:
+            session.stalled_until = time.time() + self.profile.stall_seconds
+            session.pause(self.profile.stall_seconds)
+
+    def _phase_details(self, session: Session, step: str, phase: str, number: int, sql: str) -> None:
+        if phase == "llm":
+            self._progress(session, step, "Calling the LLM", {"phase": "llm_request", "messageCount": 2 + number})
+            self._step_pause(session, 4)
+            self._progress(session, step, "LLM responded", {"phase": "llm_response",
+                                                            "responseLength": self.profile.answer_chars})
+        elif phase == "schema_matching":
+            self._progress(session, step, "Matched schema", {"phase": "schema_matching", "matchCount": 2,
+                                                             "matchedTables": ["ORDERS", "CUSTOMERS"]})
+        elif phase == "metadata_exploration":
+            self._progress(session, step, "Explored metadata", {"phase": "metadata_exploration",
+                                                                "table": "ORDERS", "columnCount": 12})
+        elif phase == "sql_query":
+            self._progress(session, step, "Generated SQL", {"phase": "sql_query", "query": sql})
+        elif phase == "sql_result":
+            rows = self._rows()
+            self._progress(session, step, "Query executed", {"phase": "sql_result", "rowCount": len(rows),
+                                                             "preview": rows[:10]})
+
+    def _rows(self) -> List[Dict[str, Any]]:
+        return [{"CUSTOMER_NAME": f"Customer {i}", "TOTAL": round(10000 / (i + 1), 2)}
+                for i in range(self.profile.rows)]
+
+    def _record_tool(self, tool: str, success: bool, duration_ms: float) -> None:
+        with self._lock:
+            stats = self.tool_stats.setdefault(tool, [0, 0, 0.0])
+            stats[0] += 1
+            stats[1] += 1 if success else 0
+            stats[2] += duration_ms
+
+    # Status and MCP endpoints
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def active_sessions(self) -> int:
+        with self._lock:
+            return sum(1 for session in self.sessions.values() if not session.finished)
+
+    def health(self) -> Dict[str, Any]:
+        return {"status": "UP", "timestamp": int(time.time() * 1000)}
+
+    def status(self) -> Dict[str, Any]:
+        return {"status": "running", "activeSessions": self.active_sessions(), "totalSessions": len(self.sessions),
+                "requests": self.requests, "uptime": int((time.time() - self.started) * 1000)}
+
+    def hosts_status(self) -> Dict[str, Any]:
+        return {"hosts": [{"name": name, "available": True, "activeConnections": self.active_sessions()}
+                          for name in ("oracledbanswerer", "oraclesqlbuilder", "toolfreedirectllm")]}
+
+    def mcp_status(self) -> Dict[str, Any]:
+        return {"healthy": True, "totalClients": len(MCP_CLIENTS), "activeClients": len(MCP_CLIENTS),
+                "totalTools": len(self.tool_stats), "totalRegistrations": len(self.tool_stats)}
+
+    def mcp_tools(self) -> Dict[str, Any]:
+        clients = {tool: client for _, tool, client, _, _ in PIPELINE_STEPS}
+        tools = []
+        with self._lock:
+            for tool, (calls, successes, duration) in self.tool_stats.items():
+                tools.append({
+                    "name": tool,
+                    "description": f"Stand-in for {tool}",
+                    "inputSchema": {"type": "object", "properties": {"query": {"type": "string"}},
+                                    "required": ["query"]},
+                    "clientDetails": [{"serverName": clients.get(tool, "Unknown"), "active": True}],
+                    "statistics": {"totalCalls": calls, "successfulCalls": successes,
+                                   "averageDuration": duration / calls if calls else 0},
+                })
+        return {"tools": tools, "totalTools": len(tools)}
+
+    def mcp_clients(self) -> Dict[str, Any]:
+        uptime = int((time.time() - self.started) * 1000)
+        tools_by_client: Dict[str, List[str]] = {}
+        for _, tool, client, _, _ in PIPELINE_STEPS:
+            tools_by_client.setdefault(client, []).append(tool)
+        return {"clients": [{
+            "serverName": name,
+            "clientId": hashlib.sha1(name.encode()).hexdigest(),
+            "serverUrl": f"stand-in://{name}",
+            "active": True,
+            "toolCount": len(tools_by_client.get(name, [])),
+            "toolNames": tools_by_client.get(name, []),
+            "uptime": uptime,
+            "eventBusAddress": f"mcp.client.{name}",
+        } for name in MCP_CLIENTS], "totalClients": len(MCP_CLIENTS)}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "StandInServer"
+
+    ROUTES = (
+        ("GET", re.compile(r"^/health$"), "_get_json", "health"),
+        ("GET", re.compile(r"^/status$"), "_get_json", "status"),
+        ("GET", re.compile(r"^/hosts/status$"), "_get_json", "hosts_status"),
+        ("GET", re.compile(r"^/mcp/status$"), "_get_json", "mcp_status"),
+        ("GET", re.compile(r"^/mcp/tools$"), "_get_tools", None),
+        ("GET", re.compile(r"^/mcp/clients$"), "_get_json", "mcp_clients"),
+        ("POST", re.compile(r"^/conversations$"), "_start_conversation", None),
+        ("GET", re.compile(r"^/conversations/([^/]+)/stream$"), "_resume_conversation", None),
+        ("GET", re.compile(r"^/conversations/([^/]+)/status$"), "_session_status", None),
+        ("POST", re.compile(r"^/conversations/([^/]+)/interrupt$"), "_interrupt", None),
+        ("POST", re.compile(r"^/conversations/([^/]+)/feedback$"), "_feedback", None),
+        ("DELETE", re.compile(r"^/conversations/([^/]+)$"), "_cancel", None),
+    )
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    @property
+    def backend(self) -> Backend:
+        return self.server.backend
+
+    def _dispatch(self, method: str) -> None:
+        backend = self.backend
+        backend.count_request()
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        path = self.path.split("?", 1)[0]
+        if not path.startswith(API_PREFIX):
+            return self._send_json(404, {"error": {"message": f"Unknown path {path}"}})
+        path = path[len(API_PREFIX):]
+        profile = backend.profile
+        if profile.latency:
+            time.sleep(profile.spread(profile.latency))
+        if profile.chance(profile.http_error_rate):
+            return self._send_json(503, {"error": {"message": "Service unavailable (injected)"}})
+        for route_method, pattern, handler, argument in self.ROUTES:
+            match = pattern.match(path)
+            if match and route_method == method:
+                args = (argument,) if argument else match.groups()
+                return getattr(self, handler)(body, *args)
+        self._send_json(404, {"error": {"message": f"No route for {method} {path}"}})
+
+    def _send_json(self, status: int, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _get_json(self, body: bytes, name: str) -> None:
+        self._send_json(200, getattr(self.backend, name)())
+
+    def _get_tools(self, body: bytes) -> None:
+        data = self.backend.mcp_tools()
+        etag = '"%s"' % hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._send_json(200, data, {"ETag": etag})
+
+    def _session_or_404(self, session_id: str) -> Optional[Session]:
+        session = self.backend.session(session_id)
+        if session is None:
+            self._send_json(404, {"error": {"message": f"Unknown session {session_id}"}})
+        return session
+
+    def _start_conversation(self, body: bytes) -> None:
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": {"message": "Request body is not JSON"}})
+        if not payload.get("messages"):
+            return self._send_json(400, {"error": {"message": "messages is required"}})
+        self._stream(self.backend.start_session(payload), 0)
+
+    def _resume_conversation(self, body: bytes, session_id: str) -> None:
+        session = self._session_or_404(session_id)
+        if session is None:
+            return
+        profile = self.backend.profile
+        if self.backend.fail_resume(session_id):
+            headers = {"Retry-After": str(profile.resume_retry_after)} if profile.resume_retry_after is not None else None
+            return self._send_json(503, {"error": {"message": "Resume unavailable (injected)"}}, headers)
+        last_event_id = self.headers.get("Last-Event-ID", "")
+        index = int(last_event_id) + 1 if last_event_id.isdigit() else 0
+        # Like servers that replay a window, some events the client already has may come again
+        self._stream(session, max(0, index - profile.replay_overlap))
+
+    def _stream(self, session: Session, index: int) -> None:
+        """Write the session's events from index on as SSE, until the session ends or the connection drops"""
+        profile = self.backend.profile
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        # Drop this connection after a random number of events (the session keeps running)
+        drop_after = None
+        if profile.chance(profile.disconnect_rate):
+            drop_after = profile.disconnect_after or profile.randint(1, 20)
+        sent = 0
+        try:
+            self._chunk(b"retry: 500\n\n")
+            while True:
+                events, finished = session.wait_events(index, 1.0)
+                for event_id, event, data in events:
+                    if drop_after is not None and sent >= drop_after:
+                        self.connection.shutdown(socket.SHUT_RDWR)
+                        self.close_connection = True
+                        return
+                    self._chunk(f"id: {event_id}\nevent: {event}\ndata: {data}\n\n".encode())
+                    sent += 1
+                index += len(events)
+                if finished and not events:
+                    break
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away; the session goes on until interrupted, like the real host
+            self.close_connection = True
+
+    def _chunk(self, data: bytes) -> None:
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _session_status(self, body: bytes, session_id: str) -> None:
+        session = self._session_or_404(session_id)
+        if session is not None:
+            self._send_json(200, {"sessionId": session_id, "completed": session.finished,
+                                  "events": len(session.events),
+                                  "duration": int((time.time() - session.created) * 1000)})
+
+    def _interrupt(self, body: bytes, session_id: str) -> None:
+        session = self._session_or_404(session_id)
+        if session is not None:
+            reason = (json.loads(body or b"{}") or {}).get("reason", "User requested")
+            self._send_json(200, {"sessionId": session_id, "interrupted": session.interrupt(reason)})
+
+    def _cancel(self, body: bytes, session_id: str) -> None:
+        session = self._session_or_404(session_id)
+        if session is not None:
+            self._send_json(200, {"sessionId": session_id, "cancelled": session.cancel()})
+
+    def _feedback(self, body: bytes, session_id: str) -> None:
+        if self._session_or_404(session_id) is not None:
+            self._send_json(200, {"sessionId": session_id, "status": "received"})
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], profile: Profile, verbose: bool = False):
+        super().__init__(address, Handler)
+        self.backend = Backend(profile)
+        self.verbose = verbose
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+
+def serve_in_thread(profile: Optional[Profile] = None, host: str = "127.0.0.1", port: int = 0) -> StandInServer:
+    """Start a stand-in on a background thread (port 0 picks a free one); shutdown() stops it"""
+    server = StandInServer((host, port), profile or Profile())
+    threading.Thread(target=server.serve_forever, name="stand-in-backend", daemon=True).start()
+    return server
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """Profile options, shared with the load test's --stand-in mode"""
+    defaults = Profile()
+    group = parser.add_argument_group("stand-in profile")
+    group.add_argument("--step-delay", type=float, default=defaults.step_delay, help="Mean seconds per pipeline step")
+    group.add_argument("--events-per-step", type=int, default=defaults.events_per_step)
+    group.add_argument("--jitter", type=float, default=defaults.jitter, help="Relative spread of delays")
+    group.add_argument("--heartbeat-interval", type=float, default=defaults.heartbeat_interval)
+    group.add_argument("--rows", type=int, default=defaults.rows, help="Result rows of full-pipeline answers")
+    group.add_argument("--answer-chars", type=int, default=defaults.answer_chars)
+    group.add_argument("--latency", type=float, default=defaults.latency, help="Seconds added to every response")
+    group.add_argument("--first-event-delay", type=float, default=defaults.first_event_delay)
+    group.add_argument("--interrupt-delay", type=float, default=defaults.interrupt_delay)
+    group.add_argument("--disconnect-rate", type=float, default=defaults.disconnect_rate)
+    group.add_argument("--disconnect-after", type=int, help="Events sent before a drop (default: random)")
+    group.add_argument("--replay-overlap", type=int, default=defaults.replay_overlap,
+                       help="Events before Last-Event-ID sent again on resume")
+    group.add_argument("--stall-rate", type=float, default=defaults.stall_rate)
+    group.add_argument("--stall-seconds", type=float, default=defaults.stall_seconds)
+    group.add_argument("--slow-heartbeat-rate", type=float, default=defaults.slow_heartbeat_rate)
+    group.add_argument("--slow-heartbeat-factor", type=float, default=defaults.slow_heartbeat_factor)
+    group.add_argument("--oversized-rate", type=float, default=defaults.oversized_rate)
+    group.add_argument("--oversized-kb", type=int, default=defaults.oversized_kb)
+    group.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    group.add_argument("--http-error-rate", type=float, default=defaults.http_error_rate)
+    group.add_argument("--resume-errors", type=int, default=defaults.resume_errors,
+                       help="Resume requests per session answered with 503")
+    group.add_argument("--resume-retry-after", type=int, help="Retry-After seconds sent with those 503s")
+    group.add_argument("--stand-in-seed", type=int, dest="stand_in_seed", help="Random seed of the stand-in")
+
+
+def profile_from_args(args: argparse.Namespace) -> Profile:
+    return Profile(
+        step_delay=args.step_delay, events_per_step=args.events_per_step, jitter=args.jitter,
+        heartbeat_interval=args.heartbeat_interval, rows=args.rows, answer_chars=args.answer_chars,
+        latency=args.latency, first_event_delay=args.first_event_delay, interrupt_delay=args.interrupt_delay,
+        disconnect_rate=args.disconnect_rate, disconnect_after=args.disconnect_after,
+        replay_overlap=args.replay_overlap, stall_rate=args.stall_rate, stall_seconds=args.stall_seconds,
+        slow_heartbeat_rate=args.slow_heartbeat_rate, slow_heartbeat_factor=args.slow_heartbeat_factor,
+        oversized_rate=args.oversized_rate, oversized_kb=args.oversized_kb, error_rate=args.error_rate,
+        http_error_rate=args.http_error_rate, resume_errors=args.resume_errors,
+        resume_retry_after=args.resume_retry_after, seed=args.stand_in_seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    server = StandInServer((args.host, args.port), profile_from_args(args), verbose=args.verbose)
+    print(f"Stand-in Agents-MCP-Host at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,61 @@
 import requests
-import json
 import streamlit as st
+import sys
+import os
+import time
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.agents import AGENT_CONFIGS
+from utils.api_client import get_api_client
+from utils.chat_events import CHAT_DISPATCHER, StreamContext
+from utils.chat_history import build_history
+from utils.chat_persistence import get_chat_registry, new_chat_id
+from utils.chat_store import ChatMessage, payload_rows
+from utils.conversation_metrics import ConversationRecorder
+from utils.result_export import CSV_COMPRESSIONS, PARQUET_COMPRESSIONS, export_formats, write_export
+from utils.result_table import render_export_button, render_result_table
+from utils.sse import iter_with_idle_ticks
+from utils.stream_control import STOP_DEADLINE, get_stream_control
+from utils.stream_deadlines import StreamDeadlines, StreamTimeout
+from utils.stream_renderer import StreamRenderer
+from utils.waterfall import render_waterfall
 
 # Base URL for backend API
 BASE_URL = "http://localhost:8080"
 
+# Maximum repaints per second of the streaming response
+RENDER_MAX_FPS = 10
 
-# Predefined Agent Configurations
-AGENT_CONFIGS = {
-    "Oracle DB Answerer": {
-        "backstory": "You are a senior Oracle database analyst with 15+ years of experience. You have deep knowledge of Oracle SQL, PL/SQL, database administration, performance tuning, and data modeling. You excel at understanding business requirements and translating them into efficient database queries. You always strive to provide data-driven answers by executing queries and analyzing actual results.",
-        "guidance": "Always execute queries to provide accurate, data-driven answers. Use the full pipeline (depth 10) when possible. Explore schema, analyze queries, generate SQL, validate, optimize, execute, and format results. Be thorough and precise. When users ask questions, find the actual data to answer them."
-    },
-    "Oracle SQL Builder": {
-        "backstory": "You are an Oracle SQL generation specialist focused on creating perfectly optimized queries. You understand complex SQL patterns, window functions, CTEs, hierarchical queries, and Oracle-specific features. Your expertise lies in query construction and optimization, but you do not execute queries - you only generate and validate them.",
-        "guidance": "Focus on SQL generation and validation only. Never execute queries. Stop at pipeline level 5 (validation). Provide detailed explanations of the SQL you generate, including what each part does and why it's structured that way. Suggest indexes and optimization strategies but don't run the queries."
-    },
-    "Direct LLM No Tool": {
-        "backstory": "You are a helpful general assistant without access to any database or external tools. You can only provide information based on your training data and general knowledge. You cannot execute queries, access databases, or use any MCP tools.",
-        "guidance": "Do not use any database tools or MCP clients. Pipeline depth should be 0 - no manager execution. Respond only with general knowledge and explanations. If asked about specific data, explain that you cannot access databases and suggest what kinds of queries would be needed."
-    },
-    "Free Agent": {
-        "backstory": None,  # User will provide
-        "guidance": None     # User will provide
-    }
-}
+# Conversation history sent per request: character budget and always-sent recent exchanges
+HISTORY_MAX_CHARS = 16000
+HISTORY_PINNED_TURNS = 2
 
-# Initialize session state
-if "universal_chat_messages" not in st.session_state:
-    st.session_state.universal_chat_messages = []
+# Rows written per chunk when exporting results to a file
+EXPORT_CHUNK_ROWS = 10000
 
+# Seconds between updates of the elapsed-time status while an answer streams
+STATUS_INTERVAL = 1.0
+
+
+# Initialize session state
 if "universal_chat_stream_id" not in st.session_state:
     st.session_state.universal_chat_stream_id = None
     
 if "universal_chat_is_executing" not in st.session_state:
     st.session_state.universal_chat_is_executing = False
 
+if "universal_chat_last_request" not in st.session_state:
+    st.session_state.universal_chat_last_request = None
+
+if "universal_chat_last_timings" not in st.session_state:
+    st.session_state.universal_chat_last_timings = None
+
+# (chat id, turn, message) of an answer abandoned mid-stream, awaiting its stop report
+if "universal_chat_stopped" not in st.session_state:
+    st.session_state.universal_chat_stopped = None
+
 if "selected_agent" not in st.session_state:
     st.session_state.selected_agent = "Oracle DB Answerer"
 
@@ -45,6 +65,14 @@ if "custom_backstory" not in st.session_state:
 if "custom_guidance" not in st.session_state:
     st.session_state.custom_guidance = ""
 
+# Conversations are stored on disk; the chat id in the URL survives browser reloads
+if "universal_chat_id" not in st.session_state:
+    st.session_state.universal_chat_id = st.query_params.get("chat") or new_chat_id()
+    stored_agent = get_chat_registry().get(st.session_state.universal_chat_id).agent
+    if stored_agent in AGENT_CONFIGS:
+        st.session_state.selected_agent = stored_agent
+st.query_params["chat"] = st.session_state.universal_chat_id
+
 
 st.title("🚀 Universal Chat")
 
@@ -64,9 +92,9 @@ for i, agent_name in enumerate(agents):
             type=button_type,
             use_container_width=True
         ):
-            # Update selection and clear chat
+            # Update selection and start a new chat
             st.session_state.selected_agent = agent_name
-            st.session_state.universal_chat_messages = []
+            st.session_state.universal_chat_id = new_chat_id()
             st.session_state.universal_chat_stream_id = None
             st.session_state.universal_chat_is_executing = False
             st.rerun()
@@ -110,13 +138,31 @@ else:  # Free Agent
     )
     st.session_state.custom_guidance = custom_guidance
 
+st.caption(f"⏱️ Stream deadlines: {StreamDeadlines.from_config(AGENT_CONFIGS[selected_agent].get('deadlines')).summary()}")
+
+# Result export settings (applied to the next results)
+with st.expander("📥 Result Export"):
+    export_cols = st.columns(2)
+    with export_cols[0]:
+        export_format = st.selectbox(
+            "File format",
+            export_formats(),
+            format_func=str.upper,
+            key="universal_chat_export_format"
+        )
+    with export_cols[1]:
+        export_compression = st.selectbox(
+            "Compression",
+            CSV_COMPRESSIONS if export_format == "csv" else PARQUET_COMPRESSIONS,
+            format_func=lambda compression: compression or "none",
+            key=f"universal_chat_export_compression_{export_format}"
+        )
+
 # Simple divider
 st.markdown("---")
 
-def send_to_backend_streaming(messages, backstory, guidance):
+def send_to_backend_streaming(messages, backstory, guidance, ctx=None, deadlines=None):
     """Send messages to Agents-MCP-Host backend with SSE streaming"""
-    url = f"{BASE_URL}/host/v1/conversations"
-    
     # Build payload with backstory and guidance for UniversalHost
     payload = {
         "messages": messages
@@ -128,318 +174,65 @@ def send_to_backend_streaming(messages, backstory, guidance):
     if guidance:
         payload["guidance"] = guidance
     
-    headers = {"Accept": "text/event-stream", "Content-Type": "application/json"}
-    
     # Set execution state
     st.session_state.universal_chat_is_executing = True
     
+    if ctx is None:
+        ctx = StreamContext()
+    handle = None
+    stream = None
+    outcome = None  # Turn outcome for the metrics when the stream fails
+    # Client-side latency of the turn, recorded into the process-wide metrics (see the Performance page)
+    recorder = ConversationRecorder(st.session_state.selected_agent)
     try:
-        # Make streaming request
-        response = requests.post(url, json=payload, headers=headers, stream=True, timeout=300)
-        response.raise_for_status()
+        # Make streaming request over the shared client's keep-alive stream pool;
+        # dropped connections are resumed with Last-Event-ID and replayed events skipped
+        client = get_api_client(f"{BASE_URL}/host/v1")
+        stream = client.stream_conversation(payload, deadlines=deadlines)
+        # If this run stops reading before the answer is complete, the backend session is interrupted
+        handle = get_stream_control().register(st.session_state.universal_chat_id, stream, client)
+        
+        def remember_stream_id(stream_id):
+            st.session_state.universal_chat_stream_id = stream_id
         
-        # Manual SSE parsing
-        current_event = None
-        current_data = []
-        current_step = None  # Track current step for indentation
+        ctx.on_session = remember_stream_id
+        resolve = CHAT_DISPATCHER.resolve
         
-        # Process SSE stream line by line
-        for line in response.iter_lines():
-            if not line:
-                # Empty line signals end of an event
-                if current_event and current_data:
-                    # Process the completed event
-                    data_str = '\n'.join(current_data)
-                    
-                    # Parse and handle the event - simplified for cleaner output
-                    try:
-                        if current_event == 'connected':
-                            # Handle connection event silently
-                            data = json.loads(data_str)
-                            stream_id = data.get('sessionId', 'unknown')
-                            st.session_state.universal_chat_stream_id = stream_id
-                            
-                        elif current_event == 'progress':
-                            # Show all progress events
-                            data = json.loads(data_str)
-                            details = data.get('details', {})
-                            phase = details.get('phase', '')
-                            message = data.get('message', '')
-                            step = data.get('step', '')
-                            
-                            # Format based on phase
-                            if phase in ['intent_complete', 'schema_complete', 'sql_complete', 'execution_complete']:
-                                # Milestone completion - show with checkmark on new line
-                                if message:
-                                    yield f"\n{message}\n"
-                            elif phase == 'milestone_decision':
-                                # Show strategy selection prominently (already has newline)
-                                target = details.get('target_milestone', 0)
-                                yield f"\n📍 **Strategy:** {message}\n\n"
-                            elif message and step != 'host_started':  # Skip the initial host started message
-                                # Check if this is a Step event
-                                if step and step.startswith("Step "):
-                                    # This is a main step - track it and show prominently
-                                    current_step = step
-                                    if step != message:
-                                        yield f"\n➤ **{step}** - {message}\n"
-                                    else:
-                                        yield f"\n➤ **{step}**\n"
-                                else:
-                                    # Other progress events get indented if we're in a step
-                                    if current_step:
-                                        yield f"\n    └─ {message}\n"
-                                    else:
-                                        yield f"\n➤ {message}\n"
-                            
-                            # Handle SQL-specific phases
-                            if phase == 'sql_query':
-                                query = details.get('query', '')
-                                if query:
-                                    # SQL code blocks render properly without manual indentation
-                                    yield f"\n```sql\n{query}\n```\n"
-                                    
-                            elif phase == 'sql_result':
-                                row_count = details.get('rowCount', 0)
-                                preview = details.get('preview', [])
-                                if row_count > 0:
-                                    yield f"\nFound {row_count} rows:\n"
-                                    if preview:
-                                        for row in preview[:3]:
-                                            yield f"{json.dumps(row, indent=2)}\n"
-                                        if row_count > 3:
-                                            yield f"... and {row_count - 3} more rows\n"
-                            
-                            # Enhanced progress phase handling
-                            elif phase == 'llm_request':
-                                message_count = details.get('messageCount', 0)
-                                yield f"\n🤖 Sending request to LLM ({message_count} messages)...\n"
-                            
-                            elif phase == 'llm_response':
-                                response_length = details.get('responseLength', 0)
-                                yield f"\n✅ Received LLM response ({response_length} characters)\n"
-                            
-                            elif phase == 'metadata_exploration':
-                                table = details.get('table', '')
-                                column_count = details.get('columnCount', 0)
-                                yield f"\n🔍 Exploring table '{table}' ({column_count} columns)\n"
-                            
-                            elif phase == 'schema_matching':
-                                match_count = details.get('matchCount', 0)
-                                matched_tables = details.get('matchedTables', [])
-                                yield f"\n🎯 Schema matching: Found {match_count} relevant tables\n"
-                                if matched_tables and len(matched_tables) <= 5:
-                                    for table in matched_tables:
-                                        yield f"  • {table}\n"
-                            
-                            elif phase == 'enum_mapping':
-                                column = details.get('column', '')
-                                mapping_count = details.get('mappingCount', 0)
-                                yield f"\n🔤 Mapping enumeration values for '{column}' ({mapping_count} mappings)\n"
-                            
-                            elif phase == 'tool_selection':
-                                strategy = details.get('strategy', '')
-                                tool_count = details.get('toolCount', 0)
-                                selected_tools = details.get('selectedTools', [])
-                                yield f"\n🛠️ Tool selection: {strategy} strategy ({tool_count} tools)\n"
-                                if selected_tools and len(selected_tools) <= 3:
-                                    for tool in selected_tools:
-                                        yield f"  • {tool}\n"
-                            
-                            elif phase == 'interrupt_detected':
-                                operation = details.get('operation', '')
-                                message = details.get('message', 'Operation interrupted')
-                                yield f"\n⚠️ Interrupt detected during {operation}: {message}\n"
-                        
-                        # Handle pipeline-specific events
-                        elif current_event and current_event.startswith('pipeline'):
-                            data = json.loads(data_str)
-                            
-                            if current_event == 'pipeline.depth_determined':
-                                depth = data.get('execution_depth', 0)
-                                query_type = data.get('query_type', 'unknown')
-                                yield f"📊 Analysis: {query_type} query, using depth {depth}\n"
-                                
-                            elif current_event == 'pipeline.execution_start':
-                                total_levels = data.get('total_levels', 0)
-                                yield f"🚀 Starting pipeline execution ({total_levels} levels)\n"
-                                
-                            elif current_event == 'pipeline.level_start':
-                                level = data.get('level', 0)
-                                description = data.get('description', '')
-                                yield f"  ▶️ Level {level}: {description}\n"
-                                
-                            elif current_event == 'pipeline.execution_complete':
-                                levels_completed = data.get('levels_completed', 0)
-                                yield f"✅ Pipeline complete ({levels_completed} levels executed)\n"
-                        
-                        # Handle milestone completion events
-                        elif current_event and '.' in current_event and current_event.startswith('milestone.'):
-                            data = json.loads(data_str)
-                            message = data.get('message', '')
-                            milestone_name = data.get('milestone_name', '')
-                            
-                            # These are completion events, indent under current step
-                            if current_step:
-                                # Clean up the message - remove duplicate milestone name if present
-                                clean_message = message
-                                if milestone_name and milestone_name in message:
-                                    clean_message = message.replace(f"{milestone_name} - ", "")
-                                yield f"    └─ {clean_message}\n"
-                            else:
-                                yield f"\n➤ {message}\n"
-                        
-                        # Handle tool events (always show)
-                        elif current_event == 'tool_start':
-                            data = json.loads(data_str)
-                            tool = data.get('tool', 'unknown')
-                            description = data.get('description', '')
-                            if current_step:
-                                # Add extra newline at start for proper spacing
-                                yield f"\n    ├─ 🔧 {description or tool}...\n"
-                            else:
-                                yield f"\n├─ 🔧 {description or tool}...\n"
-                            
-                        elif current_event == 'tool_complete':
-                            data = json.loads(data_str)
-                            success = data.get('success', False)
-                            tool = data.get('tool', 'unknown')
-                            
-                            if not success:
-                                # Always show failures with extra newline
-                                if current_step:
-                                    yield f"\n    ❌ Tool failed: {tool}\n"
-                                else:
-                                    yield f"\n❌ Tool failed: {tool}\n"
-                            elif success:
-                                # Always show success with extra newline
-                                if current_step:
-                                    yield f"\n    ├─ ✓ {tool} completed\n"
-                                else:
-                                    yield f"\n├─ ✓ {tool} completed\n"
-                                            
-                        elif current_event == 'final':
-                            data = json.loads(data_str)
-                            # Backend sends 'answer' field, not 'content'
-                            content = data.get('answer', data.get('content', ''))
-                            response_type = data.get('type', 'unknown')
-                            
-                            # Display the main answer
-                            if content:
-                                yield content
-                            
-                            # Add type-specific additional info
-                            if response_type == 'sql' and data.get('sql'):
-                                yield f"\n\n```sql\n{data.get('sql')}\n```"
-                            elif response_type == 'data':
-                                row_count = data.get('row_count', 0)
-                                if row_count > 0:
-                                    yield f"\n\n📊 Query returned {row_count} rows"
-                                    if data.get('data'):
-                                        yield "\n```json\n" + json.dumps(data.get('data'), indent=2) + "\n```"
-                            elif response_type == 'natural_response' and data.get('data_points'):
-                                yield f"\n\n*Based on {data.get('data_points')} data points*"
-                            
-                            # Clear execution state on completion
-                            st.session_state.universal_chat_is_executing = False
-                            st.session_state.universal_chat_stream_id = None
-                            return  # Exit the generator
-                            
-                        elif current_event == 'error':
-                            data = json.loads(data_str)
-                            yield f"❌ Error: {data.get('message', 'Unknown error')}"
-                            # Clear execution state on error
-                            st.session_state.universal_chat_is_executing = False
-                            st.session_state.universal_chat_stream_id = None
-                            return
-                        
-                        # Critical event handlers
-                        elif current_event == 'agent_question':
-                            data = json.loads(data_str)
-                            question = data.get('question', '')
-                            options = data.get('options', [])
-                            yield f"\n❓ **Agent Question:** {question}\n"
-                            if options:
-                                yield "Options:\n"
-                                for i, option in enumerate(options, 1):
-                                    yield f"  {i}. {option}\n"
-                            yield "\n⏸️ *Waiting for your response...*\n"
-                        
-                        elif current_event == 'execution_paused':
-                            data = json.loads(data_str)
-                            reason = data.get('reason', 'Execution paused')
-                            message = data.get('message', '')
-                            yield f"\n⏸️ **Execution Paused:** {reason}\n"
-                            if message:
-                                yield f"{message}\n"
-                        
-                        elif current_event == 'critical_error':
-                            data = json.loads(data_str)
-                            message = data.get('message', 'Critical system error occurred')
-                            severity = data.get('severity', 'CRITICAL')
-                            yield f"\n🚨 **{severity} ERROR:** {message}\n"
-                            yield "Please restart the system or contact support.\n"
-                        
-                        elif current_event == 'timeout':
-                            data = json.loads(data_str)
-                            message = data.get('message', 'Request timed out')
-                            yield f"\n⏱️ **Timeout:** {message}\n"
-                            st.session_state.universal_chat_is_executing = False
-                            st.session_state.universal_chat_stream_id = None
-                            return
-                        
-                        # Interrupt event handlers
-                        elif current_event == 'interrupt':
-                            data = json.loads(data_str)
-                            reason = data.get('reason', 'User requested interrupt')
-                            yield f"\n🛑 **Interrupt Requested:** {reason}\n"
-                        
-                        elif current_event == 'interrupted':
-                            data = json.loads(data_str)
-                            message = data.get('message', 'Request was interrupted')
-                            yield f"\n✋ **Interrupted:** {message}\n"
-                            st.session_state.universal_chat_is_executing = False
-                            st.session_state.universal_chat_stream_id = None
-                            return
-                        
-                        elif current_event == 'interrupt_acknowledged':
-                            data = json.loads(data_str)
-                            reason = data.get('reason', '')
-                            yield f"\n✅ **Interrupt Acknowledged:** Processing interrupt...\n"
-                        
-                        # Connection management events
-                        elif current_event == 'heartbeat':
-                            # Silently handle heartbeat - could add visual indicator if needed
-                            pass
-                        
-                        elif current_event == 'milestone_decision':
-                            data = json.loads(data_str)
-                            target = data.get('target_milestone', 0)
-                            description = data.get('description', '')
-                            yield f"\n📍 **Processing Strategy:** Level {target} - {description}\n"
-                            
-                    except Exception as e:
-                        print(f"[DEBUG] Error handling event: {e}")
-                    
-                    # Reset for next event
-                    current_event = None
-                    current_data = []
+        # Process SSE stream event by event; unknown events and heartbeats resolve to None.
+        # Reading happens on a background thread so a quiet stream still yields an
+        # empty chunk every frame, letting the renderer paint its pending tail.
+        # If this run stops reading early, the rest of the stream goes to the stop handler.
+        # The recorder times events on the reader thread, as they arrive, before any queueing or rendering.
+        for event in iter_with_idle_ticks(recorder.observe(stream), 1.0 / RENDER_MAX_FPS,
+                                          on_abandon=handle.drain):
+            if event is None:
+                yield ""
+                continue
+            handle.record(event)
+            handler = resolve(event.event)
+            if handler is None:
                 continue
             
-            # Decode the line
-            line = line.decode('utf-8') if isinstance(line, bytes) else line
+            try:
+                chunks = handler(event, ctx)
+                if chunks:
+                    yield from chunks
+            except Exception as e:
+                print(f"[DEBUG] Error handling event: {e}")
             
-            # Parse SSE format
-            if line.startswith('event: '):
-                current_event = line[7:].strip()
-            elif line.startswith('data: '):
-                current_data.append(line[6:])
+            if ctx.finished:
+                # Clear execution state on completion, error, timeout or interrupt
+                st.session_state.universal_chat_is_executing = False
+                st.session_state.universal_chat_stream_id = None
+                return
                 
     except requests.exceptions.ConnectionError:
+        outcome = "connection_error"
         st.session_state.universal_chat_is_executing = False
         st.session_state.universal_chat_stream_id = None
         yield "❌ Backend server not running. Please start Agents-MCP-Host on port 8080."
     except requests.exceptions.HTTPError as e:
+        outcome = "http_error"
         try:
             error_detail = e.response.json().get('error', {}).get('message', str(e))
         except:
@@ -447,22 +240,43 @@ def send_to_backend_streaming(messages, backstory, guidance):
         st.session_state.universal_chat_is_executing = False
         st.session_state.universal_chat_stream_id = None
         yield f"❌ Backend error: {error_detail}"
+    except StreamTimeout as e:
+        outcome = "timeout"
+        st.session_state.universal_chat_is_executing = False
+        st.session_state.universal_chat_stream_id = None
+        yield f"❌ Request timed out. {e}"
     except requests.exceptions.Timeout:
+        outcome = "timeout"
         st.session_state.universal_chat_is_executing = False
         st.session_state.universal_chat_stream_id = None
         yield "❌ Request timed out. The backend took too long to respond."
     except requests.exceptions.ChunkedEncodingError:
+        outcome = "connection_error"
         st.session_state.universal_chat_is_executing = False
         st.session_state.universal_chat_stream_id = None
         yield "❌ Connection lost. The backend connection was interrupted. Please try again."
+    except GeneratorExit:
+        # The page stopped reading (Stop button or another rerun)
+        outcome = "stopped"
+        raise
     except Exception as e:
+        outcome = "error"
         st.session_state.universal_chat_is_executing = False
         st.session_state.universal_chat_stream_id = None
         yield f"❌ Unexpected error: {str(e)}"
+    finally:
+        st.session_state.universal_chat_last_timings = recorder.finish(stream, outcome)
+        # Close a finished stream, or stop the backend work of an abandoned one
+        # (closing the stream also releases the reader thread)
+        if handle:
+            if outcome != "stopped":
+                # Read to its end or failure: only a page that stopped reading early interrupts
+                handle.mark_ended()
+            get_stream_control().release(handle, finished=ctx.finished)
 
 
-def process_command(command):
-    """Build messages for backend API and stream the response"""
+def process_command(command, history, ctx=None):
+    """Build messages for backend API from the prior history and stream the response"""
     # Get configuration for selected agent
     config = AGENT_CONFIGS[st.session_state.selected_agent]
     
@@ -482,52 +296,158 @@ def process_command(command):
         backstory = config["backstory"]
         guidance = config["guidance"]
     
-    # Build messages for backend API
-    messages = []
-    
-    # Add all messages to the API request
-    for msg in st.session_state.universal_chat_messages:
-        if msg["role"] != "system":  # Don't send system messages to backend
-            messages.append({"role": msg["role"], "content": msg["content"]})
-    
-    # Add current user command
-    messages.append({"role": "user", "content": command})
+    # Build messages for backend API: answers only, within the history budget
+    messages, history_stats = build_history(
+        history,
+        command,
+        max_chars=HISTORY_MAX_CHARS,
+        pinned_turns=HISTORY_PINNED_TURNS
+    )
+    st.session_state.universal_chat_last_request = history_stats.summary()
     
-    # Stream from backend with backstory and guidance
-    yield from send_to_backend_streaming(messages, backstory, guidance)
+    # Stream from backend with backstory and guidance, within the agent's deadlines
+    deadlines = StreamDeadlines.from_config(config.get("deadlines"))
+    yield from send_to_backend_streaming(messages, backstory, guidance, ctx, deadlines)
+
+
+def request_stop():
+    """Stop button callback; the click's rerun abandons the stream, which stops the backend session"""
+    st.session_state.universal_chat_stop_requested = True
 
 
+chat = get_chat_registry().get(st.session_state.universal_chat_id, agent=selected_agent)
+
+# Note in a stopped answer how its backend session ended (waiting for it after a Stop click)
+if st.session_state.pop("universal_chat_stop_requested", False):
+    with st.spinner("Stopping..."):
+        get_stream_control().wait(chat.chat_id, STOP_DEADLINE + 1)
+if st.session_state.universal_chat_stopped:
+    stopped_chat_id, stopped_turn, stopped_message = st.session_state.universal_chat_stopped
+    stop_report = get_stream_control().take(stopped_chat_id)
+    if stop_report is not None:
+        st.session_state.universal_chat_stopped = None
+        if stopped_chat_id == chat.chat_id and stopped_turn < chat.turn_count:
+            stopped_message.add_trace(f"\n⏱️ {stop_report.summary()}\n")
+            chat.save(stopped_turn, stopped_message)
+
 # Simple clear button
 if st.button("🔄 Clear Chat", key="clear_btn"):
-    st.session_state.universal_chat_messages = []
+    chat.clear()
     st.session_state.universal_chat_is_executing = False
     st.session_state.universal_chat_stream_id = None
     st.rerun()
 
+# Older turns stay on disk until requested
+if chat.has_older:
+    if st.button(f"⬆️ Load older messages ({chat.first_loaded_turn} more)", key="load_older_btn"):
+        chat.load_older()
+        st.rerun()
+
 # Display chat messages from history on app rerun
-for message in st.session_state.universal_chat_messages:
-    if message["role"] != "system":  # Don't display system messages
-        with st.chat_message(message["role"]):
-            # Use markdown for all messages
-            st.markdown(message["content"])
+for turn, message in enumerate(chat.messages, start=chat.first_loaded_turn):
+    with st.chat_message(message.role):
+        # Use markdown for all messages; result rows go to a table, not the markdown
+        st.markdown(message.markdown())
+        if message.result:
+            render_result_table(message.result, key=f"result_{chat.chat_id}_{turn}")
+        if message.export:
+            render_export_button(message.export, key=f"export_{chat.chat_id}_{turn}")
+        if message.request:
+            st.caption(f"📦 {message.request}")
+        if message.spans:
+            with st.expander("⏱️ Timeline"):
+                render_waterfall(message.spans, key=f"waterfall_{chat.chat_id}_{turn}")
 
 # React to user input
 if prompt := st.chat_input("Ask me anything..."):
     # Display user message in chat message container
     with st.chat_message("user"):
         st.markdown(prompt)
-    # Add user message to chat history
-    st.session_state.universal_chat_messages.append({"role": "user", "content": prompt})
+    # Add user message to chat history (written to disk immediately)
+    history = chat.messages
+    chat.append(ChatMessage("user", answer=prompt))
     
     # Display assistant response with streaming
     with st.chat_message("assistant"):
-        response_placeholder = st.empty()
-        full_response = ""
+        # Stop control and elapsed time, above the streamed answer
+        stop_col, status_col = st.columns([1, 4])
+        stop_slot = stop_col.empty()
+        stop_slot.button("⏹️ Stop", key="universal_chat_stop_btn", on_click=request_stop)
+        status = status_col.empty()
+        
+        renderer = StreamRenderer(max_fps=RENDER_MAX_FPS)
+        ctx = StreamContext()
+        message = ChatMessage("assistant")
+        turn = chat.append(message)
+        st.session_state.universal_chat_last_request = None
+        st.session_state.universal_chat_last_timings = None
+        
+        # Stream the response; chunks are coalesced into frames and finished sections frozen.
+        # Chunks before the final answer form the message's progress trace, saved as it grows.
+        chunks = process_command(prompt, history, ctx)
+        started = time.monotonic()
+        next_status = started
+        streamed = False
+        try:
+            for chunk in chunks:
+                renderer.write(chunk)
+                if ctx.final is None:
+                    message.add_trace(chunk)
+                    chat.checkpoint(turn, message)
+                # Regular updates also let a Stop click take effect while the backend is quiet
+                now = time.monotonic()
+                if now >= next_status:
+                    status.caption(f"⏳ {now - started:.0f}s")
+                    next_status = now + STATUS_INTERVAL
+            streamed = True
+        finally:
+            if not streamed:
+                # The run was abandoned mid-stream (Stop or another rerun): the backend
+                # session is being stopped; keep what was received
+                chunks.close()
+                message.add_trace("\n⏹️ **Stopped** before the answer was complete\n")
+                message.finish(None, st.session_state.universal_chat_last_request, ctx.sql_result)
+                if st.session_state.universal_chat_last_timings:
+                    message.spans = st.session_state.universal_chat_last_timings.spans
+                chat.save(turn, message)
+                st.session_state.universal_chat_stopped = (chat.chat_id, turn, message)
+                st.session_state.universal_chat_is_executing = False
+                st.session_state.universal_chat_stream_id = None
+        stop_slot.empty()
+        status.empty()
+        renderer.close()
+        
+        # Complete the structured response in chat history; only the answer is sent back on later turns
+        request_summary = st.session_state.universal_chat_last_request
+        message.finish(ctx.final, request_summary, ctx.sql_result)
+        timings = st.session_state.universal_chat_last_timings
+        if timings:
+            message.spans = timings.spans
+        
+        # Write all result rows to a file in chunks, straight from the payload
+        rows = payload_rows(ctx.final, ctx.sql_result)
+        if rows:
+            try:
+                message.export = write_export(
+                    rows,
+                    export_format,
+                    export_compression,
+                    chunk_rows=EXPORT_CHUNK_ROWS,
+                    name=f"result_{turn}"
+                )
+            except Exception as e:
+                st.warning(f"Could not export result: {str(e)}")
+        chat.save(turn, message)
         
-        # Stream the response
-        for chunk in process_command(prompt):
-            full_response += chunk
-            response_placeholder.markdown(full_response)
+        if message.result:
+            render_result_table(message.result, key=f"result_{chat.chat_id}_{turn}")
+        if message.export:
+            render_export_button(message.export, key=f"export_{chat.chat_id}_{turn}")
         
-        # Add complete response to chat history
-        st.session_state.universal_chat_messages.append({"role": "assistant", "content": full_response})
\ No newline at end of file
+        # Report what this turn sent to the backend, and where its time went
+        if request_summary:
+            st.caption(f"📦 {request_summary}")
+        if timings:
+            st.caption(f"⏱️ {timings.summary()}")
+            with st.expander("⏱️ Timeline"):
+                render_waterfall(message.spans, key=f"waterfall_{chat.chat_id}_{turn}")
\ No newline at end of file
@@ -6,7 +6,9 @@ import os
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.api_client import MCPApiClient
+from utils.api_client import get_api_client
+from utils.status_poller import get_status_poller
+from utils.ui_components import rerun_on_new_snapshot
 
 # Page config
 st.set_page_config(
@@ -19,27 +21,69 @@ st.set_page_config(
 st.title("🏠 System Dashboard")
 st.markdown("Raw JSON data from system endpoints")
 
-# Refresh button
+# Shared process-wide API client (pooled connections reused across reruns)
+api_client = get_api_client()
+
+# Status comes from one background poller shared by every viewer
+poller = get_status_poller()
+
+# Refresh button asks the poller for a new snapshot (at most one poll per minimum interval)
 if st.button("🔄 Refresh", key="refresh"):
+    poller.refresh()
     st.rerun()
 
+snapshot = poller.snapshot()
+if snapshot is None:
+    st.error("No status yet: the first poll of the backend did not complete in time.")
+    st.stop()
+
+# Rerun only when the shared snapshot changes
+rerun_on_new_snapshot("dashboard", poller, snapshot.version)
+
 # Divider
 st.divider()
 
+# Each section shows its own result or error
+batch = snapshot.batch
+
+# Get health data
+st.subheader("Health Status")
 try:
-    # Initialize API client
-    api_client = MCPApiClient()
-    
-    # Get health data
-    st.subheader("Health Status")
-    health_data = api_client.get_health()
+    health_data = batch.result('get_health')
     st.code(json.dumps(health_data, indent=2), language="json")
-    
-    # Get hosts status
-    st.subheader("Hosts Status")
-    hosts_data = api_client.get_hosts_status()
+except Exception as e:
+    st.error(f"Error fetching data: {str(e)}")
+
+# Get system status
+st.subheader("System Status")
+try:
+    status_data = batch.result('get_status')
+    st.code(json.dumps(status_data, indent=2), language="json")
+except Exception as e:
+    st.error(f"Error fetching data: {str(e)}")
+
+# Get hosts status
+st.subheader("Hosts Status")
+try:
+    hosts_data = batch.result('get_hosts_status')
     st.code(json.dumps(hosts_data, indent=2), language="json")
-    
 except Exception as e:
     st.error(f"Error fetching data: {str(e)}")
-    st.info("Make sure the Agents-MCP-Host backend is running on port 8080.")
\ No newline at end of file
+
+if not batch.complete:
+    st.info("Make sure the Agents-MCP-Host backend is running on port 8080.")
+
+# Shared response cache counters (process-wide, across all sessions)
+cache_stats = api_client.cache_stats()
+st.caption(
+    f"Response cache: {cache_stats['hits']} hits, {cache_stats['stale_hits']} stale hits, "
+    f"{cache_stats['misses']} misses ({cache_stats['hit_ratio']:.0%} hit ratio)"
+)
+
+# Connection pool usage of the shared client
+pool_stats = api_client.pool_stats()
+st.caption(" · ".join(
+    f"{name} pool: {stats['connections_created']} connections for {stats['requests']} requests, "
+    f"{stats['idle']}/{stats['max_size']} idle"
+    for name, stats in pool_stats.items()
+))
@@ -1,12 +1,104 @@
 import streamlit as st
 import json
+import math
 import sys
 import os
+import time
+
+import numpy as np
+import pandas as pd
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.api_client import MCPApiClient
+from utils.api_client import get_api_client
+from utils.mcp_stats_sampler import CLIENT, TOOL, TREND_WINDOW, get_mcp_stats_sampler
+from utils.schema_render import schema_cache
+from utils.status_poller import get_status_poller
+from utils.timeseries import lttb, minmax_downsample
+from utils.tool_catalog import catalog_definitions_digest
+from utils.tool_index import get_tool_index
+from utils.ui_components import rerun_on_new_snapshot
+
+# Tool list page sizes; only one page of tools is rendered per rerun
+PAGE_SIZE_OPTIONS = [10, 25, 50, 100]
+
+# Trend chart time windows (seconds; None for everything sampled)
+TREND_WINDOWS = {"15 minutes": 15 * 60, "1 hour": 3600, "6 hours": 6 * 3600, "24 hours": 24 * 3600, "All": None}
+
+# Points per line in the trend charts after downsampling
+TREND_MAX_POINTS = 300
+
+# Series shown by default: the busiest ones
+TREND_DEFAULT_SERIES = 5
+
+# Trend charts: (title, Derived attribute)
+TREND_CHARTS = (
+    ("Calls per minute", "calls_per_minute"),
+    ("Average duration per interval (ms)", "avg_duration_ms"),
+    ("Success rate per interval (%)", "success_rate"),
+)
+
+
+def truncate(text, length):
+    """Shorten text to length characters with an ellipsis"""
+    return f"{text[:length]}..." if len(text) > length else text
+
+
+def render_tool_details(tool, schema_hash=None):
+    """Render description, input schema, clients and statistics of one tool"""
+    tool_desc = tool.get("description", "No description available")
+    
+    # Tool description
+    st.markdown("**Description:**")
+    st.write(tool_desc)
+    
+    # Input Schema (normalized view and JSON text are memoized per input schema hash)
+    st.markdown("**Input Schema:**")
+    rendered = schema_cache.get(tool, schema_hash)
+    if rendered:
+        st.code(rendered.text, language="json")
+    else:
+        st.write("No input parameters required")
+    
+    # Available in clients
+    st.markdown("**Available in:**")
+    client_details = tool.get("clientDetails", [])
+    if client_details:
+        for client in client_details:
+            status = "🟢" if client.get("active", False) else "🔴"
+            st.write(f"{status} {client.get('serverName', 'Unknown')}")
+    
+    # Statistics if available
+    if "statistics" in tool and tool["statistics"]:
+        stats = tool["statistics"]
+        st.markdown("**Usage Statistics:**")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Calls", stats.get("totalCalls", 0))
+        with col2:
+            st.metric("Success Rate", 
+                     f"{(stats.get('successfulCalls', 0) / max(stats.get('totalCalls', 1), 1) * 100):.1f}%")
+        with col3:
+            avg_duration = stats.get("averageDuration", 0)
+            st.metric("Avg Duration", f"{avg_duration:.0f}ms" if avg_duration else "N/A")
+
+
+def trend_frame(sampler, kind, names, attribute, since, downsample):
+    """Long-form frame (time, series, value) of one derived metric, downsampled per series"""
+    frames = []
+    for name in names:
+        derived = sampler.derived(kind, name, since)
+        values = getattr(derived, attribute)
+        keep = ~np.isnan(values)
+        x, y = derived.times[keep], values[keep]
+        if downsample == "LTTB":
+            x, y = lttb(x, y, TREND_MAX_POINTS)
+        else:
+            x, y = minmax_downsample(x, y, TREND_MAX_POINTS // 2)
+        frames.append(pd.DataFrame({"time": pd.to_datetime(x, unit="s"), "series": name, "value": y}))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["time", "series", "value"])
+
 
 # Page config
 st.set_page_config(
@@ -19,23 +111,40 @@ st.set_page_config(
 st.title("🛠️ MCP Tools")
 st.markdown("Model Context Protocol tools and clients overview")
 
-# Refresh button
+# Shared process-wide API client (pooled connections reused across reruns)
+api_client = get_api_client()
+
+# MCP status comes from the background poller shared by every viewer
+poller = get_status_poller()
+
+# Refresh button bypasses the shared response cache and asks the poller for a new snapshot
 if st.button("🔄 Refresh", key="refresh"):
+    api_client.invalidate_cache()
+    poller.refresh()
     st.rerun()
 
+snapshot = poller.snapshot()
+
+# Rerun only when the shared status snapshot changes
+rerun_on_new_snapshot("mcp_tools", poller, snapshot.version if snapshot else 0)
+
 # Divider
 st.divider()
 
-# Initialize API client
-api_client = MCPApiClient()
+# Fetch tools and clients in parallel once; tabs and the debug view share the results
+batch = api_client.fetch_many(['get_mcp_tools', 'get_mcp_clients'])
+status_batch = snapshot.batch if snapshot else api_client.fetch_many(['get_mcp_status'])
+
+# Statistics history is collected in the background for the whole app process
+sampler = get_mcp_stats_sampler()
 
 # Create tabs for different views
-tab1, tab2, tab3 = st.tabs(["📊 System Overview", "🔧 Available Tools", "🖥️ Connected Clients"])
+tab1, tab2, tab3, tab4 = st.tabs(["📊 System Overview", "🔧 Available Tools", "🖥️ Connected Clients", "📈 Trends"])
 
 with tab1:
     st.subheader("MCP System Status")
     try:
-        mcp_status = api_client.get_mcp_status()
+        mcp_status = status_batch.result('get_mcp_status')
         
         # Display key metrics in columns
         col1, col2, col3, col4 = st.columns(4)
@@ -102,114 +211,76 @@ with tab1:
 with tab2:
     st.subheader("Available MCP Tools")
     try:
-        mcp_tools = api_client.get_mcp_tools()
+        mcp_tools = batch.result('get_mcp_tools')
         
         if "tools" in mcp_tools and mcp_tools["tools"]:
             tools_list = mcp_tools["tools"]
+            catalog = api_client.tool_catalog
             
             # Add search filter
-            search_term = st.text_input("🔍 Search tools by name or description", "")
+            search_term = st.text_input("🔍 Search tools by name, description, parameter or server", "")
             
-            # Filter tools based on search
+            # Ranked search over a prebuilt index, rebuilt only when a tool definition changes
+            # (keyed on the digest that came with this very catalog response, not on statistics)
             if search_term:
-                filtered_tools = [
-                    tool for tool in tools_list
-                    if search_term.lower() in tool.get("name", "").lower() or
-                       search_term.lower() in tool.get("description", "").lower()
-                ]
+                tool_index = get_tool_index(tools_list, catalog_definitions_digest(mcp_tools))
+                # The index may hold an older copy of the same definitions; show the current tools
+                current = {tool.get("name"): tool for tool in tools_list}
+                filtered_tools = [current.get(tool.get("name"), tool) for tool, _ in tool_index.search(search_term)]
             else:
                 filtered_tools = tools_list
             
             st.write(f"Showing {len(filtered_tools)} of {len(tools_list)} tools")
+            if catalog.version > 1:
+                st.caption(f"Catalog version {catalog.version} · last change: {catalog.last_delta.summary()}")
             
-            # Display each tool in an expandable card format
-            for tool in filtered_tools:
-                tool_name = tool.get("name", "Unknown")
-                tool_desc = tool.get("description", "No description available")
-                
-                with st.expander(f"**{tool_name}** - {tool_desc[:100]}..." if len(tool_desc) > 100 else f"**{tool_name}** - {tool_desc}"):
-                    
-                    # Tool description
-                    st.markdown("**Description:**")
-                    st.write(tool_desc)
-                    
-                    # Input Schema
-                    st.markdown("**Input Schema:**")
-                    input_schema = tool.get("inputSchema", {})
-                    
-                    if input_schema:
-                        # Check if it has properties (object type)
-                        if "properties" in input_schema:
-                            properties = input_schema.get("properties", {})
-                            required_fields = input_schema.get("required", [])
-                            
-                            # Create a formatted display of the schema
-                            schema_display = {
-                                "type": input_schema.get("type", "object"),
-                                "properties": {}
-                            }
-                            
-                            for prop_name, prop_details in properties.items():
-                                is_required = prop_name in required_fields
-                                
-                                # Ensure prop_details is a dictionary
-                                if isinstance(prop_details, dict):
-                                    prop_info = {
-                                        "type": prop_details.get("type", "unknown"),
-                                        "description": prop_details.get("description", ""),
-                                        "required": is_required
-                                    }
-                                    
-                                    # Add additional schema details if present
-                                    if "format" in prop_details:
-                                        prop_info["format"] = prop_details["format"]
-                                    if "enum" in prop_details:
-                                        prop_info["enum"] = prop_details["enum"]
-                                    if "default" in prop_details:
-                                        prop_info["default"] = prop_details["default"]
-                                else:
-                                    # Handle non-dict property (could be a simple type string)
-                                    prop_info = {
-                                        "type": str(prop_details) if prop_details else "unknown",
-                                        "description": "",
-                                        "required": is_required
-                                    }
-                                    
-                                schema_display["properties"][prop_name] = prop_info
-                            
-                            # Add required fields list
-                            if required_fields:
-                                schema_display["required"] = required_fields
-                            
-                            # Display as formatted JSON
-                            st.code(json.dumps(schema_display, indent=2), language="json")
-                        else:
-                            # Simple schema without properties
-                            st.code(json.dumps(input_schema, indent=2), language="json")
-                    else:
-                        st.write("No input parameters required")
-                    
-                    # Available in clients
-                    st.markdown("**Available in:**")
-                    client_details = tool.get("clientDetails", [])
-                    if client_details:
-                        for client in client_details:
-                            status = "🟢" if client.get("active", False) else "🔴"
-                            st.write(f"{status} {client.get('serverName', 'Unknown')}")
-                    
-                    # Statistics if available
-                    if "statistics" in tool and tool["statistics"]:
-                        stats = tool["statistics"]
-                        st.markdown("**Usage Statistics:**")
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.metric("Total Calls", stats.get("totalCalls", 0))
-                        with col2:
-                            st.metric("Success Rate", 
-                                     f"{(stats.get('successfulCalls', 0) / max(stats.get('totalCalls', 1), 1) * 100):.1f}%")
-                        with col3:
-                            avg_duration = stats.get("averageDuration", 0)
-                            st.metric("Avg Duration", f"{avg_duration:.0f}ms" if avg_duration else "N/A")
+            # Drop memoized schema renders of tools that left the catalog
+            schema_cache.sync(catalog.version, catalog.schema_hashes.values())
+            
+            # Only the visible window is rendered; details are built for the selected tool only
+            col1, col2 = st.columns([1, 3])
+            with col1:
+                page_size = st.selectbox("Tools per page", PAGE_SIZE_OPTIONS, index=1, key="tools_page_size")
+            page_count = max(1, math.ceil(len(filtered_tools) / page_size))
+            if st.session_state.get("tools_page", 1) > page_count:
+                st.session_state.tools_page = 1
+            with col2:
+                # Session state drives the value (it starts at min_value)
+                page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count,
+                                       step=1, key="tools_page")
+            
+            start = (page - 1) * page_size
+            window = filtered_tools[start:start + page_size]
+            if window:
+                st.caption(f"Tools {start + 1}–{start + len(window)} of {len(filtered_tools)}")
+            
+            # Lightweight summary table of the visible window
+            st.dataframe(
+                [
+                    {
+                        "Tool": tool.get("name", "Unknown"),
+                        "Description": truncate(tool.get("description", "") or "", 100),
+                        "Parameters": len((tool.get("inputSchema") or {}).get("properties") or {}),
+                        "Servers": ", ".join(c.get("serverName", "Unknown") for c in tool.get("clientDetails") or [])
+                    }
+                    for tool in window
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+            
+            window_by_name = {tool.get("name", "Unknown"): tool for tool in window}
+            selected_name = st.selectbox(
+                "Tool details",
+                options=list(window_by_name),
+                index=None,
+                placeholder="Select a tool to view its schema and statistics",
+                key="tools_selected"
+            )
+            if selected_name:
+                tool = window_by_name[selected_name]
+                st.markdown(f"#### {selected_name}")
+                render_tool_details(tool, catalog.schema_hashes.get(selected_name))
         else:
             st.info("No tools available. Make sure MCP clients are connected.")
             
@@ -219,7 +290,7 @@ with tab2:
 with tab3:
     st.subheader("Connected MCP Clients")
     try:
-        mcp_clients = api_client.get_mcp_clients()
+        mcp_clients = batch.result('get_mcp_clients')
         
         if "clients" in mcp_clients and mcp_clients["clients"]:
             clients_list = mcp_clients["clients"]
@@ -248,7 +319,6 @@ with tab3:
                 })
             
             # Display as a dataframe
-            import pandas as pd
             df = pd.DataFrame(table_data)
             st.dataframe(df, use_container_width=True, hide_index=True)
             
@@ -280,6 +350,61 @@ with tab3:
     except Exception as e:
         st.error(f"Unable to fetch MCP clients: {str(e)}")
 
+with tab4:
+    st.subheader("Tool and Client Trends")
+    st.caption(
+        f"Sampled every {sampler.interval:g}s in the background · {sampler.samples} samples · "
+        f"{sampler.nbytes / 1024:.0f} KB of history"
+    )
+    if sampler.last_error:
+        st.warning(f"Last sample failed: {sampler.last_error}")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        kind_label = st.radio("Series", ["Clients", "Tools"], horizontal=True, key="trend_kind")
+    with col2:
+        window_label = st.selectbox("Window", list(TREND_WINDOWS), index=1, key="trend_window")
+    with col3:
+        downsample = st.selectbox("Downsampling", ["LTTB", "Min/max"], key="trend_downsample")
+    kind = CLIENT if kind_label == "Clients" else TOOL
+    window = TREND_WINDOWS[window_label]
+    since = time.time() - window if window else None
+    
+    names = sampler.names(kind)
+    if sampler.samples < 2 or not names:
+        st.info("Collecting samples; trends appear after the second sample.")
+    else:
+        # Busiest series in the window first
+        busiest = sorted(names, key=lambda name: -np.nansum(sampler.derived(kind, name, since).calls))
+        selected = st.multiselect(
+            kind_label,
+            options=busiest,
+            default=busiest[:TREND_DEFAULT_SERIES],
+            key=f"trend_selected_{kind}"
+        )
+        for title, attribute in TREND_CHARTS:
+            st.markdown(f"**{title}**")
+            frame = trend_frame(sampler, kind, selected, attribute, since, downsample)
+            if frame.empty:
+                st.caption("No calls in this window")
+            else:
+                st.line_chart(frame, x="time", y="value", color="series")
+        
+        # Where average durations grew: the latest window against the one before it
+        st.markdown("**Slowdowns**")
+        st.dataframe(
+            pd.DataFrame(sampler.slowdowns(kind)),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "avg ms (before)": st.column_config.NumberColumn(format="%.0f"),
+                "avg ms (recent)": st.column_config.NumberColumn(format="%.0f"),
+                "change": st.column_config.NumberColumn(format="%.2fx"),
+            }
+        )
+        minutes = TREND_WINDOW / 60
+        st.caption(f"Call-weighted average duration of the last {minutes:.0f} minutes against the {minutes:.0f} before")
+
 # Footer with debug option
 with st.expander("🐛 Debug: View Raw API Responses"):
     col1, col2, col3 = st.columns(3)
@@ -287,7 +412,7 @@ with st.expander("🐛 Debug: View Raw API Responses"):
     with col1:
         st.markdown("**MCP Status Response:**")
         try:
-            status = api_client.get_mcp_status()
+            status = status_batch.result('get_mcp_status')
             st.code(json.dumps(status, indent=2), language="json")
         except Exception as e:
             st.error(f"Error: {e}")
@@ -295,7 +420,7 @@ with st.expander("🐛 Debug: View Raw API Responses"):
     with col2:
         st.markdown("**MCP Tools Response:**")
         try:
-            tools = api_client.get_mcp_tools()
+            tools = batch.result('get_mcp_tools')
             # Truncate for display if too large
             if "tools" in tools and len(tools["tools"]) > 2:
                 display_tools = {
@@ -312,7 +437,7 @@ with st.expander("🐛 Debug: View Raw API Responses"):
     with col3:
         st.markdown("**MCP Clients Response:**")
         try:
-            clients = api_client.get_mcp_clients()
+            clients = batch.result('get_mcp_clients')
             # Truncate for display if too large
             if "clients" in clients and len(clients["clients"]) > 2:
                 display_clients = {
@@ -0,0 +1,112 @@
+import streamlit as st
+import sys
+import os
+from datetime import datetime
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.conversation_metrics import latency_table, recent_turns
+from utils.metrics import get_metrics_registry
+from utils.spans import get_span_stats
+from utils.waterfall import render_waterfall
+
+# Page config
+st.set_page_config(
+    page_title="Performance - MCP Host",
+    page_icon="⚡",
+    layout="wide"
+)
+
+# Page header
+st.title("⚡ Performance")
+st.markdown("Client-side timings of Universal Chat turns, across all sessions of this app process")
+
+if st.button("🔄 Refresh", key="refresh"):
+    st.rerun()
+
+st.divider()
+
+registry = get_metrics_registry()
+turns = recent_turns()
+
+if not turns:
+    st.info("No conversation turns recorded yet. Ask something in Universal Chat to collect timings.")
+else:
+    # Latency per stage, estimated from the histogram buckets
+    st.subheader("Latency by Stage")
+    latency = pd.DataFrame(latency_table(registry))
+    if not latency.empty:
+        st.dataframe(
+            latency,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                column: st.column_config.NumberColumn(column, format="%.3f s")
+                for column in ("mean", "p50", "p95", "p99")
+            }
+        )
+        st.caption("Percentiles are interpolated within histogram buckets")
+
+    # Where the time goes inside turns: pipeline steps, levels and tools
+    spans = pd.DataFrame(get_span_stats().table())
+    if not spans.empty:
+        st.subheader("Latency by Step and Tool")
+        kinds = st.multiselect(
+            "Span kinds",
+            options=list(spans["kind"].unique()),
+            default=[kind for kind in ("step", "tool") if kind in set(spans["kind"])],
+            key="span_kinds"
+        )
+        st.dataframe(
+            spans[spans["kind"].isin(kinds)],
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                column: st.column_config.NumberColumn(column, format="%.3f s")
+                for column in ("mean", "p50", "p95", "p99", "max")
+            }
+        )
+        steps = spans[spans["kind"] == "step"]
+        if not steps.empty:
+            st.bar_chart(steps.set_index("name")[["p50", "p95", "p99"]])
+        st.caption("Percentiles from log-spaced histograms (about 3% resolution), slowest p95 first")
+
+    # Latest turns, newest first
+    st.subheader(f"Recent Turns ({len(turns)})")
+    recent = pd.DataFrame([timings.to_dict() for timings in reversed(turns)])
+    recent["finished_at"] = [datetime.fromtimestamp(value) for value in recent["finished_at"]]
+    st.dataframe(recent, use_container_width=True, hide_index=True)
+
+    # Span tree of one recent turn
+    choice = st.selectbox(
+        "Timeline of turn",
+        options=range(len(turns) - 1, -1, -1),
+        format_func=lambda i: (f"{datetime.fromtimestamp(turns[i].finished_at):%H:%M:%S} · "
+                               f"{turns[i].agent} · {turns[i].outcome} · {turns[i].duration:.2f} s"),
+        key="waterfall_turn"
+    )
+    render_waterfall(turns[choice].spans, key="waterfall_recent")
+
+    # Event counts per type over all turns
+    events = registry.get("mcp_chat_events_total")
+    if events is not None:
+        st.subheader("Events by Type")
+        counts = {}
+        for (agent, event), count in events.values().items():
+            counts[event] = counts.get(event, 0) + count
+        st.bar_chart(pd.Series(counts, name="events").sort_values(ascending=False))
+
+# Prometheus text exposition of every metric in the process
+with st.expander("📈 Prometheus metrics"):
+    prometheus_text = registry.render_prometheus()
+    st.download_button(
+        "📥 Download metrics.prom",
+        data=prometheus_text,
+        file_name="metrics.prom",
+        mime="text/plain",
+        key="download_metrics"
+    )
+    st.code(prometheus_text, language="text")
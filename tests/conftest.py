@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stand_in_backend import Profile, serve_in_thread
+
+
+@pytest.fixture
+def stand_in():
+    """Start stand-in backends with the given Profile settings; all are stopped after the test"""
+    servers = []
+
+    def start(**settings):
+        settings.setdefault("step_delay", 0.01)
+        server = serve_in_thread(Profile(**settings))
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
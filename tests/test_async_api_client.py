@@ -0,0 +1,40 @@
+import asyncio
+
+from utils.async_api_client import AsyncMCPApiClient
+
+MESSAGES = [{"role": "user", "content": "Top customers by revenue"}]
+
+
+def collect(base_url: str, **kwargs):
+    """Events of one streamed conversation, as (event_type, data) tuples"""
+    async def run():
+        async with AsyncMCPApiClient(base_url) as client:
+            return [event async for event in client.send_conversation_streaming(MESSAGES, **kwargs)]
+    return asyncio.run(run())
+
+
+def test_rest_calls(stand_in):
+    server = stand_in()
+
+    async def run():
+        async with AsyncMCPApiClient(server.base_url) as client:
+            return await asyncio.gather(client.get_health(), client.get_mcp_status(), client.get_mcp_tools())
+
+    health, mcp_status, tools = asyncio.run(run())
+    assert health["status"] == "UP"
+    assert mcp_status["healthy"] is True
+    assert len(tools["tools"]) == mcp_status["totalTools"]
+
+
+def test_streaming_round_trip(stand_in):
+    server = stand_in()
+    events = collect(server.base_url)
+    names = [name for name, _ in events]
+    assert names[0] == 'connected'
+    assert names[-1] == 'final'
+    # Every event the backend logged for the session arrives once, in order
+    session = server.backend.session(events[0][1]["sessionId"])
+    assert names == [name for _, name, _ in session.events]
+    final = events[-1][1]
+    assert final["type"] == "data"
+    assert final["row_count"] == len(final["data"]) == 20
@@ -0,0 +1,85 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.cache import INVALIDATION_LOG, TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class BlockingFetch:
+    """fetch() that returns the next value once released"""
+
+    def __init__(self, *values):
+        self.values = list(values)
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        return self.values.pop(0)
+
+
+def test_invalidate_discards_a_running_miss():
+    cache = TTLCache()
+    fetch = BlockingFetch("before", "after")
+    results = []
+    caller = threading.Thread(target=lambda: results.append(cache.get_or_fetch("/mcp/tools", fetch, ttl=60)))
+    caller.start()
+    assert fetch.started.wait(5)
+    cache.invalidate("/mcp")
+    fetch.release.set()
+    caller.join(5)
+    # The caller still gets its answer, but it is not served to anyone after the invalidation
+    assert results == ["before"]
+    assert cache.peek("/mcp/tools") is None
+    assert cache.get_or_fetch("/mcp/tools", fetch, ttl=60) == "after"
+    assert fetch.calls == 2
+
+
+def test_invalidate_discards_a_running_refresh():
+    clock = Clock()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        cache = TTLCache(executor=executor, clock=clock)
+        cache.get_or_fetch("/status", lambda: "old", ttl=1, stale_ttl=60)
+        clock.now = 2
+        fetch = BlockingFetch("refreshed before invalidation")
+        assert cache.get_or_fetch("/status", fetch, ttl=1, stale_ttl=60) == "old"
+        assert fetch.started.wait(5)
+        cache.invalidate()
+        fetch.release.set()
+    assert cache.peek("/status") is None
+    assert cache.get_or_fetch("/status", lambda: "new", ttl=1) == "new"
+
+
+def test_other_keys_are_stored():
+    cache = TTLCache()
+    fetch = BlockingFetch("tools")
+    caller = threading.Thread(target=cache.get_or_fetch, args=("/mcp/tools", fetch, 60))
+    caller.start()
+    assert fetch.started.wait(5)
+    cache.invalidate("/status")
+    fetch.release.set()
+    caller.join(5)
+    assert cache.peek("/mcp/tools") == "tools"
+
+
+def test_forgotten_invalidations_discard_conservatively():
+    cache = TTLCache()
+    fetch = BlockingFetch("tools")
+    caller = threading.Thread(target=cache.get_or_fetch, args=("/mcp/tools", fetch, 60))
+    caller.start()
+    assert fetch.started.wait(5)
+    for _ in range(INVALIDATION_LOG + 1):
+        cache.invalidate("/status")
+    fetch.release.set()
+    caller.join(5)
+    assert cache.peek("/mcp/tools") is None
@@ -0,0 +1,46 @@
+from utils.chat_history import build_history
+from utils.chat_store import ChatMessage
+
+
+def user(text):
+    return ChatMessage("user", text)
+
+
+def answer(text):
+    return ChatMessage("assistant", text, response_type="text")
+
+
+def failed():
+    """An assistant turn whose stream failed before an answer arrived"""
+    return ChatMessage("assistant", trace=["Thinking…"])
+
+
+def roles(messages):
+    return [message["role"] for message in messages]
+
+
+def test_budget_never_leaves_an_orphan_answer():
+    history = [user("q1"), answer("a" * 50), user("q2" + "x" * 50), answer("a2"), user("q3"), answer("a3")]
+    # Room for the pinned exchange and the short answer a2, but not its long prompt q2
+    messages, stats = build_history(history, "q4", max_chars=20, pinned_turns=1)
+    assert [message["content"] for message in messages] == ["q3", "a3", "q4"]
+    assert stats.dropped == 4
+    assert stats.sent == 3
+    assert stats.total == 7
+
+
+def test_failed_turn_drops_its_prompt():
+    history = [user("q1"), answer("a1"), user("q2"), failed(), user("q2 again"), answer("a2")]
+    messages, stats = build_history(history, "q3")
+    assert [message["content"] for message in messages] == ["q1", "a1", "q2 again", "a2", "q3"]
+    assert roles(messages) == ["user", "assistant", "user", "assistant", "user"]
+    assert stats.total == 5
+    assert stats.dropped == 0
+
+
+def test_pinned_exchanges_are_sent_over_budget():
+    history = [user("q1"), answer("a1"), user("q2" * 20), answer("a2" * 20)]
+    messages, stats = build_history(history, "q3", max_chars=10, pinned_turns=1)
+    assert roles(messages) == ["user", "assistant", "user"]
+    assert stats.over_budget
+    assert stats.dropped == 2
@@ -0,0 +1,70 @@
+import json
+import threading
+
+from utils.conversation_metrics import ConversationRecorder
+from utils.metrics import MetricsRegistry
+from utils.spans import SpanStats
+from utils.sse import SSEEvent
+
+
+def progress(step):
+    return SSEEvent('progress', json.dumps({"step": f"Step {step}", "message": "working",
+                                            "details": {"phase": "tool_selection"}}))
+
+
+def recorder():
+    return ConversationRecorder("Oracle DB Answerer", registry=MetricsRegistry(), span_stats=SpanStats())
+
+
+def test_finish_while_events_are_recorded_elsewhere():
+    turn = recorder()
+    turn.record(SSEEvent('connected', json.dumps({"sessionId": "s1"})))
+    stop = threading.Event()
+
+    def record_events():
+        step = 0
+        while not stop.is_set():
+            step += 1
+            turn.record(progress(step % 50))
+            # New event names grow the counts dict while finish() copies it
+            turn.record(SSEEvent(f'custom.{step}', "{}"))
+
+    recorder_thread = threading.Thread(target=record_events)
+    recorder_thread.start()
+    try:
+        timings = turn.finish(outcome="stopped")
+    finally:
+        stop.set()
+        recorder_thread.join()
+    assert timings.outcome == "stopped"
+    assert timings.events == sum(timings.event_counts.values())
+    # The recorded turn no longer changes
+    assert turn.finish() is timings
+    assert sum(turn._counts.values()) == timings.events
+
+
+def test_events_after_finish_are_ignored():
+    turn = recorder()
+    turn.record(SSEEvent('connected', json.dumps({"sessionId": "s1"})))
+    timings = turn.finish()
+    turn.record(SSEEvent('final', json.dumps({"answer": "late"})))
+    assert timings.outcome == "incomplete"
+    assert timings.final is None
+    assert turn._counts == {'connected': 1}
+
+
+def test_llm_sizes_come_from_the_decoded_phase():
+    turn = recorder()
+    events = [
+        SSEEvent('progress', json.dumps({"message": "Sending llm_request",
+                                         "details": {"phase": "tool_selection", "messageCount": 7}})),
+        SSEEvent('progress', json.dumps({"details": {"phase": "llm_request", "messageCount": 3}})),
+        SSEEvent('progress', json.dumps({"details": {"phase": "llm_response", "responseLength": 120}})),
+        SSEEvent('progress', json.dumps({"details": "llm_request"})),
+    ]
+    assert list(turn.observe(events)) == events
+    timings = turn.finish()
+    assert timings.llm_requests == 1
+    assert timings.llm_messages == 3
+    assert timings.llm_response_chars == 120
+    assert timings.event_counts == {'progress': 4}
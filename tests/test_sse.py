@@ -0,0 +1,108 @@
+from utils.sse import MAX_CHUNK_SIZE, MIN_CHUNK_SIZE, SSEParser, iter_chunks, parse_sse
+
+
+class FakeRaw:
+    """urllib3 response stand-in whose read1() returns up to the requested size of a buffer"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.sizes = []
+
+    def read1(self, size, decode_content=True):
+        self.sizes.append(size)
+        chunk, self.data = self.data[:size], self.data[size:]
+        return chunk
+
+
+class FakeResponse:
+    def __init__(self, data: bytes):
+        self.raw = FakeRaw(data)
+
+
+def feed_all(chunks):
+    parser = SSEParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    return events, parser
+
+
+def test_crlf_split_across_chunks():
+    events, _ = feed_all([b"event: progress\r", b"\ndata: {}\r", b"\n\r", b"\n"])
+    assert [(event.event, event.data) for event in events] == [("progress", "{}")]
+
+
+def test_lone_cr_line_endings():
+    events, _ = feed_all([b"data: a\rdata: b\r\r"])
+    assert [event.data for event in events] == ["a\nb"]
+
+
+def test_bom_split_across_chunks():
+    events, _ = feed_all([b"\xef", b"\xbb", b"\xbfdata: first\n\n"])
+    assert [event.data for event in events] == ["first"]
+
+
+def test_bom_only_stripped_at_stream_start():
+    events, _ = feed_all([b"data: a\n\n", b"\xef\xbb\xbfdata: b\n\n"])
+    # A BOM after the start is part of the line, which makes it an unknown field
+    assert [event.data for event in events] == ["a"]
+
+
+def test_multiline_data():
+    events, _ = feed_all([b"data: line one\ndata:line two\ndata\n\n"])
+    assert [event.data for event in events] == ["line one\nline two\n"]
+
+
+def test_id_containing_nul_is_ignored():
+    events, parser = feed_all([b"id: 7\ndata: a\n\n", b"id: 8\x009\ndata: b\n\n", b"id:bad\x00\ndata: c\n\n"])
+    assert [event.id for event in events] == ["7", "7", "7"]
+    assert parser.last_event_id == "7"
+
+
+def test_id_persists_and_resets():
+    events, _ = feed_all([b"id: 3\ndata: a\n\ndata: b\n\nid\ndata: c\n\n"])
+    assert [event.id for event in events] == ["3", "3", ""]
+
+
+def test_comment_keepalive_lines():
+    events, _ = feed_all([b": keep-alive\n\n", b":\n", b"event: heartbeat\n: note\ndata: {}\n\n"])
+    assert [(event.event, event.data) for event in events] == [("heartbeat", "{}")]
+
+
+def test_retry_field():
+    events, parser = feed_all([b"retry: 1500\ndata: a\n\nretry: soon\ndata: b\n\n"])
+    assert [event.retry for event in events] == [1500, 1500]
+    assert parser.retry == 1500
+
+
+def test_trailing_incomplete_event_is_discarded():
+    events = list(parse_sse([b"event: progress\ndata: done\n\n", b"event: final\ndata: cut off"]))
+    assert [event.event for event in events] == ["progress"]
+    events = list(parse_sse([b"data: no blank line\n"]))
+    assert events == []
+
+
+def test_event_split_at_every_byte():
+    stream = b"\xef\xbb\xbfid: 1\r\nevent: progress\r\ndata: {\"step\": 1}\r\n\r\n"
+    events, _ = feed_all([stream[i:i + 1] for i in range(len(stream))])
+    assert [(event.id, event.event, event.json()) for event in events] == [("1", "progress", {"step": 1})]
+
+
+def test_iter_chunks_grows_while_reads_come_back_full():
+    data = b"x" * (MAX_CHUNK_SIZE * 3)
+    response = FakeResponse(data)
+    assert b"".join(iter_chunks(response)) == data
+    sizes = response.raw.sizes
+    # Doubles from the minimum while every read comes back full, then stays at the maximum
+    doubling = [MIN_CHUNK_SIZE]
+    while doubling[-1] < MAX_CHUNK_SIZE:
+        doubling.append(doubling[-1] * 2)
+    assert sizes[:len(doubling)] == doubling
+    assert sizes[len(doubling)] == MAX_CHUNK_SIZE
+
+
+def test_iter_chunks_shrinks_when_traffic_thins_out():
+    response = FakeResponse(b"x" * (MIN_CHUNK_SIZE * 3) + b"y")
+    list(iter_chunks(response))
+    # 4k and 8k come back full, the 16k read gets a single byte and the size halves
+    assert response.raw.sizes[:4] == [MIN_CHUNK_SIZE, MIN_CHUNK_SIZE * 2, MIN_CHUNK_SIZE * 4, MIN_CHUNK_SIZE * 2]
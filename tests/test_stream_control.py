@@ -0,0 +1,55 @@
+from utils.api_client import MCPApiClient
+from utils.sse import iter_with_idle_ticks
+from utils.stream_control import StreamControl
+
+PAYLOAD = {"messages": [{"role": "user", "content": "Top customers by revenue"}]}
+
+
+class UnreachableInterrupt:
+    """Client whose interrupt request fails the way MCPApiClient reports a dead backend"""
+
+    def __init__(self):
+        self.cancelled = []
+
+    def interrupt_session(self, session_id, reason="User requested", graceful=True):
+        raise ConnectionError("Backend server not running. Please start Agents-MCP-Host on port 8080.")
+
+    def cancel_session(self, session_id):
+        self.cancelled.append(session_id)
+        return {"sessionId": session_id, "cancelled": True}
+
+
+def abandon_after_connected(control, client, stream_client):
+    """Start a conversation, stop reading it after 'connected' and return the stop report"""
+    stream = client.stream_conversation(PAYLOAD)
+    handle = control.register("chat", stream, stream_client)
+    events = iter_with_idle_ticks(stream, 0.05, on_abandon=handle.drain)
+    for event in events:
+        if event is not None:
+            handle.record(event)
+            if event.event == 'connected':
+                break
+    events.close()
+    control.release(handle, finished=False)
+    return control.wait("chat", 10)
+
+
+def test_stop_interrupts_abandoned_stream(stand_in):
+    server = stand_in(step_delay=0.5)
+    client = MCPApiClient(server.base_url, use_cache=False)
+    report = abandon_after_connected(StreamControl(deadline=5), client, client)
+    assert report.sent and not report.forced and report.error is None
+    assert report.ack_latency is not None
+    assert report.stop_latency is not None
+    session = server.backend.session(report.session_id)
+    assert [name for _, name, _ in session.events][-2:] == ['interrupt_acknowledged', 'interrupted']
+
+
+def test_failed_interrupt_falls_back_to_cancel(stand_in):
+    server = stand_in(step_delay=0.5)
+    client = MCPApiClient(server.base_url, use_cache=False)
+    unreachable = UnreachableInterrupt()
+    report = abandon_after_connected(StreamControl(deadline=1), client, unreachable)
+    assert not report.sent
+    assert "Backend server not running" in report.error
+    assert unreachable.cancelled == [report.session_id]
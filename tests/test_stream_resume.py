@@ -0,0 +1,167 @@
+import asyncio
+import json
+import time
+from email.utils import formatdate
+
+import pytest
+import requests
+
+from utils.api_client import MCPApiClient
+from utils.async_api_client import AsyncMCPApiClient
+from utils.stream_resume import RECONNECTING_EVENT, ResumableEventStream, parse_retry_after
+
+MESSAGES = [{"role": "user", "content": "Top customers by revenue"}]
+
+# Fewer progress events per step keep the resumed conversations short
+PROFILE = {"events_per_step": 0, "disconnect_rate": 1.0}
+
+
+def read_sync(server, max_reconnects=50, on_event=None):
+    """Events of one conversation through MCPApiClient, and its stream"""
+    client = MCPApiClient(server.base_url, use_cache=False)
+    stream = client.stream_conversation({"messages": MESSAGES}, max_reconnects=max_reconnects)
+    events = []
+    try:
+        for event in stream:
+            events.append(event)
+            if on_event:
+                on_event(event)
+    finally:
+        stream.close()
+        client.close()
+    return events, stream
+
+
+def read_async(server, max_reconnects=50, on_event=None):
+    """(event_type, data) tuples of one conversation through AsyncMCPApiClient"""
+    async def run():
+        events = []
+        async with AsyncMCPApiClient(server.base_url) as client:
+            async for event in client.send_conversation_streaming(MESSAGES, max_reconnects=max_reconnects):
+                events.append(event)
+                if on_event:
+                    on_event(event[0])
+        return events
+    return asyncio.run(run())
+
+
+def logged_events(server, session_id):
+    """Event names the stand-in sent for a session, in order"""
+    return [name for _, name, _ in server.backend.session(session_id).events]
+
+
+def stop_server_once_connected(server):
+    """on_event callback stopping the stand-in at the 'connected' event, so every resume fails"""
+    def on_event(name):
+        if getattr(name, "event", name) == 'connected':
+            server.shutdown()
+            server.server_close()
+    return on_event
+
+
+def test_sync_resumes_with_last_event_id(stand_in):
+    server = stand_in(disconnect_after=10, **PROFILE)
+    events, stream = read_sync(server)
+    delivered = [event for event in events if event.event != RECONNECTING_EVENT]
+    assert delivered[-1].event == 'final'
+    assert sum(event.event == RECONNECTING_EVENT for event in events) >= 3
+    # Each resume continued right after the last event received: no gaps, no repeats
+    assert [event.id for event in delivered] == [str(i) for i in range(len(delivered))]
+    assert [event.event for event in delivered] == logged_events(server, stream.state.session_id)
+
+
+def test_sync_drops_replayed_events(stand_in):
+    server = stand_in(disconnect_after=10, replay_overlap=4, **PROFILE)
+    events, stream = read_sync(server)
+    delivered = [event for event in events if event.event != RECONNECTING_EVENT]
+    assert stream.state.replayed > 0
+    assert [event.id for event in delivered] == [str(i) for i in range(len(delivered))]
+    assert delivered[-1].event == 'final'
+
+
+def test_sync_raises_when_reconnect_budget_is_spent(stand_in):
+    server = stand_in(disconnect_after=3, **PROFILE)
+    with pytest.raises(requests.exceptions.RequestException):
+        read_sync(server, max_reconnects=2)
+
+
+def test_sync_raises_when_resume_fails(stand_in):
+    server = stand_in(disconnect_after=3, **PROFILE)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        read_sync(server, max_reconnects=2, on_event=stop_server_once_connected(server))
+
+
+def test_sync_retries_a_resume_answered_with_503(stand_in):
+    server = stand_in(disconnect_after=10, resume_errors=1, resume_retry_after=1, **PROFILE)
+    events, stream = read_sync(server)
+    reconnects = [json.loads(event.data) for event in events if event.event == RECONNECTING_EVENT]
+    delivered = [event for event in events if event.event != RECONNECTING_EVENT]
+    assert delivered[-1].event == 'final'
+    assert [event.event for event in delivered] == logged_events(server, stream.state.session_id)
+    # The attempt after the 503 waited for its Retry-After
+    assert "503" in reconnects[1]["error"]
+    assert reconnects[1]["delay"] >= 1
+
+
+def test_sync_resume_not_found_is_final(stand_in):
+    server = stand_in(disconnect_after=3, **PROFILE)
+    client = MCPApiClient(server.base_url, use_cache=False)
+    stream = ResumableEventStream(
+        lambda: client.open_conversation_stream({"messages": MESSAGES}),
+        lambda session_id, last_event_id: client.resume_conversation_stream("unknown", last_event_id),
+        max_reconnects=5
+    )
+    try:
+        with pytest.raises(requests.exceptions.HTTPError) as raised:
+            list(stream)
+    finally:
+        stream.close()
+        client.close()
+    assert raised.value.response.status_code == 404
+    assert stream.state.reconnects == 1
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert 0 < parse_retry_after(formatdate(time.time() + 30, usegmt=True)) <= 30
+
+
+def test_async_resumes_with_last_event_id(stand_in):
+    server = stand_in(disconnect_after=10, **PROFILE)
+    events = read_async(server)
+    names = [name for name, _ in events if name != RECONNECTING_EVENT]
+    assert names[-1] == 'final'
+    assert sum(name == RECONNECTING_EVENT for name, _ in events) >= 3
+    assert names == logged_events(server, events[0][1]["sessionId"])
+
+
+def test_async_drops_replayed_events(stand_in):
+    server = stand_in(disconnect_after=10, replay_overlap=4, **PROFILE)
+    events = read_async(server)
+    names = [name for name, _ in events if name != RECONNECTING_EVENT]
+    assert names == logged_events(server, events[0][1]["sessionId"])
+
+
+def test_async_retries_a_resume_answered_with_503(stand_in):
+    server = stand_in(disconnect_after=10, resume_errors=1, resume_retry_after=1, **PROFILE)
+    events = read_async(server)
+    reconnects = [data for name, data in events if name == RECONNECTING_EVENT]
+    names = [name for name, _ in events if name != RECONNECTING_EVENT]
+    assert names == logged_events(server, events[0][1]["sessionId"])
+    assert names[-1] == 'final'
+    assert "Resume unavailable" in reconnects[1]["error"]
+    assert reconnects[1]["delay"] >= 1
+
+
+def test_async_raises_when_reconnect_budget_is_spent(stand_in):
+    server = stand_in(disconnect_after=3, **PROFILE)
+    with pytest.raises(ConnectionError):
+        read_async(server, max_reconnects=2)
+
+
+def test_async_raises_when_resume_fails(stand_in):
+    server = stand_in(disconnect_after=3, **PROFILE)
+    with pytest.raises(ConnectionError):
+        read_async(server, max_reconnects=2, on_event=stop_server_once_connected(server))
@@ -0,0 +1,73 @@
+import json
+
+import requests
+
+from utils.schema_render import SchemaRenderCache
+from utils.tool_catalog import ToolCatalog, catalog_definitions_digest, tool_fingerprint
+
+
+def response(tools, status=200):
+    """A /mcp/tools response carrying tools"""
+    result = requests.Response()
+    result.status_code = status
+    result._content = json.dumps({"tools": tools}).encode()
+    return result
+
+
+def tool(name, calls=0, description="Runs a query"):
+    return {
+        "name": name,
+        "description": description,
+        "inputSchema": {"type": "object", "properties": {"query": {"type": "string"}}},
+        "clientDetails": [{"serverName": "OracleQueryExecution", "active": True}],
+        "statistics": {"totalCalls": calls, "successfulCalls": calls, "averageDuration": 12.5},
+    }
+
+
+def test_fingerprint_ignores_statistics():
+    assert tool_fingerprint(tool("run_sql", calls=1)) == tool_fingerprint(tool("run_sql", calls=2))
+    assert tool_fingerprint(tool("run_sql")) != tool_fingerprint(tool("run_sql", description="Runs SQL"))
+
+
+def test_statistics_are_not_definition_changes():
+    catalog = ToolCatalog()
+    catalog.update(response([tool("run_sql"), tool("list_tables")]))
+    catalog.update(response([tool("run_sql", calls=5), tool("list_tables")]))
+    delta = catalog.last_delta
+    assert not delta
+    assert delta.changed == []
+    assert delta.stats_changed == ["run_sql"]
+    assert catalog.version == 2
+
+
+def test_definition_changes():
+    catalog = ToolCatalog()
+    catalog.update(response([tool("run_sql"), tool("list_tables")]))
+    catalog.update(response([tool("run_sql", description="Runs SQL"), tool("describe_table")]))
+    delta = catalog.last_delta
+    assert delta.added == ["describe_table"]
+    assert delta.removed == ["list_tables"]
+    assert delta.changed == ["run_sql"]
+    assert delta.summary() == "1 added, 1 removed, 1 changed"
+
+
+def test_definitions_digest_ignores_statistics():
+    catalog = ToolCatalog()
+    first = catalog.update(response([tool("run_sql", calls=1), tool("list_tables")]))
+    second = catalog.update(response([tool("run_sql", calls=2), tool("list_tables")]))
+    third = catalog.update(response([tool("run_sql", description="Runs SQL"), tool("list_tables")]))
+    assert catalog_definitions_digest(first) == catalog_definitions_digest(second)
+    assert catalog_definitions_digest(second) != catalog_definitions_digest(third)
+    # A plain decoded body gets the same digest the catalog attached to its snapshot
+    assert catalog_definitions_digest(json.loads(json.dumps(second))) == catalog_definitions_digest(second)
+
+
+def test_schema_render_survives_new_statistics():
+    cache = SchemaRenderCache()
+    catalog = ToolCatalog()
+    for calls in (1, 2, 3):
+        catalog.update(response([tool("run_sql", calls=calls)]))
+        cache.sync(catalog.version, catalog.schema_hashes.values())
+        rendered = cache.get(tool("run_sql", calls=calls), catalog.schema_hashes["run_sql"])
+        assert '"query"' in rendered.text
+    assert (cache.hits, cache.misses) == (2, 1)
@@ -1,21 +1,135 @@
 import requests
 import json
-from typing import Dict, Any, Optional, Generator, Tuple
+from typing import Dict, Any, Optional, Generator, Iterable, Tuple
+import atexit
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import datetime
 
+from requests.adapters import HTTPAdapter
+
+from utils.cache import TTLCache
+from utils.stream_deadlines import StreamDeadlines, StreamTimeout
+from utils.stream_resume import MAX_RECONNECTS, ResumableEventStream
+from utils.tool_catalog import ToolCatalog
+
+DEFAULT_BASE_URL = "http://localhost:8080/host/v1"
+
+# Connection pool sizes: short REST calls (status pages, batch fetches) and
+# long-lived SSE streams (one per concurrently chatting user)
+REST_POOL_SIZE = 16
+STREAM_POOL_SIZE = 32
+
+# GET endpoints that can be fetched together with MCPApiClient.fetch_many()
+BATCH_ENDPOINTS = {
+    'get_health': '/health',
+    'get_status': '/status',
+    'get_hosts_status': '/hosts/status',
+    'get_mcp_status': '/mcp/status',
+    'get_mcp_tools': '/mcp/tools',
+    'get_mcp_clients': '/mcp/clients',
+}
+
+# Stream of an existing conversation, reopened with Last-Event-ID after a dropped connection
+RESUME_STREAM_PATH = '/conversations/{session_id}/stream'
+
+# Worker threads shared by every client for parallel batch calls and cache refreshes
+_batch_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="mcp-batch")
+
+# Per-endpoint cache lifetimes in seconds: (fresh TTL, extra stale-while-revalidate window)
+CACHE_TTLS = {
+    '/health': (5, 25),
+    '/status': (5, 25),
+    '/hosts/status': (10, 50),
+    '/mcp/status': (10, 50),
+    '/mcp/tools': (60, 240),
+    '/mcp/clients': (30, 90),
+}
+
+# Response cache shared by all clients (and therefore all sessions) in this process
+_response_cache = TTLCache(max_entries=128, executor=_batch_executor)
+
+
+class BatchResult:
+    """Outcome of MCPApiClient.fetch_many(): partial results and per-call errors"""
+    
+    def __init__(self):
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, Exception] = {}
+        self.elapsed = 0.0
+    
+    def result(self, name: str) -> Any:
+        """Return the result of a call, re-raising its error if it failed"""
+        if name in self.errors:
+            raise self.errors[name]
+        return self.results[name]
+    
+    def ok(self, name: str) -> bool:
+        """Whether a call completed successfully"""
+        return name in self.results
+    
+    @property
+    def complete(self) -> bool:
+        """Whether every call completed successfully"""
+        return not self.errors
+
+
 class MCPApiClient:
     """Centralized API client for all Agents-MCP-Host endpoints"""
     
-    def __init__(self, base_url: str = "http://localhost:8080/host/v1"):
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, use_cache: bool = True,
+                 rest_pool_size: int = REST_POOL_SIZE, stream_pool_size: int = STREAM_POOL_SIZE):
         self.base_url = base_url
+        self.use_cache = use_cache  # Serve status/catalog GETs from the process-wide cache
         self.timeout = 300  # 5 minutes to allow for long OpenAI responses
-        self.session = requests.Session()
+        # Separate keep-alive pools so long-running streams never starve short REST calls
+        self.session = self._pooled_session(rest_pool_size)
+        self.stream_session = self._pooled_session(stream_pool_size)
+        # Validators and parsed state of the tool catalog for conditional GETs
+        self.tool_catalog = ToolCatalog()
+    
+    @staticmethod
+    def _pooled_session(pool_size: int) -> requests.Session:
+        """Create a session whose HTTP(S) adapters keep up to pool_size connections alive per host"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
     
     def close(self):
-        """Close the requests session"""
+        """Close the requests sessions"""
         if self.session:
             self.session.close()
+        if self.stream_session:
+            self.stream_session.close()
+    
+    def pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Connection pool usage per pool ('rest' and 'stream').
+        connections_created close to requests means connections are not being reused.
+        """
+        stats = {}
+        for name, session in (('rest', self.session), ('stream', self.stream_session)):
+            adapter = session.get_adapter(self.base_url)
+            pool_stats = {
+                "max_size": adapter._pool_maxsize,
+                "idle": 0,
+                "requests": 0,
+                "connections_created": 0
+            }
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                pool_stats["requests"] += pool.num_requests
+                pool_stats["connections_created"] += pool.num_connections
+                if pool.pool is not None:
+                    pool_stats["idle"] += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+            stats[name] = pool_stats
+        return stats
     
     def __enter__(self):
         """Context manager support"""
@@ -45,21 +159,75 @@ class MCPApiClient:
         except requests.exceptions.Timeout:
             raise TimeoutError("Request timed out. The backend took too long to respond.")
     
+    def _get_json(self, endpoint: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """GET an endpoint and decode its JSON body, served from the shared cache when enabled"""
+        def fetch():
+            if endpoint == '/mcp/tools':
+                return self._fetch_tool_catalog(timeout or self.timeout)
+            response = self._make_request('GET', endpoint, timeout=timeout or self.timeout)
+            return response.json()
+        
+        if not self.use_cache or endpoint not in CACHE_TTLS:
+            return fetch()
+        ttl, stale_ttl = CACHE_TTLS[endpoint]
+        return _response_cache.get_or_fetch(f"{self.base_url}{endpoint}", fetch, ttl, stale_ttl)
+    
+    def _fetch_tool_catalog(self, timeout: float) -> Dict[str, Any]:
+        """Conditional GET of /mcp/tools; unchanged catalogs are not re-downloaded or re-decoded"""
+        headers = self.tool_catalog.conditional_headers()
+        response = self._make_request('GET', '/mcp/tools', timeout=timeout, headers=headers)
+        return self.tool_catalog.update(response)
+    
+    def invalidate_cache(self, *endpoints: str) -> None:
+        """Drop cached responses for the given endpoints (all endpoints of this backend by default)"""
+        for endpoint in endpoints or ('',):
+            _response_cache.invalidate(f"{self.base_url}{endpoint}")
+    
+    @staticmethod
+    def cache_stats() -> Dict[str, Any]:
+        """Hit/miss counters of the process-wide response cache"""
+        return _response_cache.stats()
+    
+    def fetch_many(self, calls: Iterable[str], deadline: float = 10.0) -> BatchResult:
+        """
+        Run several GET endpoint calls (names from BATCH_ENDPOINTS, e.g. 'get_health') in parallel.
+        Every call gets the same deadline in seconds; calls that fail or miss it are
+        reported in BatchResult.errors while the others still return, so latency is
+        the slowest call rather than the sum. Repeated names are fetched once, and
+        concurrent or repeated fetches of a cached endpoint share one request.
+        """
+        start = time.monotonic()
+        futures: Dict[str, Future] = {}
+        for name in dict.fromkeys(calls):
+            if name not in BATCH_ENDPOINTS:
+                raise ValueError(f"Unknown batch call: {name}")
+            futures[name] = _batch_executor.submit(self._get_json, BATCH_ENDPOINTS[name], deadline)
+        
+        wait(futures.values(), timeout=deadline)
+        
+        batch = BatchResult()
+        for name, future in futures.items():
+            if not future.done():
+                batch.errors[name] = TimeoutError(f"{name} did not complete within {deadline:.0f}s")
+            elif future.exception() is not None:
+                batch.errors[name] = future.exception()
+            else:
+                batch.results[name] = future.result()
+        batch.elapsed = time.monotonic() - start
+        return batch
+    
     # Health and Status Endpoints
     def get_health(self) -> Dict[str, Any]:
         """Get health status of the system"""
-        response = self._make_request('GET', '/health')
-        return response.json()
+        return self._get_json('/health')
     
     def get_status(self) -> Dict[str, Any]:
         """Get comprehensive system status"""
-        response = self._make_request('GET', '/status')
-        return response.json()
+        return self._get_json('/status')
     
     def get_hosts_status(self) -> Dict[str, Any]:
         """Get status of all available hosts"""
-        response = self._make_request('GET', '/hosts/status')
-        return response.json()
+        return self._get_json('/hosts/status')
     
     # Session Management Endpoints
     def interrupt_session(self, session_id: str, reason: str = "User requested", graceful: bool = True) -> Dict[str, Any]:
@@ -84,78 +252,106 @@ class MCPApiClient:
     # MCP Endpoints
     def get_mcp_status(self) -> Dict[str, Any]:
         """Get MCP system status"""
-        response = self._make_request('GET', '/mcp/status')
-        return response.json()
+        return self._get_json('/mcp/status')
     
     def get_mcp_tools(self) -> Dict[str, Any]:
         """Get list of available MCP tools"""
-        response = self._make_request('GET', '/mcp/tools')
-        return response.json()
+        return self._get_json('/mcp/tools')
     
     def get_mcp_clients(self) -> Dict[str, Any]:
         """Get list of connected MCP clients"""
-        response = self._make_request('GET', '/mcp/clients')
-        return response.json()
+        return self._get_json('/mcp/clients')
     
     # Streaming Conversation
+    def open_conversation_stream(self, payload: Dict[str, Any],
+                                 timeout: Optional[Tuple[float, float]] = None) -> requests.Response:
+        """
+        POST a conversation payload on the stream pool and return the open SSE response.
+        requests exceptions propagate unchanged; the caller must close the response.
+        """
+        headers = {
+            "Accept": "text/event-stream",
+            "Content-Type": "application/json"
+        }
+        response = self.stream_session.post(f"{self.base_url}/conversations", json=payload,
+                                            headers=headers, stream=True, timeout=timeout or self.timeout)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError:
+            # Load the (small) error body so callers can still read it, then release the connection
+            response.content
+            response.close()
+            raise
+        return response
+    
+    def resume_conversation_stream(self, session_id: str, last_event_id: str = "",
+                                   timeout: Optional[Tuple[float, float]] = None) -> requests.Response:
+        """Reopen the SSE stream of a running conversation, continuing after last_event_id"""
+        headers = {"Accept": "text/event-stream"}
+        if last_event_id:
+            headers["Last-Event-ID"] = last_event_id
+        response = self.stream_session.get(f"{self.base_url}{RESUME_STREAM_PATH.format(session_id=session_id)}",
+                                           headers=headers, stream=True, timeout=timeout or self.timeout)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError:
+            response.content
+            response.close()
+            raise
+        return response
+    
+    def stream_conversation(self, payload: Dict[str, Any], max_reconnects: int = MAX_RECONNECTS,
+                            deadlines: Optional[StreamDeadlines] = None) -> ResumableEventStream:
+        """
+        Start a conversation and return its events as a ResumableEventStream.
+        Dropped or stalled connections are resumed with Last-Event-ID (a synthetic
+        'reconnecting' event precedes each attempt); the caller must close() the stream.
+        """
+        deadlines = deadlines or StreamDeadlines()
+        timeout = deadlines.requests_timeout()
+        return ResumableEventStream(
+            lambda: self.open_conversation_stream(payload, timeout),
+            lambda session_id, last_event_id: self.resume_conversation_stream(session_id, last_event_id, timeout),
+            max_reconnects=max_reconnects,
+            deadlines=deadlines
+        )
+    
     def send_conversation_streaming(self, messages: list, host: str = "oracledbanswerer", 
-                                  options: Optional[Dict] = None) -> Generator[Tuple[str, Dict[str, Any]], None, None]:
+                                  options: Optional[Dict] = None,
+                                  deadlines: Optional[StreamDeadlines] = None) -> Generator[Tuple[str, Dict[str, Any]], None, None]:
         """
         Send conversation with SSE streaming
-        Yields tuples of (event_type, data)
+        Yields tuples of (event_type, data), including ('reconnecting', details)
+        before each attempt to resume a dropped stream
         """
-        url = f"{self.base_url}/conversations"
         payload = {
             "messages": messages,
             "host": host,
             "streaming": True,
             "options": options or {}
         }
-        headers = {
-            "Accept": "text/event-stream",
-            "Content-Type": "application/json"
-        }
         
-        response = None
+        stream = self.stream_conversation(payload, deadlines=deadlines)
         try:
-            response = self.session.post(url, json=payload, headers=headers, stream=True, timeout=self.timeout)
-            response.raise_for_status()
-            
             # Parse SSE stream
-            current_event = None
-            current_data = []
-            
-            for line in response.iter_lines():
-                if not line:
-                    # Empty line signals end of an event
-                    if current_event and current_data:
-                        data_str = '\n'.join(current_data)
-                        try:
-                            data = json.loads(data_str)
-                            yield (current_event, data)
-                            
-                            # Exit on final response or error
-                            if current_event in ('final', 'error', 'complete'):
-                                return
-                        except json.JSONDecodeError as e:
-                            yield ('parse_error', {
-                                'error': str(e),
-                                'raw_data': data_str[:200]
-                            })
-                        
-                        current_event = None
-                        current_data = []
+            for event in stream:
+                try:
+                    data = event.json()
+                except json.JSONDecodeError as e:
+                    yield ('parse_error', {
+                        'error': str(e),
+                        'raw_data': event.data[:200]
+                    })
                     continue
                 
-                # Decode the line
-                line = line.decode('utf-8') if isinstance(line, bytes) else line
+                yield (event.event, data)
                 
-                # Parse SSE format
-                if line.startswith('event: '):
-                    current_event = line[7:].strip()
-                elif line.startswith('data: '):
-                    current_data.append(line[6:])
+                # Exit on final response or error
+                if event.event in ('final', 'error', 'complete'):
+                    return
                     
+        except requests.exceptions.ChunkedEncodingError:
+            raise ConnectionError("Connection lost. The backend connection was interrupted.")
         except requests.exceptions.ConnectionError:
             raise ConnectionError("Backend server not running. Please start Agents-MCP-Host on port 8080.")
         except requests.exceptions.HTTPError as e:
@@ -164,12 +360,13 @@ class MCPApiClient:
             except:
                 error_detail = str(e)
             raise Exception(f"Backend error: {error_detail}")
+        except StreamTimeout as e:
+            raise TimeoutError(f"Request timed out. {e}")
         except requests.exceptions.Timeout:
             raise TimeoutError("Request timed out. The backend took too long to respond.")
         finally:
-            # Always close the response if it was opened
-            if response:
-                response.close()
+            # Always close the stream (and its current response)
+            stream.close()
     
     # Helper methods
     
@@ -196,4 +393,35 @@ class MCPApiClient:
         elif hours > 0:
             return f"{hours}h {minutes}m"
         else:
-            return f"{minutes}m"
\ No newline at end of file
+            return f"{minutes}m"
+
+
+# Process-wide clients, one per backend URL
+_shared_clients: Dict[str, MCPApiClient] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def get_api_client(base_url: str = DEFAULT_BASE_URL) -> MCPApiClient:
+    """
+    Return the process-wide MCPApiClient for a backend URL.
+    Pages should use this instead of constructing a client on every rerun, so
+    keep-alive connections are reused across reruns and sessions.
+    """
+    client = _shared_clients.get(base_url)
+    if client is None:
+        with _shared_clients_lock:
+            client = _shared_clients.get(base_url)
+            if client is None:
+                client = MCPApiClient(base_url)
+                _shared_clients[base_url] = client
+    return client
+
+
+@atexit.register
+def shutdown_api_clients() -> None:
+    """Close every shared client and its connection pools"""
+    with _shared_clients_lock:
+        clients = list(_shared_clients.values())
+        _shared_clients.clear()
+    for client in clients:
+        client.close()
@@ -0,0 +1,277 @@
+import asyncio
+import json
+from typing import Any, AsyncGenerator, Dict, Optional, Tuple
+
+import aiohttp
+
+from utils.api_client import DEFAULT_BASE_URL, RESUME_STREAM_PATH
+from utils.sse import SSEParser
+from utils.stream_deadlines import DeadlineTracker, StreamDeadlines, StreamTimeout
+from utils.stream_resume import MAX_RECONNECTS, ResumeState, parse_retry_after, resumable_status
+
+# Default bound on concurrent keep-alive connections to the backend
+DEFAULT_POOL_SIZE = 32
+
+
+class AsyncMCPApiClient:
+    """
+    Asyncio counterpart of MCPApiClient for all Agents-MCP-Host endpoints.
+    Uses one aiohttp session with a bounded keep-alive connection pool, so many
+    concurrent calls and streams can share a single event loop.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL,
+                 pool_size: int = DEFAULT_POOL_SIZE, keepalive_timeout: float = 30.0):
+        self.base_url = base_url
+        self.timeout = 300  # 5 minutes to allow for long OpenAI responses
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Create the pooled session lazily, inside the running event loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self):
+        """Close the session and its connection pool"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        """Async context manager support"""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager cleanup"""
+        await self.close()
+
+    @property
+    def pool_stats(self) -> Dict[str, int]:
+        """Connections in use and idle in the keep-alive pool"""
+        connector = self._session.connector if self._session else None
+        if connector is None:
+            return {"limit": self.pool_size, "in_use": 0, "idle": 0}
+        idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+        return {
+            "limit": self.pool_size,
+            "in_use": len(getattr(connector, "_acquired", ())),
+            "idle": idle
+        }
+
+    @staticmethod
+    async def _status_error(response: aiohttp.ClientResponse) -> Optional[Exception]:
+        """The error MCPApiClient raises for this response's HTTP status, None if it succeeded"""
+        if response.status < 400:
+            return None
+        error = f"{response.status} {response.reason} for url: {response.url}"
+        try:
+            error_detail = (await response.json(content_type=None)).get('error', error)
+        except Exception:
+            error_detail = error
+        return Exception(f"Backend error: {error_detail}")
+
+    async def _raise_for_status(self, response: aiohttp.ClientResponse) -> None:
+        """Raise the same error type MCPApiClient raises for HTTP errors"""
+        error = await self._status_error(response)
+        if error is not None:
+            raise error
+
+    async def _make_request(self, method: str, endpoint: str, **kwargs) -> Any:
+        """Make HTTP request with error handling and return the decoded JSON body"""
+        url = f"{self.base_url}{endpoint}"
+        timeout = aiohttp.ClientTimeout(total=kwargs.pop('timeout', self.timeout))
+
+        try:
+            async with self._get_session().request(method, url, timeout=timeout, **kwargs) as response:
+                await self._raise_for_status(response)
+                return await response.json(content_type=None)
+        except aiohttp.ClientConnectionError:
+            raise ConnectionError("Backend server not running. Please start Agents-MCP-Host on port 8080.")
+        except asyncio.TimeoutError:
+            raise TimeoutError("Request timed out. The backend took too long to respond.")
+
+    # Health and Status Endpoints
+    async def get_health(self) -> Dict[str, Any]:
+        """Get health status of the system"""
+        return await self._make_request('GET', '/health')
+
+    async def get_status(self) -> Dict[str, Any]:
+        """Get comprehensive system status"""
+        return await self._make_request('GET', '/status')
+
+    async def get_hosts_status(self) -> Dict[str, Any]:
+        """Get status of all available hosts"""
+        return await self._make_request('GET', '/hosts/status')
+
+    # Session Management Endpoints
+    async def interrupt_session(self, session_id: str, reason: str = "User requested", graceful: bool = True) -> Dict[str, Any]:
+        """Interrupt an active session"""
+        payload = {
+            "reason": reason,
+            "graceful": graceful
+        }
+        return await self._make_request('POST', f'/conversations/{session_id}/interrupt', json=payload)
+
+    async def cancel_session(self, session_id: str) -> Dict[str, Any]:
+        """Cancel/delete a session"""
+        return await self._make_request('DELETE', f'/conversations/{session_id}')
+
+    async def submit_feedback(self, session_id: str, feedback: Dict[str, Any]) -> Dict[str, Any]:
+        """Submit feedback for a session"""
+        return await self._make_request('POST', f'/conversations/{session_id}/feedback', json=feedback)
+
+    # MCP Endpoints
+    async def get_mcp_status(self) -> Dict[str, Any]:
+        """Get MCP system status"""
+        return await self._make_request('GET', '/mcp/status')
+
+    async def get_mcp_tools(self) -> Dict[str, Any]:
+        """Get list of available MCP tools"""
+        return await self._make_request('GET', '/mcp/tools')
+
+    async def get_mcp_clients(self) -> Dict[str, Any]:
+        """Get list of connected MCP clients"""
+        return await self._make_request('GET', '/mcp/clients')
+
+    # Streaming Conversation
+    async def send_conversation_streaming(self, messages: list, host: str = "oracledbanswerer",
+                                          options: Optional[Dict] = None,
+                                          max_reconnects: int = MAX_RECONNECTS,
+                                          deadlines: Optional[StreamDeadlines] = None) -> AsyncGenerator[Tuple[str, Dict[str, Any]], None]:
+        """
+        Send conversation with SSE streaming
+        Yields tuples of (event_type, data). A dropped or stalled stream is resumed
+        with Last-Event-ID (yielding ('reconnecting', details) first) and replayed
+        events are skipped. Cancelling the consuming task, or closing the
+        generator early, drops the connection instead of returning a half-read
+        stream to the pool.
+        """
+        url = f"{self.base_url}/conversations"
+        payload = {
+            "messages": messages,
+            "host": host,
+            "streaming": True,
+            "options": options or {}
+        }
+        headers = {
+            "Accept": "text/event-stream",
+            "Content-Type": "application/json"
+        }
+        # The stream's own deadlines replace the request timeout; sock_read is only a backstop
+        deadlines = deadlines or StreamDeadlines()
+        connect_timeout, read_timeout = deadlines.requests_timeout()
+        timeout = aiohttp.ClientTimeout(total=None, connect=connect_timeout, sock_read=read_timeout)
+        tracker = DeadlineTracker(deadlines)
+
+        state = ResumeState(max_reconnects)
+        response = None
+        completed = False
+        error = None  # Last connection or resume failure, raised once the stream cannot be resumed
+        retry_after = None  # From the last failed resume's Retry-After header
+        try:
+            response = await self._get_session().post(url, json=payload, headers=headers, timeout=timeout)
+            await self._raise_for_status(response)
+
+            while True:
+                if response is not None:
+                    # Parse SSE stream
+                    parser = SSEParser()
+                    state.new_connection()
+                    tracker.connection_opened()
+                    try:
+                        while True:
+                            try:
+                                chunk = await asyncio.wait_for(response.content.readany(),
+                                                               max(0.0, tracker.time_left()))
+                            except asyncio.TimeoutError:
+                                expired = tracker.expired()
+                                if expired is None:
+                                    continue
+                                if expired.final:
+                                    raise expired
+                                error = expired
+                                break
+                            if not chunk:
+                                break
+                            for event in parser.feed(chunk):
+                                tracker.event_received(event)
+                                if not state.accept(event):
+                                    continue
+                                try:
+                                    data = event.json()
+                                except json.JSONDecodeError as e:
+                                    yield ('parse_error', {
+                                        'error': str(e),
+                                        'raw_data': event.data[:200]
+                                    })
+                                    continue
+
+                                yield (event.event, data)
+
+                                # Exit on final response or error
+                                if event.event in ('final', 'error', 'complete'):
+                                    completed = True
+                                    return
+                    except (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                        error = e
+                    response.close()
+                    response = None
+                    tracker.connection_closed()
+
+                if state.finished or not state.can_resume:
+                    if error is not None:
+                        raise error
+                    completed = True
+                    return
+
+                # Resume the same session after the last event received
+                delay = state.next_delay(retry_after)
+                yield ('reconnecting', state.reconnecting_event(delay, error).json())
+                await asyncio.sleep(max(0.0, min(delay, tracker.time_left())))
+                expired = tracker.expired()
+                if expired is not None:
+                    raise expired
+                resume_headers = {"Accept": "text/event-stream"}
+                if state.last_event_id:
+                    resume_headers["Last-Event-ID"] = state.last_event_id
+                resume_url = f"{self.base_url}{RESUME_STREAM_PATH.format(session_id=state.session_id)}"
+                error = None
+                retry_after = None
+                try:
+                    response = await self._get_session().get(resume_url, headers=resume_headers, timeout=timeout)
+                    if resumable_status(response.status):
+                        # Rate limiting and server errors are retried like a drop; other HTTP errors are final
+                        error = await self._status_error(response)
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        response.release()
+                        response = None
+                    else:
+                        await self._raise_for_status(response)
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    # Counted against the budget; the loop retries or gives up with this error
+                    error = e
+                    response = None
+
+        except StreamTimeout as e:
+            raise TimeoutError(f"Request timed out. {e}")
+        except aiohttp.ClientPayloadError:
+            raise ConnectionError("Connection lost. The backend connection was interrupted.")
+        except aiohttp.ClientConnectionError:
+            raise ConnectionError("Backend server not running. Please start Agents-MCP-Host on port 8080.")
+        except asyncio.TimeoutError:
+            raise TimeoutError("Request timed out. The backend took too long to respond.")
+        finally:
+            if response is not None:
+                if completed:
+                    response.release()
+                else:
+                    # Cancelled or abandoned mid-stream: the connection cannot be reused
+                    response.close()
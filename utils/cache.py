@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Optional
+
+# Recent invalidations remembered to discard fetches that overlap them
+INVALIDATION_LOG = 64
+
+
+class _Entry:
+    """A cached value and when it was fetched"""
+
+    __slots__ = ("value", "fetched_at", "ttl", "stale_ttl", "refreshing")
+
+    def __init__(self, value: Any, fetched_at: float, ttl: float, stale_ttl: float):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.refreshing = False
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded TTL cache with stale-while-revalidate.
+
+    - Fresh entries (younger than ttl) are returned directly.
+    - Stale entries (younger than ttl + stale_ttl) are returned immediately while a
+      single background refresh replaces them.
+    - Missing or expired entries are fetched in the caller's thread; concurrent
+      callers for the same key wait on one fetch instead of each sending a request.
+    - The least recently used entry is evicted once max_entries is exceeded.
+    - invalidate() also covers fetches already running: a result fetched from
+      before the invalidation is not stored (a miss still returns it to its callers).
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 256, executor: Optional[Executor] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self._executor = executor
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        # Bumped by every invalidate(); (generation, prefix) of the latest ones
+        self._generation = 0
+        self._invalidations: deque = deque(maxlen=INVALIDATION_LOG)
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "evictions": 0,
+            "invalidations": 0
+        }
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Any], ttl: float, stale_ttl: float = 0.0) -> Any:
+        """Return the cached value for key, calling fetch() when it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = self._clock() - entry.fetched_at
+                if age < entry.ttl:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return entry.value
+                if age < entry.ttl + entry.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._stats["stale_hits"] += 1
+                    if not entry.refreshing and self._executor is not None:
+                        entry.refreshing = True
+                        self._executor.submit(self._refresh, key, fetch, ttl, stale_ttl, self._generation)
+                    return entry.value
+
+            self._stats["misses"] += 1
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            started = self._generation
+
+        if not owner:
+            # Another caller is already fetching this key
+            return future.result()
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+            if not self._invalidated_since(key, started):
+                self._store(key, value, ttl, stale_ttl)
+        future.set_result(value)
+        return value
+
+    def _refresh(self, key: str, fetch: Callable[[], Any], ttl: float, stale_ttl: float, started: int) -> None:
+        """Background revalidation of a stale entry"""
+        try:
+            value = fetch()
+        except Exception:
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+                entry = self._entries.get(key)
+                if entry is not None:
+                    # Keep serving the stale value; the next stale hit retries
+                    entry.refreshing = False
+            return
+        with self._lock:
+            self._stats["refreshes"] += 1
+            if self._invalidated_since(key, started):
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refreshing = False
+                return
+            self._store(key, value, ttl, stale_ttl)
+
+    def _invalidated_since(self, key: str, generation: int) -> bool:
+        """Whether key was invalidated after generation (lock held)"""
+        if generation == self._generation:
+            return False
+        if not self._invalidations or self._invalidations[0][0] > generation + 1:
+            # Invalidations since then fell out of the log; assume the worst
+            return True
+        return any(later > generation and key.startswith(prefix) for later, prefix in self._invalidations)
+
+    def _store(self, key: str, value: Any, ttl: float, stale_ttl: float) -> None:
+        """Insert an entry and evict least recently used ones (lock held)"""
+        self._entries[key] = _Entry(value, self._clock(), ttl, stale_ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def peek(self, key: str) -> Any:
+        """Return the cached value for key regardless of age, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.value if entry is not None else None
+
+    def invalidate(self, prefix: str = "") -> int:
+        """
+        Drop every entry whose key starts with prefix (all entries by default);
+        fetches of those keys already running will not store their result
+        """
+        with self._lock:
+            self._generation += 1
+            self._invalidations.append((self._generation, prefix))
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                del self._entries[key]
+            self._stats["invalidations"] += len(keys)
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, current size and hit ratio"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,358 @@
+"""
+Formatting of Agents-MCP-Host conversation events for the Universal Chat page.
+Each event type has its own handler registered on CHAT_DISPATCHER; payloads are
+only JSON-decoded inside handlers that need them.
+"""
+from typing import Callable, Dict, Iterable, Optional
+
+from utils.event_dispatch import EventDispatcher
+from utils.sse import SSEEvent
+
+
+class _SectionBreak(str):
+    """Empty-string marker type; see SECTION_BREAK"""
+
+
+# Yielded between completed sections (finished steps, SQL blocks, result previews)
+# so renderers can freeze what came before; it is an empty string, so plain
+# concatenation of the chunks is unaffected
+SECTION_BREAK = _SectionBreak()
+
+# Progress phases that mark a milestone completion
+MILESTONE_COMPLETE_PHASES = frozenset(['intent_complete', 'schema_complete', 'sql_complete', 'execution_complete'])
+
+
+class StreamContext:
+    """Per-stream state shared by the chat event handlers"""
+
+    __slots__ = ("current_step", "session_id", "finished", "final", "sql_result", "on_session")
+
+    def __init__(self, on_session: Optional[Callable[[str], None]] = None):
+        self.current_step = None  # Track current step for indentation
+        self.session_id = None
+        self.finished = False  # Set by terminal events (final, error, timeout, interrupted)
+        self.final = None  # Decoded 'final' payload: the answer, without the progress trace
+        self.sql_result = None  # Details of the last sql_result progress event (row count and preview rows)
+        self.on_session = on_session
+
+
+CHAT_DISPATCHER = EventDispatcher()
+
+# Connection management events
+CHAT_DISPATCHER.ignore('heartbeat')
+
+
+@CHAT_DISPATCHER.on('connected')
+def _on_connected(event: SSEEvent, ctx: StreamContext) -> None:
+    # Handle connection event silently
+    ctx.session_id = event.json().get('sessionId', 'unknown')
+    if ctx.on_session:
+        ctx.on_session(ctx.session_id)
+
+
+# Phase-specific details appended after the progress message
+
+def _sql_query(details: Dict) -> Iterable[str]:
+    query = details.get('query', '')
+    if query:
+        # SQL code blocks render properly without manual indentation
+        yield SECTION_BREAK
+        yield f"\n```sql\n{query}\n```\n"
+        yield SECTION_BREAK
+
+
+def _sql_result(details: Dict) -> Iterable[str]:
+    # Preview rows are shown as a table next to the message (see StreamContext.sql_result)
+    row_count = details.get('rowCount', 0)
+    if row_count > 0:
+        yield f"\nFound {row_count} rows\n"
+        yield SECTION_BREAK
+
+
+def _llm_request(details: Dict) -> Iterable[str]:
+    message_count = details.get('messageCount', 0)
+    yield f"\n🤖 Sending request to LLM ({message_count} messages)...\n"
+
+
+def _llm_response(details: Dict) -> Iterable[str]:
+    response_length = details.get('responseLength', 0)
+    yield f"\n✅ Received LLM response ({response_length} characters)\n"
+
+
+def _metadata_exploration(details: Dict) -> Iterable[str]:
+    table = details.get('table', '')
+    column_count = details.get('columnCount', 0)
+    yield f"\n🔍 Exploring table '{table}' ({column_count} columns)\n"
+
+
+def _schema_matching(details: Dict) -> Iterable[str]:
+    match_count = details.get('matchCount', 0)
+    matched_tables = details.get('matchedTables', [])
+    yield f"\n🎯 Schema matching: Found {match_count} relevant tables\n"
+    if matched_tables and len(matched_tables) <= 5:
+        for table in matched_tables:
+            yield f"  • {table}\n"
+
+
+def _enum_mapping(details: Dict) -> Iterable[str]:
+    column = details.get('column', '')
+    mapping_count = details.get('mappingCount', 0)
+    yield f"\n🔤 Mapping enumeration values for '{column}' ({mapping_count} mappings)\n"
+
+
+def _tool_selection(details: Dict) -> Iterable[str]:
+    strategy = details.get('strategy', '')
+    tool_count = details.get('toolCount', 0)
+    selected_tools = details.get('selectedTools', [])
+    yield f"\n🛠️ Tool selection: {strategy} strategy ({tool_count} tools)\n"
+    if selected_tools and len(selected_tools) <= 3:
+        for tool in selected_tools:
+            yield f"  • {tool}\n"
+
+
+def _interrupt_detected(details: Dict) -> Iterable[str]:
+    operation = details.get('operation', '')
+    message = details.get('message', 'Operation interrupted')
+    yield f"\n⚠️ Interrupt detected during {operation}: {message}\n"
+
+
+PROGRESS_PHASE_DETAILS: Dict[str, Callable[[Dict], Iterable[str]]] = {
+    'sql_query': _sql_query,
+    'sql_result': _sql_result,
+    'llm_request': _llm_request,
+    'llm_response': _llm_response,
+    'metadata_exploration': _metadata_exploration,
+    'schema_matching': _schema_matching,
+    'enum_mapping': _enum_mapping,
+    'tool_selection': _tool_selection,
+    'interrupt_detected': _interrupt_detected,
+}
+
+
+@CHAT_DISPATCHER.on('progress')
+def _on_progress(event: SSEEvent, ctx: StreamContext) -> Iterable[str]:
+    data = event.json()
+    details = data.get('details', {})
+    phase = details.get('phase', '')
+    message = data.get('message', '')
+    step = data.get('step', '')
+
+    # Format based on phase
+    if phase in MILESTONE_COMPLETE_PHASES:
+        # Milestone completion - show with checkmark on new line
+        if message:
+            yield f"\n{message}\n"
+    elif phase == 'milestone_decision':
+        # Show strategy selection prominently (already has newline)
+        yield f"\n📍 **Strategy:** {message}\n\n"
+    elif message and step != 'host_started':  # Skip the initial host started message
+        if step and step.startswith("Step "):
+            # This is a main step - track it and show prominently
+            ctx.current_step = step
+            yield SECTION_BREAK
+            if step != message:
+                yield f"\n➤ **{step}** - {message}\n"
+            else:
+                yield f"\n➤ **{step}**\n"
+        elif ctx.current_step:
+            # Other progress events get indented if we're in a step
+            yield f"\n    └─ {message}\n"
+        else:
+            yield f"\n➤ {message}\n"
+
+    if phase == 'sql_result':
+        ctx.sql_result = details
+
+    phase_details = PROGRESS_PHASE_DETAILS.get(phase)
+    if phase_details:
+        yield from phase_details(details)
+
+
+# Pipeline events share one prefix handler; unknown pipeline.* events are never decoded
+PIPELINE_MESSAGES: Dict[str, Callable[[Dict], str]] = {
+    'pipeline.depth_determined': lambda data: (
+        f"📊 Analysis: {data.get('query_type', 'unknown')} query, "
+        f"using depth {data.get('execution_depth', 0)}\n"
+    ),
+    'pipeline.execution_start': lambda data: (
+        f"🚀 Starting pipeline execution ({data.get('total_levels', 0)} levels)\n"
+    ),
+    'pipeline.level_start': lambda data: (
+        f"  ▶️ Level {data.get('level', 0)}: {data.get('description', '')}\n"
+    ),
+    'pipeline.execution_complete': lambda data: (
+        f"✅ Pipeline complete ({data.get('levels_completed', 0)} levels executed)\n"
+    ),
+}
+
+
+@CHAT_DISPATCHER.on_prefix('pipeline.')
+def _on_pipeline(event: SSEEvent, ctx: StreamContext) -> Iterable[str]:
+    formatter = PIPELINE_MESSAGES.get(event.event)
+    if formatter:
+        yield formatter(event.json())
+
+
+@CHAT_DISPATCHER.on_prefix('milestone.')
+def _on_milestone(event: SSEEvent, ctx: StreamContext) -> Iterable[str]:
+    data = event.json()
+    message = data.get('message', '')
+    milestone_name = data.get('milestone_name', '')
+
+    # These are completion events, indent under current step
+    if ctx.current_step:
+        # Clean up the message - remove duplicate milestone name if present
+        clean_message = message
+        if milestone_name and milestone_name in message:
+            clean_message = message.replace(f"{milestone_name} - ", "")
+        yield f"    └─ {clean_message}\n"
+    else:
+        yield f"\n➤ {message}\n"
+
+
+# Tool events (always shown)
+
+@CHAT_DISPATCHER.on('tool_start')
+def _on_tool_start(event: SSEEvent, ctx: StreamContext) -> Iterable[str]:
+    data = event.json()
+    tool = data.get('tool', 'unknown')
+    description = data.get('description', '')
+    if ctx.current_step:
+        # Add extra newline at start for proper spacing
+        yield f"\n    ├─ 🔧 {description or tool}...\n"
+    else:
+        yield f"\n├─ 🔧 {description or tool}...\n"
+
+
+@CHAT_DISPATCHER.on('tool_complete')
+def _on_tool_complete(event: SSEEvent, ctx: StreamContext) -> Iterable[str]:
+    data = event.json()
+    success = data.get('success', False)
+    tool = data.get('tool', 'unknown')
+    indent = "    " if ctx.current_step else ""
+
+    if not success:
+        yield f"\n{indent}❌ Tool failed: {tool}\n"
+    else:
+        yield f"\n{indent}├─ ✓ {tool} completed\n"
+
+
+# Terminal events
+
+def format_answer(content: str, response_type: str, sql: Optional[str] = None, row_count: int = 0,
+                  data_points: Optional[int] = None) -> Iterable[str]:
+    """
+    Markdown chunks of a final answer (shared by the live stream and stored messages).
+    Result rows are not part of the markdown; they are shown as a table next to the message.
+    """
+    # Display the main answer
+    if content:
+        yield content
+
+    # Add type-specific additional info
+    if response_type == 'sql' and sql:
+        yield f"\n\n```sql\n{sql}\n```"
+    elif response_type == 'data':
+        if row_count > 0:
+            yield f"\n\n📊 Query returned {row_count} rows"
+    elif response_type == 'natural_response' and data_points:
+        yield f"\n\n*Based on {data_points} data points*"
+
+
+@CHAT_DISPATCHER.on('final')
+def _on_final(event: SSEEvent, ctx: StreamContext) -> Iterable[str]:
+    data = event.json()
+    ctx.finished = True
+    ctx.final = data
+    yield SECTION_BREAK
+    # Backend sends 'answer' field, not 'content'
+    yield from format_answer(
+        data.get('answer', data.get('content', '')),
+        data.get('type', 'unknown'),
+        sql=data.get('sql'),
+        row_count=data.get('row_count', 0),
+        data_points=data.get('data_points')
+    )
+
+
+@CHAT_DISPATCHER.on('reconnecting')
+def _on_reconnecting(event: SSEEvent, ctx: StreamContext) -> Iterable[str]:
+    # Synthetic event from the resumable stream before each reconnect attempt
+    data = event.json()
+    yield (f"\n🔄 Connection lost, resuming (attempt {data.get('attempt', 0)}"
+           f"/{data.get('max_attempts', 0)})...\n")
+
+
+@CHAT_DISPATCHER.on('error')
+def _on_error(event: SSEEvent, ctx: StreamContext) -> Iterable[str]:
+    ctx.finished = True
+    yield f"❌ Error: {event.json().get('message', 'Unknown error')}"
+
+
+@CHAT_DISPATCHER.on('timeout')
+def _on_timeout(event: SSEEvent, ctx: StreamContext) -> Iterable[str]:
+    ctx.finished = True
+    message = event.json().get('message', 'Request timed out')
+    yield f"\n⏱️ **Timeout:** {message}\n"
+
+
+# Critical event handlers
+
+@CHAT_DISPATCHER.on('agent_question')
+def _on_agent_question(event: SSEEvent, ctx: StreamContext) -> Iterable[str]:
+    data = event.json()
+    question = data.get('question', '')
+    options = data.get('options', [])
+    yield f"\n❓ **Agent Question:** {question}\n"
+    if options:
+        yield "Options:\n"
+        for i, option in enumerate(options, 1):
+            yield f"  {i}. {option}\n"
+    yield "\n⏸️ *Waiting for your response...*\n"
+
+
+@CHAT_DISPATCHER.on('execution_paused')
+def _on_execution_paused(event: SSEEvent, ctx: StreamContext) -> Iterable[str]:
+    data = event.json()
+    reason = data.get('reason', 'Execution paused')
+    message = data.get('message', '')
+    yield f"\n⏸️ **Execution Paused:** {reason}\n"
+    if message:
+        yield f"{message}\n"
+
+
+@CHAT_DISPATCHER.on('critical_error')
+def _on_critical_error(event: SSEEvent, ctx: StreamContext) -> Iterable[str]:
+    data = event.json()
+    message = data.get('message', 'Critical system error occurred')
+    severity = data.get('severity', 'CRITICAL')
+    yield f"\n🚨 **{severity} ERROR:** {message}\n"
+    yield "Please restart the system or contact support.\n"
+
+
+# Interrupt event handlers
+
+@CHAT_DISPATCHER.on('interrupt')
+def _on_interrupt(event: SSEEvent, ctx: StreamContext) -> Iterable[str]:
+    reason = event.json().get('reason', 'User requested interrupt')
+    yield f"\n🛑 **Interrupt Requested:** {reason}\n"
+
+
+@CHAT_DISPATCHER.on('interrupted')
+def _on_interrupted(event: SSEEvent, ctx: StreamContext) -> Iterable[str]:
+    ctx.finished = True
+    message = event.json().get('message', 'Request was interrupted')
+    yield f"\n✋ **Interrupted:** {message}\n"
+
+
+@CHAT_DISPATCHER.on('interrupt_acknowledged')
+def _on_interrupt_acknowledged(event: SSEEvent, ctx: StreamContext) -> Iterable[str]:
+    yield "\n✅ **Interrupt Acknowledged:** Processing interrupt...\n"
+
+
+@CHAT_DISPATCHER.on('milestone_decision')
+def _on_milestone_decision(event: SSEEvent, ctx: StreamContext) -> Iterable[str]:
+    data = event.json()
+    target = data.get('target_milestone', 0)
+    description = data.get('description', '')
+    yield f"\n📍 **Processing Strategy:** Level {target} - {description}\n"
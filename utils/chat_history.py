@@ -0,0 +1,146 @@
+"""
+Outgoing conversation history for the Universal Chat page.
+
+Assistant turns are sent as their semantic answer only (the final answer and
+its SQL), never the streamed progress transcript. Whole user/assistant exchanges
+are dropped from a sliding window once the character budget is spent; the most
+recent exchanges are pinned and always sent.
+"""
+import json
+from typing import Dict, List, Optional, Tuple
+
+from utils.chat_store import ChatMessage
+
+# Default history budget (characters of message content)
+DEFAULT_MAX_CHARS = 16000
+
+# Most recent user/assistant exchanges always sent, even over budget
+DEFAULT_PINNED_TURNS = 2
+
+# Longest single message sent; longer ones are cut
+DEFAULT_MAX_MESSAGE_CHARS = 4000
+
+# Rough characters per LLM token, for reporting and token budgets
+CHARS_PER_TOKEN = 4
+
+TRUNCATION_MARKER = "\n…[truncated]"
+
+
+def estimate_tokens(chars: int) -> int:
+    """Approximate token count for a number of characters"""
+    return (chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class HistoryStats:
+    """What a built history kept, dropped and weighs"""
+
+    __slots__ = ("sent", "total", "dropped", "truncated", "chars", "payload_bytes", "over_budget")
+
+    def __init__(self):
+        self.sent = 0
+        self.total = 0
+        self.dropped = 0
+        self.truncated = 0
+        self.chars = 0
+        self.payload_bytes = 0
+        self.over_budget = False
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.chars)
+
+    def summary(self) -> str:
+        """Short human-readable description"""
+        text = (f"Sent {self.sent} of {self.total} messages · "
+                f"{self.payload_bytes / 1024:.1f} KB · ~{self.tokens} tokens")
+        if self.dropped:
+            text += f" · {self.dropped} older dropped"
+        if self.truncated:
+            text += f" · {self.truncated} truncated"
+        if self.over_budget:
+            text += " · pinned turns over budget"
+        return text
+
+
+def _clip(text: str, limit: int) -> Tuple[str, bool]:
+    if len(text) <= limit:
+        return text, False
+    return text[:max(limit - len(TRUNCATION_MARKER), 0)] + TRUNCATION_MARKER, True
+
+
+def _exchanges(messages: List[ChatMessage]) -> List[List[ChatMessage]]:
+    """
+    Group the history into user/assistant exchanges that can be sent.
+
+    An exchange is a user message and the assistant replies that follow it.
+    Exchanges without an answered assistant reply (failed or interrupted
+    streams) are dropped whole, so the prompt never goes out without its answer
+    and two user messages never end up next to each other.
+    """
+    exchanges: List[List[ChatMessage]] = []
+    current: List[ChatMessage] = []
+    for message in messages:
+        if message.role == "user" and current:
+            exchanges.append(current)
+            current = []
+        current.append(message)
+    if current:
+        exchanges.append(current)
+
+    sendable = []
+    for exchange in exchanges:
+        replies = [message for message in exchange if message.role != "user" and message.has_answer]
+        if not replies:
+            continue
+        sendable.append([message for message in exchange if message.role == "user" and message.has_answer] + replies)
+    return sendable
+
+
+def build_history(messages: List[ChatMessage], command: str,
+                  max_chars: int = DEFAULT_MAX_CHARS,
+                  max_tokens: Optional[int] = None,
+                  pinned_turns: int = DEFAULT_PINNED_TURNS,
+                  max_message_chars: int = DEFAULT_MAX_MESSAGE_CHARS) -> Tuple[List[Dict[str, str]], HistoryStats]:
+    """
+    Build the messages list for a request from the stored chat history plus the new command.
+
+    Walks the history newest first one whole exchange at a time, keeping the
+    last pinned_turns exchanges unconditionally and older ones while they fit
+    in the budget (max_tokens, when given, overrides max_chars). The window
+    stays contiguous: the first older exchange that does not fit ends it.
+    Exchanges whose assistant turn has no answer are never sent.
+    """
+    if max_tokens is not None:
+        max_chars = max_tokens * CHARS_PER_TOKEN
+
+    stats = HistoryStats()
+    exchanges = []
+    for exchange in _exchanges(messages):
+        clipped = [(message.role,) + _clip(message.history_text(), max_message_chars) for message in exchange]
+        exchanges.append(clipped)
+        stats.total += len(clipped)
+    stats.total += 1
+
+    command_text, clipped = _clip(command, max_message_chars)
+    stats.truncated += clipped
+    kept = [{"role": "user", "content": command_text}]
+    used = len(command_text)
+
+    window_open = True
+    for position, exchange in enumerate(reversed(exchanges)):
+        size = sum(len(text) for _, text, _ in exchange)
+        if position >= pinned_turns and (not window_open or used + size > max_chars):
+            window_open = False
+            stats.dropped += len(exchange)
+            continue
+        for role, text, clipped in reversed(exchange):
+            stats.truncated += clipped
+            kept.append({"role": role, "content": text})
+        used += size
+
+    kept.reverse()
+    stats.sent = len(kept)
+    stats.chars = used
+    stats.over_budget = used > max_chars
+    stats.payload_bytes = len(json.dumps(kept, ensure_ascii=False).encode("utf-8"))
+    return kept, stats
@@ -0,0 +1,283 @@
+"""
+Disk-backed Universal Chat conversations.
+
+Every turn is written to an embedded SQLite database (WAL mode, keyed by chat
+and turn number) as it streams. Memory only holds the last few turns of
+recently used chats: older turns are read back page by page on demand, and
+chats left idle are dropped from memory entirely and reloaded from disk when
+they are opened again.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional
+
+from utils.chat_store import ChatMessage
+
+# Database location (override with CHAT_DB_PATH)
+DEFAULT_DB_PATH = os.environ.get(
+    "CHAT_DB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "chat_history.db")
+)
+
+# Turns (messages) of a chat kept in memory; older ones are paged from disk
+MEMORY_TURNS = 40
+
+# Turns loaded per "load older" page
+PAGE_TURNS = 20
+
+# Chats unused for this long are evicted from memory
+IDLE_TIMEOUT = 15 * 60
+
+# Upper bound on chats resident in memory (least recently used evicted first)
+MAX_RESIDENT_CHATS = 200
+
+# Minimum seconds between writes of a turn that is still streaming
+CHECKPOINT_INTERVAL = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    chat_id TEXT PRIMARY KEY,
+    agent TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS turns (
+    chat_id TEXT NOT NULL,
+    turn INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    body TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (chat_id, turn)
+) WITHOUT ROWID;
+"""
+
+
+def new_chat_id() -> str:
+    return uuid.uuid4().hex
+
+
+class ChatDatabase:
+    """SQLite store of chat turns, shared by all sessions of the process"""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # WAL keeps the database consistent with NORMAL; only the last commits may be lost on power failure
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def save_turn(self, chat_id: str, turn: int, message: ChatMessage, agent: Optional[str] = None) -> None:
+        """Insert or replace one turn and bump the chat's update time"""
+        body = json.dumps(message.to_dict(), ensure_ascii=False, default=str)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT INTO chats (chat_id, agent, created_at, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(chat_id) DO UPDATE SET updated_at = excluded.updated_at, "
+                    "agent = COALESCE(excluded.agent, chats.agent)",
+                    (chat_id, agent, now, now)
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO turns (chat_id, turn, role, body, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (chat_id, turn, message.role, body, now)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def load_turns(self, chat_id: str, before: Optional[int] = None, limit: int = PAGE_TURNS) -> List[ChatMessage]:
+        """Up to limit turns preceding turn number before (the latest ones by default), oldest first"""
+        with self._lock:
+            if before is None:
+                rows = self._conn.execute(
+                    "SELECT body FROM turns WHERE chat_id = ? ORDER BY turn DESC LIMIT ?",
+                    (chat_id, limit)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT body FROM turns WHERE chat_id = ? AND turn < ? ORDER BY turn DESC LIMIT ?",
+                    (chat_id, before, limit)
+                ).fetchall()
+        return [ChatMessage.from_dict(json.loads(body)) for (body,) in reversed(rows)]
+
+    def turn_count(self, chat_id: str) -> int:
+        """Number of turns stored for a chat (turns are numbered 0..count-1)"""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(turn) FROM turns WHERE chat_id = ?", (chat_id,)).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def chat_agent(self, chat_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT agent FROM chats WHERE chat_id = ?", (chat_id,)).fetchone()
+        return row[0] if row else None
+
+    def delete_chat(self, chat_id: str) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM turns WHERE chat_id = ?", (chat_id,))
+            self._conn.execute("DELETE FROM chats WHERE chat_id = ?", (chat_id,))
+            self._conn.execute("COMMIT")
+
+
+class ChatSession:
+    """
+    One conversation: the last memory_turns messages in memory, the rest on disk.
+    Turn numbers are positions in the full conversation.
+    """
+
+    def __init__(self, chat_id: str, db: ChatDatabase, memory_turns: int = MEMORY_TURNS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.chat_id = chat_id
+        self.db = db
+        self._clock = clock
+        self.turn_count = db.turn_count(chat_id)
+        self.agent = db.chat_agent(chat_id)
+        self.recent = deque(db.load_turns(chat_id, limit=memory_turns), maxlen=memory_turns)
+        # Older turns paged in on request; dropped when the next turn is added
+        self.older: List[ChatMessage] = []
+        self.last_used = clock()
+        self._last_checkpoint = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def messages(self) -> List[ChatMessage]:
+        """Messages currently in memory, oldest first"""
+        return self.older + list(self.recent)
+
+    @property
+    def first_loaded_turn(self) -> int:
+        return self.turn_count - len(self.recent) - len(self.older)
+
+    @property
+    def has_older(self) -> bool:
+        return self.first_loaded_turn > 0
+
+    def load_older(self, page_turns: int = PAGE_TURNS) -> int:
+        """Page in the turns preceding the oldest loaded one; returns how many were loaded"""
+        with self._lock:
+            page = self.db.load_turns(self.chat_id, before=self.first_loaded_turn, limit=page_turns)
+            self.older = page + self.older
+            return len(page)
+
+    def append(self, message: ChatMessage) -> int:
+        """Add a turn, write it to disk and return its turn number"""
+        with self._lock:
+            turn = self.turn_count
+            self.turn_count += 1
+            self.older = []
+            self.recent.append(message)
+            self.last_used = self._clock()
+        self.db.save_turn(self.chat_id, turn, message, self.agent)
+        return turn
+
+    def save(self, turn: int, message: ChatMessage) -> None:
+        """Write the current state of a turn"""
+        self.db.save_turn(self.chat_id, turn, message, self.agent)
+        self._last_checkpoint = self._clock()
+
+    def checkpoint(self, turn: int, message: ChatMessage) -> bool:
+        """Write a streaming turn at most once per CHECKPOINT_INTERVAL; returns whether it was written"""
+        if self._clock() - self._last_checkpoint < CHECKPOINT_INTERVAL:
+            return False
+        self.save(turn, message)
+        return True
+
+    def clear(self) -> None:
+        """Delete the conversation from memory and disk"""
+        with self._lock:
+            self.db.delete_chat(self.chat_id)
+            self.turn_count = 0
+            self.recent.clear()
+            self.older = []
+
+
+class ChatSessionRegistry:
+    """
+    Process-wide set of chats resident in memory.
+    Chats idle longer than idle_timeout, or beyond max_chats, are evicted; their
+    turns are already on disk, so eviction only frees memory.
+    """
+
+    def __init__(self, db: ChatDatabase, memory_turns: int = MEMORY_TURNS,
+                 idle_timeout: float = IDLE_TIMEOUT, max_chats: int = MAX_RESIDENT_CHATS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.db = db
+        self.memory_turns = memory_turns
+        self.idle_timeout = idle_timeout
+        self.max_chats = max_chats
+        self._clock = clock
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = clock()
+        self.evictions = 0
+
+    def get(self, chat_id: str, agent: Optional[str] = None) -> ChatSession:
+        """Return a chat, loading its recent turns from disk if it is not resident"""
+        with self._lock:
+            session = self._sessions.get(chat_id)
+            if session is None:
+                session = ChatSession(chat_id, self.db, self.memory_turns, self._clock)
+                self._sessions[chat_id] = session
+            self._sessions.move_to_end(chat_id)
+            session.last_used = self._clock()
+            if agent is not None and session.agent is None:
+                session.agent = agent
+            self._evict()
+            return session
+
+    def drop(self, chat_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(chat_id, None)
+
+    def _evict(self) -> None:
+        """Evict least recently used chats over the cap and, once a minute, idle ones (lock held)"""
+        while len(self._sessions) > self.max_chats:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+        now = self._clock()
+        if now - self._last_sweep < 60:
+            return
+        self._last_sweep = now
+        for chat_id in [chat_id for chat_id, session in self._sessions.items()
+                        if now - session.last_used > self.idle_timeout]:
+            del self._sessions[chat_id]
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Resident chats, messages held in memory and evictions so far"""
+        with self._lock:
+            return {
+                "resident": len(self._sessions),
+                "messages": sum(len(s.recent) + len(s.older) for s in self._sessions.values()),
+                "evictions": self.evictions
+            }
+
+
+_registry: Optional[ChatSessionRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_chat_registry() -> ChatSessionRegistry:
+    """Process-wide registry over the default database"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ChatSessionRegistry(ChatDatabase())
+        return _registry
@@ -0,0 +1,175 @@
+"""
+Structured chat messages for the Universal Chat page.
+
+A message keeps its answer, SQL and result rows apart from the progress trace
+instead of one rendered markdown string. Trace chunks repeat across turns
+(step headers, tool lines, phase messages), so short ones are interned and
+shared; result rows are kept once as decoded data rather than as indented
+JSON text. Rendering, history building and export all read these records.
+"""
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from utils.chat_events import format_answer
+from utils.result_export import ExportFile
+
+# Trace chunks up to this length are interned (longer ones are rarely repeated)
+INTERN_MAX_CHARS = 256
+
+# Result rows kept per message for display; row_count still reports the full size
+RESULT_MAX_ROWS = 5000
+
+
+def _intern(text: Optional[str]) -> Optional[str]:
+    # sys.intern rejects str subclasses such as the SECTION_BREAK marker
+    if text and type(text) is str and len(text) <= INTERN_MAX_CHARS:
+        return sys.intern(text)
+    return text
+
+
+def _intern_value(value: Any) -> Any:
+    return _intern(value) if isinstance(value, str) else value
+
+
+class ResultRef:
+    """
+    Result rows of a turn, stored column-wise: one tuple of values per column
+    instead of one dict per row, with short string values interned.
+    row_count is the count reported by the backend; at most RESULT_MAX_ROWS rows are kept.
+    """
+
+    __slots__ = ("row_count", "columns", "values", "types")
+
+    def __init__(self, row_count: int, rows: Optional[List[Dict[str, Any]]] = None):
+        self.row_count = row_count
+        self.types = None  # Inferred column types, filled in on first display
+        rows = [row if isinstance(row, dict) else {"value": row} for row in (rows or [])[:RESULT_MAX_ROWS]]
+        columns: Dict[str, None] = {}
+        for row in rows:
+            columns.update(dict.fromkeys(row))
+        self.columns = tuple(sys.intern(str(name)) for name in columns)
+        self.values = tuple(tuple(_intern_value(row.get(name)) for row in rows) for name in columns)
+
+    def __len__(self) -> int:
+        return len(self.values[0]) if self.values else 0
+
+    @property
+    def rows(self) -> List[Dict[str, Any]]:
+        """Row dicts rebuilt from the columns"""
+        return [dict(zip(self.columns, row)) for row in zip(*self.values)]
+
+
+def payload_rows(final: Optional[Dict[str, Any]], sql_result: Optional[Dict[str, Any]]) -> List[Any]:
+    """Result rows of a turn: the data of a 'data' final answer, else the last sql_result preview"""
+    if final and final.get('type') == 'data' and final.get('data'):
+        return final['data']
+    return (sql_result or {}).get('preview') or []
+
+
+class ChatMessage:
+    """One user or assistant turn"""
+
+    __slots__ = ("role", "answer", "sql", "response_type", "result", "data_points", "trace", "request", "export",
+                 "spans")
+
+    def __init__(self, role: str, answer: str = "", sql: Optional[str] = None,
+                 response_type: Optional[str] = None, result: Optional[ResultRef] = None,
+                 data_points: Optional[int] = None, trace: Iterable[str] = (), request: Optional[str] = None,
+                 export: Optional[ExportFile] = None, spans: Iterable[Sequence[Any]] = ()):
+        self.role = sys.intern(role)
+        self.answer = answer
+        self.sql = sql
+        self.response_type = _intern(response_type)
+        self.result = result
+        self.data_points = data_points
+        # Progress chunks; a tuple once the turn is finished
+        self.trace = tuple(_intern(chunk) for chunk in trace)
+        self.request = request  # Summary of the request payload sent for this turn
+        self.export = export  # File with the full result rows, if one was written
+        # Timed span tree of the turn, rows of (kind, name, label, depth, start, end); see utils.spans
+        self.spans = [tuple(row) for row in spans]
+
+    def add_trace(self, chunk: str) -> None:
+        """Record one streamed progress chunk"""
+        if not chunk:
+            return
+        if isinstance(self.trace, tuple):
+            self.trace = list(self.trace)
+        self.trace.append(_intern(chunk))
+
+    def finish(self, final: Optional[Dict[str, Any]] = None, request: Optional[str] = None,
+               sql_result: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Apply the decoded 'final' payload (None if the stream ended without one).
+        Without result rows in the final answer, the last sql_result preview is kept instead.
+        """
+        self.trace = tuple(self.trace)
+        self.request = request
+        preview = sql_result.get('preview') if sql_result else None
+        if final is None or final.get('type') != 'data':
+            if preview:
+                self.result = ResultRef(sql_result.get('rowCount', 0), preview)
+            if final is None:
+                return
+        # Backend sends 'answer' field, not 'content'
+        self.answer = final.get('answer', final.get('content', '')) or ""
+        self.response_type = _intern(final.get('type', 'unknown'))
+        self.sql = final.get('sql') or None
+        self.data_points = final.get('data_points')
+        if self.response_type == 'data':
+            self.result = ResultRef(final.get('row_count', 0), final.get('data') or preview)
+
+    @property
+    def has_answer(self) -> bool:
+        return self.response_type is not None or (self.role == "user" and bool(self.answer))
+
+    def markdown(self) -> str:
+        """Full rendered message: the progress trace followed by the answer"""
+        if self.role == "user":
+            return self.answer
+        parts = list(self.trace)
+        if self.response_type is not None:
+            parts.extend(format_answer(self.answer, self.response_type, sql=self.sql,
+                                       row_count=self.result.row_count if self.result else 0,
+                                       data_points=self.data_points))
+        return "".join(parts)
+
+    def history_text(self) -> str:
+        """Semantic content sent back to the backend on later turns (no trace, no rows)"""
+        if self.response_type == 'sql' and self.sql:
+            return f"{self.answer}\n\n```sql\n{self.sql}\n```"
+        return self.answer
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-data form for export and persistence"""
+        return {
+            "role": self.role,
+            "answer": self.answer,
+            "sql": self.sql,
+            "type": self.response_type,
+            "row_count": self.result.row_count if self.result else None,
+            "rows": self.result.rows if self.result else None,
+            "data_points": self.data_points,
+            "trace": list(self.trace),
+            "request": self.request,
+            "export": self.export.to_dict() if self.export else None,
+            "spans": [list(row) for row in self.spans]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChatMessage":
+        result = None
+        if data.get("row_count") is not None:
+            result = ResultRef(data["row_count"], data.get("rows"))
+        return cls(
+            data["role"],
+            answer=data.get("answer") or "",
+            sql=data.get("sql"),
+            response_type=data.get("type"),
+            result=result,
+            data_points=data.get("data_points"),
+            trace=data.get("trace") or (),
+            request=data.get("request"),
+            export=ExportFile.from_dict(data["export"]) if data.get("export") else None,
+            spans=data.get("spans") or ()
+        )
@@ -0,0 +1,261 @@
+"""
+Client-side latency of conversation turns.
+
+A ConversationRecorder watches the events of one turn as they come off the
+stream (on the page's reader thread, ahead of the read-ahead queue and the
+rendering) and, when the turn ends, records into the process-wide metrics registry: time to
+connect, to the 'connected' event, to the first progress event and to 'final',
+events per second, bytes received, event counts per type, and the sizes
+reported by llm_request/llm_response progress events. The same events are
+rebuilt into a span tree (utils.spans) whose step, level and tool durations
+feed the process-wide span statistics.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from utils.metrics import COUNT_BUCKETS, RATE_BUCKETS, SIZE_BUCKETS, MetricsRegistry, get_metrics_registry
+from utils.spans import STEP, SpanRow, SpanStats, TurnTrace, get_span_stats
+from utils.sse import SSEEvent
+from utils.stream_resume import RECONNECTING_EVENT, TERMINAL_EVENTS
+
+# Finished turns kept for the Performance page
+RECENT_TURNS = 200
+
+# Latency histograms of a turn: (metric name, label)
+LATENCY_METRICS = (
+    ("mcp_chat_connect_seconds", "Connect"),
+    ("mcp_chat_connected_event_seconds", "'connected' event"),
+    ("mcp_chat_first_progress_seconds", "First progress"),
+    ("mcp_chat_final_seconds", "'final' event"),
+    ("mcp_chat_turn_seconds", "Whole turn"),
+)
+
+_recent: deque = deque(maxlen=RECENT_TURNS)
+_recent_lock = threading.Lock()
+
+
+class TurnTimings:
+    """Measurements of one finished turn (seconds from the start of the request)"""
+
+    __slots__ = ("agent", "outcome", "finished_at", "connect", "connected", "first_progress", "final", "duration",
+                 "events", "bytes", "reconnects", "event_counts", "llm_requests", "llm_messages", "llm_response_chars",
+                 "spans")
+
+    def __init__(self, agent: str, outcome: str):
+        self.agent = agent
+        self.outcome = outcome
+        self.finished_at = time.time()
+        self.connect: Optional[float] = None
+        self.connected: Optional[float] = None
+        self.first_progress: Optional[float] = None
+        self.final: Optional[float] = None
+        self.duration = 0.0
+        self.events = 0
+        self.bytes = 0
+        self.reconnects = 0
+        self.event_counts: Dict[str, int] = {}
+        self.llm_requests = 0
+        self.llm_messages = 0  # Sum of messageCount over llm_request events
+        self.llm_response_chars = 0  # Sum of responseLength over llm_response events
+        self.spans: List[SpanRow] = []  # Span tree rows, see utils.spans.TurnTrace.rows
+
+    @property
+    def slowest_step(self) -> Optional[SpanRow]:
+        steps = [row for row in self.spans if row[0] == STEP]
+        return max(steps, key=lambda row: row[5] - row[4]) if steps else None
+
+    @property
+    def events_per_second(self) -> float:
+        return self.events / self.duration if self.duration > 0 else 0.0
+
+    def summary(self) -> str:
+        parts = []
+        for label, value in (("connect", self.connect), ("connected", self.connected),
+                             ("first progress", self.first_progress), ("final", self.final)):
+            if value is not None:
+                parts.append(f"{label} {_format_seconds(value)}")
+        parts.append(f"{self.events} events ({self.events_per_second:.1f}/s)")
+        parts.append(f"{self.bytes / 1024:.1f} KB")
+        if self.llm_requests:
+            parts.append(f"{self.llm_requests} LLM calls")
+        slowest = self.slowest_step
+        if slowest is not None:
+            parts.append(f"slowest {slowest[2]} {_format_seconds(slowest[5] - slowest[4])}")
+        if self.reconnects:
+            parts.append(f"{self.reconnects} reconnects")
+        return " · ".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {name: getattr(self, name) for name in self.__slots__ if name not in ("event_counts", "spans")}
+        data["events_per_second"] = self.events_per_second
+        return data
+
+
+def _format_seconds(value: float) -> str:
+    return f"{value * 1000:.0f} ms" if value < 1 else f"{value:.2f} s"
+
+
+class ConversationRecorder:
+    """
+    Measures one conversation turn; observe() its events, then finish().
+    observe() (or record()) and finish() may run on different threads; events
+    recorded after finish() are ignored, so the recorded turn cannot change afterwards.
+    """
+
+    def __init__(self, agent: str, registry: Optional[MetricsRegistry] = None,
+                 clock: Callable[[], float] = time.monotonic, span_stats: Optional[SpanStats] = None):
+        self.agent = agent
+        self.registry = registry or get_metrics_registry()
+        self.span_stats = span_stats or get_span_stats()
+        self.trace = TurnTrace()
+        self._clock = clock
+        self.started = clock()
+        self.timings: Optional[TurnTimings] = None
+        self._connected: Optional[float] = None
+        self._first_progress: Optional[float] = None
+        self._final: Optional[float] = None
+        self._terminal: Optional[str] = None
+        self._counts: Dict[str, int] = {}
+        self._llm_requests = 0
+        self._llm_messages = 0
+        self._llm_response_chars = 0
+        self._lock = threading.Lock()
+
+    def observe(self, events: Iterable[SSEEvent]) -> Iterator[SSEEvent]:
+        """Pass events through, timing them as they arrive"""
+        for event in events:
+            self.record(event)
+            yield event
+
+    def record(self, event: SSEEvent) -> None:
+        with self._lock:
+            if self.timings is None:
+                self._record_event(event)
+
+    def _record_event(self, event: SSEEvent) -> None:
+        name = event.event
+        self._counts[name] = self._counts.get(name, 0) + 1
+        self.trace.record(event, self._clock() - self.started)
+        if name == 'connected':
+            if self._connected is None:
+                self._connected = self._clock() - self.started
+        elif name == 'progress':
+            if self._first_progress is None:
+                self._first_progress = self._clock() - self.started
+            self._record_llm(event)
+        elif name in TERMINAL_EVENTS and self._terminal is None:
+            self._terminal = name
+            if name == 'final':
+                self._final = self._clock() - self.started
+
+    def _record_llm(self, event: SSEEvent) -> None:
+        """Count the sizes an llm_request/llm_response progress event reports (decoded once, shared with the page)"""
+        try:
+            details = event.json().get('details') or {}
+        except (ValueError, AttributeError):
+            return
+        if not isinstance(details, dict):
+            return
+        phase = details.get('phase')
+        if phase == 'llm_request':
+            self._llm_requests += 1
+            self._llm_messages += details.get('messageCount') or 0
+            self.registry.histogram(
+                "mcp_chat_llm_request_messages", "Messages per LLM request", ("agent",), COUNT_BUCKETS
+            ).observe(details.get('messageCount') or 0, agent=self.agent)
+        elif phase == 'llm_response':
+            self._llm_response_chars += details.get('responseLength') or 0
+            self.registry.histogram(
+                "mcp_chat_llm_response_chars", "Characters per LLM response", ("agent",), SIZE_BUCKETS
+            ).observe(details.get('responseLength') or 0, agent=self.agent)
+
+    def finish(self, stream=None, outcome: Optional[str] = None) -> TurnTimings:
+        """
+        Record the turn into the registry (once) and return its timings.
+        stream is the ResumableEventStream the events came from, for connect time,
+        bytes and reconnects; outcome defaults to the terminal event seen, else 'incomplete'.
+        """
+        with self._lock:
+            if self.timings is not None:
+                return self.timings
+            timings = TurnTimings(self.agent, outcome or self._terminal or "incomplete")
+            timings.duration = self._clock() - self.started
+            timings.connected = self._connected
+            timings.first_progress = self._first_progress
+            timings.final = self._final
+            timings.event_counts = dict(self._counts)
+            timings.llm_requests = self._llm_requests
+            timings.llm_messages = self._llm_messages
+            timings.llm_response_chars = self._llm_response_chars
+            self.trace.finish(timings.duration)
+            timings.spans = self.trace.rows()
+            timings.events = sum(count for name, count in timings.event_counts.items()
+                                 if name != RECONNECTING_EVENT)
+            if stream is not None:
+                if stream.opened_at is not None:
+                    timings.connect = stream.opened_at - self.started
+                timings.bytes = stream.bytes_received
+                timings.reconnects = stream.state.reconnects
+            self.timings = timings
+        self._record(timings)
+        self.span_stats.record(timings.spans)
+        with _recent_lock:
+            _recent.append(timings)
+        return timings
+
+    def _record(self, timings: TurnTimings) -> None:
+        registry = self.registry
+        agent = self.agent
+        registry.counter("mcp_chat_turns_total", "Conversation turns by outcome", ("agent", "outcome")).inc(
+            agent=agent, outcome=timings.outcome)
+        for name, help, value in (
+            ("mcp_chat_connect_seconds", "Time until the stream response headers arrived", timings.connect),
+            ("mcp_chat_connected_event_seconds", "Time until the 'connected' event", timings.connected),
+            ("mcp_chat_first_progress_seconds", "Time until the first progress event", timings.first_progress),
+            ("mcp_chat_final_seconds", "Time until the 'final' event", timings.final),
+            ("mcp_chat_turn_seconds", "Duration of the whole turn", timings.duration),
+        ):
+            if value is not None:
+                registry.histogram(name, help, ("agent",)).observe(value, agent=agent)
+        registry.histogram("mcp_chat_events_per_second", "Stream event rate per turn", ("agent",),
+                           RATE_BUCKETS).observe(timings.events_per_second, agent=agent)
+        registry.histogram("mcp_chat_turn_bytes", "Bytes received per turn", ("agent",),
+                           SIZE_BUCKETS).observe(timings.bytes, agent=agent)
+        registry.counter("mcp_chat_received_bytes_total", "Stream bytes received", ("agent",)).inc(
+            timings.bytes, agent=agent)
+        registry.counter("mcp_chat_reconnects_total", "Stream reconnect attempts", ("agent",)).inc(
+            timings.reconnects, agent=agent)
+        registry.counter("mcp_chat_llm_requests_total", "LLM requests reported by the backend", ("agent",)).inc(
+            timings.llm_requests, agent=agent)
+        events = registry.counter("mcp_chat_events_total", "Stream events by type", ("agent", "event"))
+        for name, count in timings.event_counts.items():
+            events.inc(count, agent=agent, event=name)
+
+
+def recent_turns() -> List[TurnTimings]:
+    """Timings of the latest finished turns, oldest first"""
+    with _recent_lock:
+        return list(_recent)
+
+
+def latency_table(registry: Optional[MetricsRegistry] = None) -> List[Dict[str, Any]]:
+    """Per agent and stage: count, mean and bucket-estimated p50/p95/p99 (seconds)"""
+    registry = registry or get_metrics_registry()
+    rows = []
+    for name, label in LATENCY_METRICS:
+        histogram = registry.get(name)
+        if histogram is None:
+            continue
+        for (agent,), series in sorted(histogram.series().items()):
+            rows.append({
+                "agent": agent,
+                "stage": label,
+                "count": series.count,
+                "mean": series.mean,
+                "p50": series.quantile(0.50, histogram.buckets),
+                "p95": series.quantile(0.95, histogram.buckets),
+                "p99": series.quantile(0.99, histogram.buckets),
+            })
+    return rows
@@ -0,0 +1,75 @@
+"""Table-driven routing of SSE events to handler functions"""
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from utils.sse import SSEEvent
+
+# A handler receives the event and a caller-defined context object and
+# returns (or yields) the text chunks to emit; None means nothing to emit
+EventHandler = Callable[[SSEEvent, object], Optional[Iterable[str]]]
+
+
+class EventDispatcher:
+    """
+    Registry mapping event names to handlers.
+    Exact names are looked up in a dict; names without an exact handler fall back
+    to the longest registered prefix (e.g. "pipeline."), and the result of that
+    fallback is cached so every event name costs one dict lookup after first sight.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, Optional[EventHandler]] = {}
+        self._prefixes: Dict[str, EventHandler] = {}
+        self._resolved: Dict[str, Optional[EventHandler]] = {}
+
+    def on(self, *event_names: str) -> Callable[[EventHandler], EventHandler]:
+        """Decorator registering a handler for one or more exact event names"""
+        def register(handler: EventHandler) -> EventHandler:
+            for name in event_names:
+                self._handlers[name] = handler
+            self._resolved.clear()
+            return handler
+        return register
+
+    def on_prefix(self, prefix: str) -> Callable[[EventHandler], EventHandler]:
+        """Decorator registering a handler for every event name starting with prefix"""
+        def register(handler: EventHandler) -> EventHandler:
+            self._prefixes[prefix] = handler
+            self._resolved.clear()
+            return handler
+        return register
+
+    def ignore(self, *event_names: str) -> None:
+        """Mark event names as known but silently dropped (e.g. heartbeats)"""
+        for name in event_names:
+            self._handlers[name] = None
+        self._resolved.clear()
+
+    def resolve(self, event_name: str) -> Optional[EventHandler]:
+        """Return the handler for an event name, or None if it should be skipped"""
+        try:
+            return self._resolved[event_name]
+        except KeyError:
+            pass
+
+        if event_name in self._handlers:
+            handler = self._handlers[event_name]
+        else:
+            handler = None
+            for prefix in sorted(self._prefixes, key=len, reverse=True):
+                if event_name.startswith(prefix):
+                    handler = self._prefixes[prefix]
+                    break
+        self._resolved[event_name] = handler
+        return handler
+
+    def dispatch(self, event: SSEEvent, context: object) -> Optional[Iterable[str]]:
+        """Run the handler for an event; returns its chunks, or None if unhandled"""
+        handler = self.resolve(event.event)
+        if handler is None:
+            return None
+        return handler(event, context)
+
+    @property
+    def event_names(self) -> Tuple[str, ...]:
+        """Registered exact event names and prefixes (prefixes end with '*')"""
+        return tuple(self._handlers) + tuple(f"{prefix}*" for prefix in self._prefixes)
@@ -0,0 +1,202 @@
+"""
+Background sampling of MCP tool and client statistics.
+
+/mcp/tools reports cumulative per-tool statistics (totalCalls, successfulCalls,
+averageDuration) and /mcp/clients each client's uptime and toolCount. A daemon
+thread polls both and appends the cumulative values to one TieredSeries per tool
+and per client (a client's counters are the sums over its tools). Rates, the
+average duration of each interval and success rates are derived from differences
+of consecutive samples, so trends show up long after the lifetime averages stop moving.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.api_client import DEFAULT_BASE_URL, MCPApiClient
+from utils.timeseries import TieredSeries
+
+# Seconds between samples
+SAMPLE_INTERVAL = 15.0
+
+# Full-resolution samples kept (90 minutes at 15 s), then one archive row per
+# ARCHIVE_FACTOR samples (5 minutes) for ARCHIVE_CAPACITY rows (48 hours)
+RAW_CAPACITY = 360
+ARCHIVE_FACTOR = 20
+ARCHIVE_CAPACITY = 576
+
+# Series tracked per kind; tools or clients beyond this are not sampled
+MAX_SERIES = 500
+
+# Series kinds
+TOOL = "tool"
+CLIENT = "client"
+
+# Columns of every series; counters are cumulative, so archive rows keep the latest value
+COLUMNS = ("calls", "successes", "duration_ms", "uptime_ms", "tool_count")
+CONSOLIDATION = ("last", "last", "last", "last", "last")
+
+# Windows compared by slowdowns(): recent interval average duration vs the one before (seconds)
+TREND_WINDOW = 15 * 60
+
+
+class Derived:
+    """Per-interval values of one series, aligned on the end time of each interval"""
+
+    __slots__ = ("times", "calls_per_minute", "avg_duration_ms", "success_rate", "calls")
+
+    def __init__(self, times: np.ndarray, calls_per_minute: np.ndarray, avg_duration_ms: np.ndarray,
+                 success_rate: np.ndarray, calls: np.ndarray):
+        self.times = times
+        self.calls_per_minute = calls_per_minute
+        self.avg_duration_ms = avg_duration_ms  # NaN for intervals without calls
+        self.success_rate = success_rate  # Percent; NaN for intervals without calls
+        self.calls = calls
+
+
+def derive(times: np.ndarray, values: np.ndarray) -> Derived:
+    """Per-interval rates from cumulative samples; a counter drop (backend restart) restarts from zero"""
+    calls, successes, duration = values[:, 0], values[:, 1], values[:, 2]
+    d_calls, d_successes, d_duration = np.diff(calls), np.diff(successes), np.diff(duration)
+    reset = d_calls < 0
+    d_calls[reset] = calls[1:][reset]
+    d_successes[reset] = successes[1:][reset]
+    d_duration[reset] = duration[1:][reset]
+    d_times = np.diff(times)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(d_times > 0, d_calls / d_times * 60.0, np.nan)
+        avg = np.where(d_calls > 0, d_duration / d_calls, np.nan)
+        success = np.where(d_calls > 0, d_successes / d_calls * 100.0, np.nan)
+    return Derived(times[1:], rate, avg, success, d_calls)
+
+
+class McpStatsSampler:
+    """Polls MCP statistics on a daemon thread into per-tool and per-client time series"""
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, interval: float = SAMPLE_INTERVAL):
+        # A dedicated uncached client: samples must not come from the pages' response cache
+        self.client = MCPApiClient(base_url, use_cache=False)
+        self.interval = interval
+        self.samples = 0
+        self.last_sample: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._series: Dict[Tuple[str, str], TieredSeries] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="mcp-stats-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.sample_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def sample_once(self) -> None:
+        """Fetch both endpoints and append one sample to every series"""
+        tools = self.client.get_mcp_tools().get("tools") or []
+        clients = self.client.get_mcp_clients().get("clients") or []
+        now = time.time()
+        rows: Dict[Tuple[str, str], List[float]] = {}
+        per_client: Dict[str, List[float]] = {}
+        for tool in tools:
+            stats = tool.get("statistics") or {}
+            calls = stats.get("totalCalls") or 0
+            counters = [calls, stats.get("successfulCalls") or 0, (stats.get("averageDuration") or 0) * calls]
+            rows[(TOOL, tool.get("name", "Unknown"))] = counters + [np.nan, np.nan]
+            # Tool statistics are not split by client; a tool served by several clients counts for each
+            for detail in tool.get("clientDetails") or []:
+                totals = per_client.setdefault(detail.get("serverName", "Unknown"), [0.0, 0.0, 0.0])
+                for i, value in enumerate(counters):
+                    totals[i] += value
+        for client in clients:
+            name = client.get("serverName", "Unknown")
+            rows[(CLIENT, name)] = per_client.get(name, [0.0, 0.0, 0.0]) + [
+                client.get("uptime") or 0, client.get("toolCount") or 0]
+        with self._lock:
+            for key, row in rows.items():
+                series = self._series.get(key)
+                if series is None:
+                    if sum(1 for kind, _ in self._series if kind == key[0]) >= MAX_SERIES:
+                        continue
+                    series = self._series[key] = TieredSeries(
+                        COLUMNS, CONSOLIDATION, RAW_CAPACITY, ARCHIVE_FACTOR, ARCHIVE_CAPACITY)
+                series.append(now, row)
+            self.samples += 1
+            self.last_sample = now
+
+    def names(self, kind: str) -> List[str]:
+        with self._lock:
+            return sorted(name for series_kind, name in self._series if series_kind == kind)
+
+    def series(self, kind: str, name: str, since: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Cumulative (times, values) of one series; columns as in COLUMNS"""
+        with self._lock:
+            series = self._series.get((kind, name))
+            if series is None:
+                return np.empty(0), np.empty((0, len(COLUMNS)))
+            return series.arrays(since)
+
+    def derived(self, kind: str, name: str, since: Optional[float] = None) -> Derived:
+        return derive(*self.series(kind, name, since))
+
+    def slowdowns(self, kind: str, window: float = TREND_WINDOW) -> List[Dict[str, Any]]:
+        """
+        Per series: call-weighted average duration in the latest window and in the
+        window before it, and their ratio (largest slowdown first)
+        """
+        now = time.time()
+        rows = []
+        for name in self.names(kind):
+            derived = self.derived(kind, name, since=now - 2 * window)
+            recent = derived.times > now - window
+            totals = []
+            for part in (~recent, recent):
+                calls = derived.calls[part]
+                durations = np.nan_to_num(derived.avg_duration_ms[part])
+                totals.append((calls.sum(), (durations * calls).sum()))
+            (before_calls, before_ms), (recent_calls, recent_ms) = totals
+            before = float(before_ms / before_calls) if before_calls else None
+            latest = float(recent_ms / recent_calls) if recent_calls else None
+            rows.append({
+                "name": name,
+                "calls (recent)": int(recent_calls),
+                "avg ms (before)": before,
+                "avg ms (recent)": latest,
+                "change": latest / before if before and latest is not None else None,
+            })
+        rows.sort(key=lambda row: -(row["change"] or 0))
+        return rows
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(series.nbytes for series in self._series.values())
+
+
+_sampler: Optional[McpStatsSampler] = None
+_sampler_lock = threading.Lock()
+
+
+def get_mcp_stats_sampler() -> McpStatsSampler:
+    """Process-wide sampler, started on first use"""
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = McpStatsSampler()
+        _sampler.start()
+        return _sampler
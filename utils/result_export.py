@@ -0,0 +1,242 @@
+"""
+File export of query results (CSV or Parquet).
+
+Rows are written to a temp directory in fixed-size chunks straight from the
+decoded final/sql_result payload, without building a DataFrame or an in-memory
+copy of the file. Files are read back only when a download is requested.
+Parquet needs the optional pyarrow package.
+"""
+import csv
+import gzip
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+    pq = None
+
+# Where export files are written (override with RESULT_EXPORT_DIR)
+EXPORT_DIR = os.environ.get("RESULT_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "mcp_result_exports"))
+
+# Rows per write
+DEFAULT_CHUNK_ROWS = 10000
+
+# Export files older than this are removed when new ones are written
+EXPORT_MAX_AGE = 24 * 3600
+
+# Supported compression per format (None = uncompressed)
+CSV_COMPRESSIONS = (None, "gzip")
+CSV_GZIP_LEVEL = 6  # zlib's default; level 9 is much slower for little gain
+PARQUET_COMPRESSIONS = ("snappy", "zstd", "gzip", None)
+
+MIME_TYPES = {
+    "csv": "text/csv",
+    "csv.gz": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def parquet_available() -> bool:
+    return pq is not None
+
+
+def export_formats() -> List[str]:
+    """Formats offered in this environment"""
+    return ["csv", "parquet"] if parquet_available() else ["csv"]
+
+
+class ExportFile:
+    """A written export: where it is and what it holds"""
+
+    __slots__ = ("path", "file_name", "mime", "rows", "size", "elapsed")
+
+    def __init__(self, path: str, file_name: str, mime: str, rows: int, size: int, elapsed: float):
+        self.path = path
+        self.file_name = file_name
+        self.mime = mime
+        self.rows = rows
+        self.size = size
+        self.elapsed = elapsed
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def read(self) -> bytes:
+        """File contents (for st.download_button's deferred data callable)"""
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ExportFile":
+        return cls(**{name: data[name] for name in cls.__slots__})
+
+
+def _chunks(rows: Iterable[Any], chunk_rows: int) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, chunk_rows))
+        if not chunk:
+            return
+        yield [row if isinstance(row, dict) else {"value": row} for row in chunk]
+
+
+def _columns(rows: Iterable[Any]) -> List[str]:
+    columns: Dict[str, None] = {}
+    for row in rows:
+        columns.update(dict.fromkeys(row if isinstance(row, dict) else ("value",)))
+    return list(columns)
+
+
+def _cell(value: Any) -> Any:
+    # Nested values are written as JSON text
+    if type(value) in (dict, list):
+        return json.dumps(value, default=str)
+    return value
+
+
+def _write_csv(chunks: Iterator[List[Dict[str, Any]]], path: str, columns: Optional[List[str]],
+               compression: Optional[str]) -> int:
+    if compression not in CSV_COMPRESSIONS:
+        raise ValueError(f"Unsupported CSV compression: {compression}")
+    if compression == "gzip":
+        f = gzip.open(path, "wt", newline="", encoding="utf-8", compresslevel=CSV_GZIP_LEVEL)
+    else:
+        f = open(path, "w", newline="", encoding="utf-8")
+    count = 0
+    with f:
+        writer = csv.writer(f)
+        if columns:
+            writer.writerow(columns)
+        for chunk in chunks:
+            if columns is None:
+                columns = _columns(chunk)
+                writer.writerow(columns)
+            writer.writerows([_cell(row.get(name)) for name in columns] for row in chunk)
+            count += len(chunk)
+    return count
+
+
+def _arrow_array(values: List[Any], arrow_type=None):
+    """Arrow array of one column; values Arrow cannot type (e.g. integers beyond 64 bits) become strings"""
+    try:
+        array = pa.array(values, type=arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        if arrow_type is not None and not pa.types.is_string(arrow_type):
+            raise ValueError(f"Column values do not match the {arrow_type} type of earlier rows")
+        return pa.array([None if value is None else str(value) for value in values], type=pa.string())
+    if arrow_type is None and pa.types.is_null(array.type):
+        # Untyped (all-null) columns become strings
+        return array.cast(pa.string())
+    return array
+
+
+def _write_parquet(chunks: Iterator[List[Dict[str, Any]]], path: str, columns: Optional[List[str]],
+                   compression: Optional[str]) -> int:
+    if pq is None:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+    if compression not in PARQUET_COMPRESSIONS:
+        raise ValueError(f"Unsupported Parquet compression: {compression}")
+    count = 0
+    writer = None
+    schema = None
+    try:
+        for chunk in chunks:
+            if schema is None:
+                # Schema comes from the first chunk
+                names = columns or _columns(chunk)
+                table = pa.table({name: _arrow_array([_cell(row.get(name)) for row in chunk]) for name in names})
+                schema = table.schema
+                writer = pq.ParquetWriter(path, schema, compression=compression or "none")
+            else:
+                table = pa.Table.from_arrays(
+                    [_arrow_array([_cell(row.get(field.name)) for row in chunk], field.type) for field in schema],
+                    schema=schema
+                )
+            writer.write_table(table)
+            count += len(chunk)
+        if writer is None:
+            pq.write_table(pa.table({name: pa.array([], pa.string()) for name in columns or []}), path)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+def write_export(rows: Iterable[Any], fmt: str = "csv", compression: Optional[str] = None,
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS, columns: Optional[List[str]] = None,
+                 name: str = "result", directory: Optional[str] = None) -> ExportFile:
+    """
+    Write rows (dicts) to a new file in the export directory.
+
+    When rows is a list its columns are collected up front; for other iterables
+    they come from the first chunk unless given, and later unknown keys are dropped.
+    """
+    directory = directory or EXPORT_DIR
+    os.makedirs(directory, exist_ok=True)
+    cleanup_exports(directory)
+
+    if columns is None and isinstance(rows, list):
+        columns = _columns(rows)
+
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name) or "result"
+    if fmt == "csv":
+        extension = "csv.gz" if compression == "gzip" else "csv"
+    elif fmt == "parquet":
+        extension = "parquet"
+    else:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    file_name = f"{safe_name}.{extension}"
+    path = os.path.join(directory, f"{uuid.uuid4().hex}_{file_name}")
+
+    started = time.perf_counter()
+    try:
+        if fmt == "csv":
+            count = _write_csv(_chunks(rows, chunk_rows), path, columns, compression)
+        else:
+            count = _write_parquet(_chunks(rows, chunk_rows), path, columns, compression)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return ExportFile(path, file_name, MIME_TYPES[extension], count, os.path.getsize(path),
+                      time.perf_counter() - started)
+
+
+def cleanup_exports(directory: Optional[str] = None, max_age: float = EXPORT_MAX_AGE) -> int:
+    """Remove export files older than max_age seconds; returns how many were removed"""
+    directory = directory or EXPORT_DIR
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def format_size(size: int) -> str:
+    """Human-readable file size"""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
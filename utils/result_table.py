@@ -0,0 +1,138 @@
+"""
+Tabular display of query results in the Universal Chat page.
+
+Result rows are kept column-wise (ResultRef); each column gets an inferred type
+once, and only the visible page is converted to a typed DataFrame on each rerun.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+import streamlit as st
+
+from utils.chat_store import ResultRef
+from utils.result_export import ExportFile, format_size
+
+# Rows per page of the results table
+PAGE_ROWS = 100
+
+_INT = re.compile(r"^[+-]?\d+$")
+_FLOAT = re.compile(r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$")
+_DATETIME = re.compile(r"^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}:?\d{2})?$")
+
+
+def infer_column_type(values: Sequence[Any]) -> str:
+    """Display type of a column: bool, int, float, datetime, json or string"""
+    kinds = set()
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            kinds.add("bool")
+        elif isinstance(value, int):
+            kinds.add("int")
+        elif isinstance(value, float):
+            kinds.add("float")
+        elif isinstance(value, (dict, list)):
+            kinds.add("json")
+        elif isinstance(value, str):
+            text = value.strip()
+            if _INT.match(text):
+                kinds.add("int")
+            elif _FLOAT.match(text):
+                kinds.add("float")
+            elif _DATETIME.match(text):
+                kinds.add("datetime")
+            else:
+                return "string"
+        else:
+            return "string"
+        if len(kinds) > 2:
+            return "string"
+
+    if not kinds:
+        return "string"
+    if len(kinds) == 1:
+        return kinds.pop()
+    if kinds == {"int", "float"}:
+        return "float"
+    return "string"
+
+
+def column_types(result: ResultRef) -> List[str]:
+    """Inferred type of each result column (computed once per result)"""
+    if result.types is None:
+        result.types = tuple(infer_column_type(values) for values in result.values)
+    return list(result.types)
+
+
+def _convert(values: Sequence[Any], kind: str) -> pd.Series:
+    try:
+        return _convert_typed(values, kind)
+    except (OverflowError, TypeError, ValueError):
+        # e.g. integers beyond 64 bits; show them as text
+        return _convert_typed(values, "string")
+
+
+def _convert_typed(values: Sequence[Any], kind: str) -> pd.Series:
+    if kind == "int":
+        return pd.Series([None if v is None else int(v) for v in values], dtype="Int64")
+    if kind == "float":
+        return pd.to_numeric(pd.Series(values, dtype="object"), errors="coerce")
+    if kind == "bool":
+        return pd.Series(values, dtype="boolean")
+    if kind == "datetime":
+        return pd.to_datetime(pd.Series(values, dtype="object"), errors="coerce", format="ISO8601", utc=True)
+    if kind == "json":
+        return pd.Series([None if v is None else json.dumps(v) for v in values], dtype="object")
+    return pd.Series([None if v is None else str(v) for v in values], dtype="object")
+
+
+def to_frame(result: ResultRef, start: int = 0, stop: Optional[int] = None) -> pd.DataFrame:
+    """Typed DataFrame of rows [start, stop) of a result"""
+    data: Dict[str, pd.Series] = {}
+    for name, values, kind in zip(result.columns, result.values, column_types(result)):
+        data[name] = _convert(values[start:stop], kind).reset_index(drop=True)
+    frame = pd.DataFrame(data)
+    frame.index = range(start, start + len(frame))
+    return frame
+
+
+def render_result_table(result: ResultRef, key: str) -> None:
+    """Paginated st.dataframe of a result, with a note when the backend returned more rows"""
+    total = len(result)
+    if not total:
+        return
+
+    pages = (total + PAGE_ROWS - 1) // PAGE_ROWS
+    page = 1
+    if pages > 1:
+        page = int(st.number_input(
+            f"Result page (of {pages})",
+            min_value=1,
+            max_value=pages,
+            value=1,
+            step=1,
+            key=f"{key}_page"
+        ))
+    start = (page - 1) * PAGE_ROWS
+    st.dataframe(to_frame(result, start, start + PAGE_ROWS), use_container_width=True)
+
+    if result.row_count > total:
+        st.caption(f"Showing the first {total} of {result.row_count} rows")
+
+
+def render_export_button(export: ExportFile, key: str) -> None:
+    """Download button for an export file; the file is only read when the button is clicked"""
+    if not export.exists():
+        st.caption("📥 Export file has expired")
+        return
+    st.download_button(
+        f"📥 Download {export.file_name} ({export.rows} rows, {format_size(export.size)})",
+        data=export.read,
+        file_name=export.file_name,
+        mime=export.mime,
+        key=key,
+        on_click="ignore"
+    )
@@ -0,0 +1,120 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+from utils.tool_catalog import schema_fingerprint
+
+
+def normalize_schema(input_schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the display view of a tool's inputSchema (type, properties, required)"""
+    # Simple schema without properties is shown as-is
+    if "properties" not in input_schema:
+        return input_schema
+
+    properties = input_schema.get("properties", {})
+    required_fields = input_schema.get("required", [])
+
+    # Create a formatted display of the schema
+    schema_display = {
+        "type": input_schema.get("type", "object"),
+        "properties": {}
+    }
+
+    for prop_name, prop_details in properties.items():
+        is_required = prop_name in required_fields
+
+        # Ensure prop_details is a dictionary
+        if isinstance(prop_details, dict):
+            prop_info = {
+                "type": prop_details.get("type", "unknown"),
+                "description": prop_details.get("description", ""),
+                "required": is_required
+            }
+
+            # Add additional schema details if present
+            if "format" in prop_details:
+                prop_info["format"] = prop_details["format"]
+            if "enum" in prop_details:
+                prop_info["enum"] = prop_details["enum"]
+            if "default" in prop_details:
+                prop_info["default"] = prop_details["default"]
+        else:
+            # Handle non-dict property (could be a simple type string)
+            prop_info = {
+                "type": str(prop_details) if prop_details else "unknown",
+                "description": "",
+                "required": is_required
+            }
+
+        schema_display["properties"][prop_name] = prop_info
+
+    # Add required fields list
+    if required_fields:
+        schema_display["required"] = required_fields
+
+    return schema_display
+
+
+class RenderedSchema:
+    """Normalized schema view of a tool and its pretty-printed JSON"""
+
+    __slots__ = ("view", "text")
+
+    def __init__(self, view: Dict[str, Any], text: str):
+        self.view = view
+        self.text = text
+
+
+class SchemaRenderCache:
+    """
+    Process-wide LRU of rendered tool schemas keyed by input schema hash
+    (see tool_catalog.schema_fingerprint), so new statistics or descriptions
+    do not invalidate a render. Each schema is rendered once; entries for
+    schemas that left the catalog are dropped by sync() when the catalog
+    version changes.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Optional[RenderedSchema]]" = OrderedDict()
+        self._catalog_version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, tool: Dict[str, Any], fingerprint: Optional[str] = None) -> Optional[RenderedSchema]:
+        """Rendered schema of a tool, or None if it takes no input parameters"""
+        key = fingerprint or schema_fingerprint(tool)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        input_schema = tool.get("inputSchema", {})
+        rendered = None
+        if input_schema:
+            view = normalize_schema(input_schema)
+            rendered = RenderedSchema(view, json.dumps(view, indent=2))
+
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = rendered
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return rendered
+
+    def sync(self, catalog_version: int, fingerprints: Iterable[str]) -> None:
+        """Drop entries whose schemas are no longer in the catalog (once per catalog version)"""
+        with self._lock:
+            if catalog_version == self._catalog_version:
+                return
+            current = set(fingerprints)
+            for key in [key for key in self._entries if key not in current]:
+                del self._entries[key]
+            self._catalog_version = catalog_version
+
+
+# Shared by all sessions in this process
+schema_cache = SchemaRenderCache()
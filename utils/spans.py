@@ -0,0 +1,263 @@
+"""
+Timed span trees of conversation turns, and latency percentiles across turns.
+
+A TurnTrace rebuilds the structure the stream already marks: "Step N" progress
+events, pipeline.level_start levels, tool_start/tool_complete pairs and
+milestone.* completions become spans under one root span for the turn. Finished
+traces are folded into SpanStats, which keeps a fixed-size log-binned NumPy
+histogram per step, level and tool and computes p50/p95/p99 for all of them at once.
+"""
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.sse import SSEEvent
+
+# Span kinds
+TURN = "turn"
+STEP = "step"
+LEVEL = "level"
+TOOL = "tool"
+MILESTONE = "milestone"  # Instant: a completion mark, no duration
+
+# Kinds aggregated into SpanStats
+TIMED_KINDS = (TURN, STEP, LEVEL, TOOL)
+
+# Histogram bins: log-spaced from 1 ms to 1 hour (about 3% relative width each)
+HISTOGRAM_MIN = 1e-3
+HISTOGRAM_MAX = 3600.0
+HISTOGRAM_BINS = 512
+
+# Distinct (kind, name) keys tracked; later ones are pooled under OTHER_NAME
+MAX_SPAN_KEYS = 1000
+OTHER_NAME = "(other)"
+
+# Plain-data span row: (kind, name, label, depth, start, end)
+SpanRow = Tuple[str, str, str, int, float, float]
+
+
+class Span:
+    """A named interval of a turn (seconds since the turn started)"""
+
+    __slots__ = ("kind", "name", "label", "start", "end", "parent", "children")
+
+    def __init__(self, kind: str, name: str, start: float, parent: Optional["Span"] = None,
+                 label: Optional[str] = None):
+        self.kind = kind
+        self.name = name  # Aggregation key, e.g. "Step 2" or the tool name
+        self.label = label or name  # Display text
+        self.start = start
+        self.end: Optional[float] = None
+        self.parent = parent
+        self.children: List[Span] = []
+        if parent is not None:
+            parent.children.append(self)
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.end is None else self.end - self.start
+
+    def walk(self, depth: int = 0):
+        """(span, depth) of this span and its descendants, depth first"""
+        yield self, depth
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+
+class TurnTrace:
+    """Builds the span tree of one turn from its events; feed record(event, t), then finish(t)"""
+
+    def __init__(self):
+        self.root = Span(TURN, TURN, 0.0, label="Turn")
+        self._step: Optional[Span] = None
+        self._level: Optional[Span] = None
+        self._tools: Dict[str, Deque[Span]] = {}  # Open tool spans by tool name, oldest first
+
+    def _parent(self) -> Span:
+        return self._step or self._level or self.root
+
+    def record(self, event: SSEEvent, t: float) -> None:
+        name = event.event
+        if name == 'progress':
+            # Only step changes matter here; cheap check before decoding
+            if '"Step ' not in event.data:
+                return
+            step = _json(event).get('step') or ''
+            if step.startswith("Step ") and (self._step is None or self._step.name != step):
+                self._close(self._step, t)
+                self._step = Span(STEP, step, t, self._level or self.root)
+        elif name == 'pipeline.level_start':
+            data = _json(event)
+            self._close(self._step, t)
+            self._step = None
+            self._close(self._level, t)
+            level = f"Level {data.get('level', 0)}"
+            description = data.get('description', '')
+            self._level = Span(LEVEL, level, t, self.root, f"{level}: {description}" if description else level)
+        elif name == 'pipeline.execution_complete':
+            self._close(self._step, t)
+            self._step = None
+            self._close(self._level, t)
+            self._level = None
+        elif name == 'tool_start':
+            tool = _json(event).get('tool') or 'unknown'
+            self._tools.setdefault(tool, deque()).append(Span(TOOL, tool, t, self._parent()))
+        elif name == 'tool_complete':
+            data = _json(event)
+            tool = data.get('tool') or 'unknown'
+            spans = self._tools.get(tool)
+            if spans:
+                span = spans.popleft()
+                span.end = t
+                if not data.get('success', False):
+                    span.label = f"{tool} (failed)"
+        elif name.startswith('milestone.'):
+            data = _json(event)
+            milestone = data.get('milestone_name') or name[len('milestone.'):]
+            span = Span(MILESTONE, milestone, t, self._parent())
+            span.end = t
+
+    @staticmethod
+    def _close(span: Optional[Span], t: float) -> None:
+        if span is not None and span.end is None:
+            span.end = t
+
+    def finish(self, t: float) -> Span:
+        """Close every open span at t and return the root"""
+        for span, _ in self.root.walk():
+            if span.end is None:
+                span.end = t
+        self._step = self._level = None
+        self._tools.clear()
+        return self.root
+
+    def rows(self) -> List[SpanRow]:
+        """The tree as plain rows in display order (for storage and the waterfall)"""
+        return [(span.kind, span.name, span.label, depth, round(span.start, 6),
+                 round(span.end if span.end is not None else span.start, 6))
+                for span, depth in self.root.walk()]
+
+
+def _json(event: SSEEvent) -> Dict[str, Any]:
+    try:
+        data = event.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+# Upper edges of the finite bins; index 0 collects values below HISTOGRAM_MIN,
+# index HISTOGRAM_BINS + 1 values above HISTOGRAM_MAX
+_EDGES = np.geomspace(HISTOGRAM_MIN, HISTOGRAM_MAX, HISTOGRAM_BINS + 1)
+# Representative value of each bin: geometric centre, clamped ends for under/overflow
+_CENTRES = np.concatenate((
+    [HISTOGRAM_MIN],
+    np.sqrt(_EDGES[:-1] * _EDGES[1:]),
+    [HISTOGRAM_MAX],
+))
+
+
+class LatencyHistogram:
+    """Fixed-memory log-binned histogram of durations (seconds)"""
+
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = np.zeros(HISTOGRAM_BINS + 2, dtype=np.int64)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, values: Sequence[float]) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        if not values.size:
+            return
+        np.add.at(self.counts, np.searchsorted(_EDGES, values, side="left"), 1)
+        self.count += int(values.size)
+        self.sum += float(values.sum())
+        self.max = max(self.max, float(values.max()))
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+
+def percentiles(counts: np.ndarray, quantiles: Sequence[float]) -> np.ndarray:
+    """
+    Quantiles of many histograms at once: counts is (histograms, bins), the result
+    (histograms, quantiles), NaN for empty histograms
+    """
+    counts = np.atleast_2d(counts)
+    cumulative = np.cumsum(counts, axis=1)
+    totals = cumulative[:, -1:]
+    # Rank of each quantile (1-based), then the first bin whose cumulative count reaches it
+    ranks = np.maximum(1, np.ceil(np.asarray(quantiles)[None, :] * totals))
+    bins = (cumulative[:, None, :] < ranks[:, :, None]).sum(axis=2)
+    values = _CENTRES[np.minimum(bins, len(_CENTRES) - 1)]
+    values[totals[:, 0] == 0] = np.nan
+    return values
+
+
+class SpanStats:
+    """Latency histograms per (kind, name) over all recorded turns"""
+
+    def __init__(self, max_keys: int = MAX_SPAN_KEYS):
+        self.max_keys = max_keys
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, rows: Sequence[SpanRow]) -> None:
+        """Add the timed spans of one turn"""
+        durations: Dict[Tuple[str, str], List[float]] = {}
+        for kind, name, _, _, start, end in rows:
+            if kind in TIMED_KINDS:
+                durations.setdefault((kind, name), []).append(end - start)
+        with self._lock:
+            for key, values in durations.items():
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    if len(self._histograms) >= self.max_keys:
+                        key = (key[0], OTHER_NAME)
+                    histogram = self._histograms.setdefault(key, LatencyHistogram())
+                histogram.record(values)
+
+    def table(self, quantiles: Sequence[float] = (0.50, 0.95, 0.99)) -> List[Dict[str, Any]]:
+        """Per (kind, name): count, mean, max and the quantiles, slowest p95 first within a kind"""
+        with self._lock:
+            keys = list(self._histograms)
+            histograms = [self._histograms[key] for key in keys]
+            if not keys:
+                return []
+            counts = np.stack([histogram.counts for histogram in histograms])
+            stats = [(histogram.count, histogram.mean, histogram.max) for histogram in histograms]
+        values = percentiles(counts, quantiles)
+        rows = []
+        for (kind, name), (count, mean, maximum), row in zip(keys, stats, values):
+            entry = {"kind": kind, "name": name, "count": count, "mean": mean}
+            for q, value in zip(quantiles, row):
+                entry[f"p{q * 100:g}"] = float(value)
+            entry["max"] = maximum
+            rows.append(entry)
+        order = {kind: i for i, kind in enumerate(TIMED_KINDS)}
+        p95 = f"p{quantiles[min(1, len(quantiles) - 1)] * 100:g}"
+        rows.sort(key=lambda entry: (order.get(entry["kind"], len(order)), -entry[p95]))
+        return rows
+
+    def clear(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+_stats: Optional[SpanStats] = None
+_stats_lock = threading.Lock()
+
+
+def get_span_stats() -> SpanStats:
+    """Process-wide span statistics"""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = SpanStats()
+        return _stats
@@ -0,0 +1,316 @@
+"""Incremental Server-Sent Events parser shared by every streaming call site.
+
+Implements the event stream interpretation rules of the HTML living standard
+(https://html.spec.whatwg.org/multipage/server-sent-events.html) on a byte
+buffer, so the transport can hand over arbitrarily sized chunks.
+"""
+import itertools
+import json
+import queue
+import threading
+from typing import Any, Callable, Generator, Iterable, Iterator, List, Optional, TypeVar
+
+import requests
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError, SSLError
+
+# Adaptive read sizes: start small so the first events arrive promptly and
+# grow while the socket keeps filling whole reads (bulk progress traffic)
+MIN_CHUNK_SIZE = 4 * 1024
+MAX_CHUNK_SIZE = 256 * 1024
+
+_BOM = b"\xef\xbb\xbf"
+
+# Marker for an event whose JSON payload has not been decoded yet
+_UNDECODED = object()
+
+# Marker put on the prefetch queue when the source iterator is exhausted
+_END = object()
+
+# Items iter_with_idle_ticks reads ahead of its consumer
+PREFETCH_LIMIT = 256
+
+T = TypeVar("T")
+
+
+class SSEEvent:
+    """A single dispatched SSE event"""
+
+    __slots__ = ("event", "data", "id", "retry", "_payload")
+
+    def __init__(self, event: str, data: str, id: str = "", retry: Optional[int] = None):
+        self.event = event
+        self.data = data
+        self.id = id
+        self.retry = retry
+        self._payload = _UNDECODED
+
+    def json(self) -> Any:
+        """Decode the data field as JSON (decoded lazily, at most once)"""
+        if self._payload is _UNDECODED:
+            self._payload = json.loads(self.data)
+        return self._payload
+
+    def __repr__(self) -> str:
+        return f"SSEEvent(event={self.event!r}, id={self.id!r}, data={self.data[:60]!r})"
+
+
+class SSEParser:
+    """
+    Incremental SSE parser working on raw bytes.
+    Feed chunks with feed(); each call returns the events completed by that chunk.
+    """
+
+    def __init__(self):
+        self._buffer = b""
+        self._started = False
+        self._pending_cr = False
+        self._event_type = ""
+        self._data: List[str] = []
+        self.last_event_id = ""
+        self.retry: Optional[int] = None
+        self.bytes_received = 0
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        """Consume a chunk of bytes and return the events it completed"""
+        if not chunk:
+            return []
+        self.bytes_received += len(chunk)
+
+        if not self._started:
+            # Strip a leading UTF-8 BOM once, possibly split across chunks
+            chunk = self._buffer + chunk
+            self._buffer = b""
+            if len(chunk) < len(_BOM) and _BOM.startswith(chunk):
+                self._buffer = chunk
+                return []
+            if chunk.startswith(_BOM):
+                chunk = chunk[len(_BOM):]
+            self._started = True
+
+        # A CR ending the previous chunk may be the first half of a CRLF pair
+        if self._pending_cr:
+            self._pending_cr = False
+            if chunk[:1] == b"\n":
+                chunk = chunk[1:]
+
+        if b"\r" in chunk:
+            if chunk.endswith(b"\r"):
+                self._pending_cr = True
+            chunk = chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+        buffer = self._buffer + chunk if self._buffer else chunk
+        end = buffer.rfind(b"\n")
+        if end == -1:
+            self._buffer = buffer
+            return []
+        self._buffer = buffer[end + 1:]
+
+        # LF never occurs inside a multi-byte UTF-8 sequence, so the complete
+        # lines can be decoded in one call
+        lines = buffer[:end].decode("utf-8", errors="replace").split("\n")
+
+        events = []
+        append_event = events.append
+        data = self._data
+        event_type = self._event_type
+        last_id = self.last_event_id
+        for line in lines:
+            # Fast paths for the lines the backend sends on every event
+            if not line:
+                if data:
+                    append_event(SSEEvent(event_type or "message", "\n".join(data), last_id, self.retry))
+                    data = []
+                event_type = ""
+            elif line[:6] == "data: ":
+                data.append(line[6:])
+            elif line[:7] == "event: ":
+                event_type = line[7:]
+            elif line[:4] == "id: " and "\x00" not in line:
+                last_id = line[4:]
+            else:
+                # Everything else goes through the general field rules
+                self._data, self._event_type, self.last_event_id = data, event_type, last_id
+                self._process_line(line)
+                data, event_type, last_id = self._data, self._event_type, self.last_event_id
+
+        self._data, self._event_type, self.last_event_id = data, event_type, last_id
+        return events
+
+    def flush(self) -> List[SSEEvent]:
+        """
+        Signal end of stream.
+        Per the spec an incomplete trailing event is discarded, so this only resets state.
+        """
+        self._buffer = b""
+        self._pending_cr = False
+        self._event_type = ""
+        self._data = []
+        return []
+
+    def _process_line(self, line: str) -> Optional[SSEEvent]:
+        """Interpret one line, returning an event when the line dispatches one"""
+        if not line:
+            return self._dispatch()
+
+        if line[0] == ":":
+            # Comment line (often used as keep-alive)
+            return None
+
+        colon = line.find(":")
+        if colon == -1:
+            field, value = line, ""
+        else:
+            field = line[:colon]
+            value = line[colon + 1:]
+            if value[:1] == " ":
+                value = value[1:]
+
+        if field == "data":
+            self._data.append(value)
+        elif field == "event":
+            self._event_type = value
+        elif field == "id":
+            if "\x00" not in value:
+                self.last_event_id = value
+        elif field == "retry":
+            if value.isdigit():
+                self.retry = int(value)
+        # Unknown fields are ignored
+        return None
+
+    def _dispatch(self) -> Optional[SSEEvent]:
+        """Build the pending event and reset the per-event buffers"""
+        if not self._data:
+            self._event_type = ""
+            return None
+        event = SSEEvent(
+            self._event_type or "message",
+            "\n".join(self._data),
+            self.last_event_id,
+            self.retry
+        )
+        self._event_type = ""
+        self._data = []
+        return event
+
+
+def iter_chunks(response, min_size: int = MIN_CHUNK_SIZE, max_size: int = MAX_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Read a streamed requests.Response with adaptive chunk sizes.
+    Uses urllib3's read1() so a read returns whatever is available instead of
+    blocking until the requested size arrives; the size doubles while reads
+    come back full and halves again when traffic thins out.
+    """
+    raw = getattr(response, "raw", None)
+    read1 = getattr(raw, "read1", None)
+    if read1 is None:
+        # Older urllib3 without read1(): fall back to fixed large chunks
+        yield from response.iter_content(chunk_size=max_size)
+        return
+
+    size = min_size
+    while True:
+        # Translate urllib3 errors the same way Response.iter_content() does
+        try:
+            chunk = read1(size, decode_content=True)
+        except ProtocolError as e:
+            raise requests.exceptions.ChunkedEncodingError(e)
+        except DecodeError as e:
+            raise requests.exceptions.ContentDecodingError(e)
+        except ReadTimeoutError as e:
+            raise requests.exceptions.ConnectionError(e)
+        except SSLError as e:
+            raise requests.exceptions.SSLError(e)
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) >= size:
+            size = min(size * 2, max_size)
+        elif len(chunk) < size // 4:
+            size = max(size // 2, min_size)
+
+
+def parse_sse(chunks: Iterable[bytes], parser: Optional[SSEParser] = None) -> Generator[SSEEvent, None, None]:
+    """Parse an iterable of byte chunks into SSE events"""
+    parser = parser or SSEParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    parser.flush()
+
+
+def iter_sse_events(response, parser: Optional[SSEParser] = None) -> Generator[SSEEvent, None, None]:
+    """Yield SSE events from a streamed requests.Response"""
+    yield from parse_sse(iter_chunks(response), parser)
+
+
+def iter_with_idle_ticks(source: Iterable[T], idle_interval: float, maxsize: int = PREFETCH_LIMIT,
+                         on_abandon: Optional[Callable[[Iterator[T]], None]] = None) -> Generator[Optional[T], None, None]:
+    """
+    Iterate source on a background thread, yielding None whenever no item
+    arrives within idle_interval seconds.
+    Lets a consumer do periodic work (e.g. flush a pending UI frame) while the
+    network read is blocked. Exceptions raised by source are re-raised here.
+    At most maxsize items wait between the threads, so a slow consumer holds
+    the reader back. Once the consumer closes the generator the reader stops
+    after its current item and closes source, or, with on_abandon, calls it
+    on the reader thread with the items not yet delivered followed by the rest
+    of source. A read blocked on a quiet connection is not interrupted; close
+    the underlying response to release the reader thread.
+    """
+    items: "queue.Queue" = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def offer(item) -> bool:
+        """Queue item for the consumer; False once the consumer has left"""
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=idle_interval)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def pump():
+        iterator = iter(source)
+        try:
+            for item in iterator:
+                if not offer(item):
+                    break
+            else:
+                offer(_END)
+                return
+        except BaseException as e:  # re-raised in the consumer
+            offer(e)
+            return
+        # The consumer has left: hand the rest over or stop reading
+        if on_abandon is not None:
+            undelivered = []
+            while True:
+                try:
+                    undelivered.append(items.get_nowait())
+                except queue.Empty:
+                    break
+            undelivered.append(item)
+            on_abandon(itertools.chain(undelivered, iterator))
+        else:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    reader = threading.Thread(target=pump, name="sse-reader", daemon=True)
+    reader.start()
+
+    try:
+        while True:
+            try:
+                item = items.get(timeout=idle_interval)
+            except queue.Empty:
+                yield None
+                continue
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
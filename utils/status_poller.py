@@ -0,0 +1,204 @@
+"""
+One status poller for the whole app process.
+
+A daemon thread fetches /health, /status, /hosts/status and /mcp/status into a
+shared StatusSnapshot that every session reads, so backend load does not grow
+with the number of viewers. The snapshot version only changes when the content
+does (volatile fields such as timestamps are ignored), which lets pages rerender
+on change instead of on a timer. The polling interval shrinks while the backend
+is degraded or its status is changing and backs off while it is stable; polling
+pauses when no page has read the snapshot for a while.
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Optional
+
+from utils.api_client import DEFAULT_BASE_URL, BatchResult, MCPApiClient
+
+# Endpoint calls (names from BATCH_ENDPOINTS) in every snapshot
+STATUS_CALLS = ('get_health', 'get_status', 'get_hosts_status', 'get_mcp_status')
+
+# Polling interval bounds (seconds): first poll, fastest while degraded or changing, slowest while stable
+BASE_INTERVAL = 5.0
+MIN_INTERVAL = 2.0
+MAX_INTERVAL = 60.0
+
+# Interval growth per poll without change
+BACKOFF = 1.5
+
+# Seconds each poll may take
+POLL_DEADLINE = 5.0
+
+# Polling pauses once no page has read the snapshot for this long (seconds)
+IDLE_AFTER = 120.0
+
+# Fields left out of the change fingerprint because they move on every poll
+VOLATILE_KEYS = frozenset(['timestamp', 'time', 'currentTime', 'serverTime', 'uptime', 'uptimeMs', 'checkedAt'])
+
+# Health status values that count as healthy
+HEALTHY_STATES = frozenset(['healthy', 'up', 'ok'])
+
+
+class StatusSnapshot:
+    """Results of one poll; batch holds the per-call results and errors"""
+
+    __slots__ = ("version", "batch", "fetched_at", "changed_at", "healthy", "interval")
+
+    def __init__(self, version: int, batch: BatchResult, fetched_at: float, changed_at: float,
+                 healthy: bool, interval: float):
+        self.version = version  # Bumped only when the content changes
+        self.batch = batch
+        self.fetched_at = fetched_at  # Wall-clock time of the poll
+        self.changed_at = changed_at  # Wall-clock time of the last content change
+        self.healthy = healthy
+        self.interval = interval  # Seconds until the next poll
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def summary(self) -> str:
+        state = "healthy" if self.healthy else "degraded"
+        return (f"Status v{self.version} · {state} · polled {self.age:.0f}s ago, "
+                f"next in {self.interval:.0f}s · shared by all viewers")
+
+
+def _stable(value: Any) -> Any:
+    """value without volatile fields, for the change fingerprint"""
+    if isinstance(value, dict):
+        return {key: _stable(item) for key, item in value.items() if key not in VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [_stable(item) for item in value]
+    return value
+
+
+def fingerprint(batch: BatchResult) -> str:
+    content = {
+        "results": _stable(batch.results),
+        "errors": {name: str(error) for name, error in batch.errors.items()},
+    }
+    return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def is_healthy(batch: BatchResult) -> bool:
+    """Every call succeeded and neither /health nor /mcp/status reports a problem"""
+    if not batch.complete:
+        return False
+    health = batch.results.get('get_health') or {}
+    status = health.get('status')
+    if status is not None and str(status).lower() not in HEALTHY_STATES:
+        return False
+    if health.get('healthy') is False:
+        return False
+    return (batch.results.get('get_mcp_status') or {}).get('healthy', True) is not False
+
+
+class StatusPoller:
+    """Polls the status endpoints on a daemon thread into a shared, versioned snapshot"""
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, min_interval: float = MIN_INTERVAL,
+                 max_interval: float = MAX_INTERVAL, idle_after: float = IDLE_AFTER):
+        # A dedicated uncached client: the poller is what keeps the status fresh
+        self.client = MCPApiClient(base_url, use_cache=False)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.idle_after = idle_after
+        self.polls = 0
+        self._snapshot: Optional[StatusSnapshot] = None
+        self._fingerprint: Optional[str] = None
+        self._interval = max(min_interval, min(BASE_INTERVAL, max_interval))
+        self._last_read = time.monotonic()
+        self._condition = threading.Condition()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="status-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if time.monotonic() - self._last_read > self.idle_after:
+                # Nobody is looking; sleep until a page reads the snapshot again
+                self._wake.wait()
+            else:
+                self.poll()
+                self._wake.wait(self._interval)
+            self._wake.clear()
+
+    def poll(self) -> StatusSnapshot:
+        """Fetch every status endpoint once and publish the result"""
+        batch = self.client.fetch_many(STATUS_CALLS, deadline=POLL_DEADLINE)
+        now = time.time()
+        digest = fingerprint(batch)
+        healthy = is_healthy(batch)
+        with self._condition:
+            previous = self._snapshot
+            changed = previous is not None and digest != self._fingerprint
+            # Poll fast while something is wrong or moving, back off while nothing changes
+            if changed or not healthy:
+                self._interval = self.min_interval
+            else:
+                self._interval = min(self.max_interval, self._interval * BACKOFF)
+            if previous is None or changed:
+                version = (previous.version if previous else 0) + 1
+                changed_at = now
+            else:
+                version, changed_at = previous.version, previous.changed_at
+            self._fingerprint = digest
+            self._snapshot = StatusSnapshot(version, batch, now, changed_at, healthy, self._interval)
+            self.polls += 1
+            self._condition.notify_all()
+            return self._snapshot
+
+    def snapshot(self, timeout: float = POLL_DEADLINE + 1) -> Optional[StatusSnapshot]:
+        """The latest snapshot, waiting for the first poll if there is none yet"""
+        with self._condition:
+            self._touch()
+            if self._snapshot is None:
+                self._condition.wait_for(lambda: self._snapshot is not None, timeout)
+            return self._snapshot
+
+    def refresh(self, timeout: float = POLL_DEADLINE + 1) -> Optional[StatusSnapshot]:
+        """
+        Poll now unless the snapshot is younger than the minimum interval (so many
+        viewers pressing Refresh still cause one request), and return the result
+        """
+        with self._condition:
+            self._touch()
+            current = self._snapshot
+            if current is not None and current.age < self.min_interval:
+                return current
+            self._wake.set()
+            self._condition.wait_for(lambda: self._snapshot is not current, timeout)
+            return self._snapshot
+
+    def _touch(self) -> None:
+        idle = time.monotonic() - self._last_read > self.idle_after
+        self._last_read = time.monotonic()
+        if idle:
+            self._wake.set()
+
+
+_poller: Optional[StatusPoller] = None
+_poller_lock = threading.Lock()
+
+
+def get_status_poller() -> StatusPoller:
+    """Process-wide status poller, started on first use"""
+    global _poller
+    with _poller_lock:
+        if _poller is None:
+            _poller = StatusPoller()
+        _poller.start()
+        return _poller
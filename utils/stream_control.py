@@ -0,0 +1,225 @@
+"""
+Cooperative cancellation of conversation streams.
+
+When a page stops reading a conversation before its terminal event (the Stop
+button, or any rerun that abandons the answer) the backend work is stopped as
+well: a graceful interrupt is sent for the session, and if the backend has not
+finished by the deadline the session is cancelled outright. The stream is kept
+only until the backend reports the interrupt (interrupt_acknowledged, then
+interrupted or another terminal event), so the latency can be measured, and is
+closed right after.
+"""
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from utils.sse import SSEEvent
+from utils.stream_resume import TERMINAL_EVENTS, ResumableEventStream
+
+# Seconds a graceful interrupt may take before the session is cancelled
+STOP_DEADLINE = 5.0
+
+# Reports of finished stops kept for the page to pick up
+REPORTS_LIMIT = 200
+
+
+class StopReport:
+    """Outcome and timings of stopping one stream"""
+
+    __slots__ = ("session_id", "reason", "deadline", "requested_at", "sent", "acknowledged_at", "stopped_at",
+                 "forced", "error", "done")
+
+    def __init__(self, session_id: Optional[str], reason: str, deadline: float = STOP_DEADLINE):
+        self.session_id = session_id
+        self.reason = reason
+        self.deadline = deadline
+        self.requested_at = time.monotonic()
+        self.sent = False  # The interrupt request was accepted
+        self.acknowledged_at: Optional[float] = None  # interrupt_acknowledged received
+        self.stopped_at: Optional[float] = None  # interrupted (or another terminal event) received
+        self.forced = False  # cancel_session was needed
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+    @property
+    def ack_latency(self) -> Optional[float]:
+        """Seconds from the interrupt request to its acknowledgement"""
+        if self.acknowledged_at is None:
+            return None
+        return self.acknowledged_at - self.requested_at
+
+    @property
+    def stop_latency(self) -> Optional[float]:
+        """Seconds from the interrupt request to the backend stopping"""
+        if self.stopped_at is None:
+            return None
+        return self.stopped_at - self.requested_at
+
+    def summary(self) -> str:
+        if self.session_id is None:
+            return "Stopped before the backend session started"
+        parts = []
+        if self.ack_latency is not None:
+            parts.append(f"interrupt acknowledged in {self.ack_latency * 1000:.0f} ms")
+        if self.stop_latency is not None:
+            parts.append(f"backend stopped in {self.stop_latency * 1000:.0f} ms")
+        if self.forced:
+            parts.append(f"session cancelled after no stop within {self.deadline:g}s")
+        if self.error:
+            parts.append(f"error: {self.error}")
+        if not parts:
+            parts.append("interrupt sent" if self.sent else "the stream had already ended")
+        text = ", ".join(parts)
+        return text[0].upper() + text[1:]
+
+
+class StreamHandle:
+    """A conversation stream read by a page run, observed for interrupt events"""
+
+    def __init__(self, key: str, stream: ResumableEventStream, client):
+        self.key = key
+        self.stream = stream
+        self.client = client
+        self.report: Optional[StopReport] = None
+        self._acknowledged_at: Optional[float] = None
+        self._stopped_at: Optional[float] = None
+        self._ended = threading.Event()  # Terminal event received or stream gone
+
+    @property
+    def session_id(self) -> Optional[str]:
+        return self.stream.state.session_id
+
+    def record(self, event: SSEEvent) -> None:
+        """Note when the backend acknowledges and completes an interrupt"""
+        if event.event == 'interrupt_acknowledged' and self._acknowledged_at is None:
+            self._acknowledged_at = time.monotonic()
+        elif event.event in TERMINAL_EVENTS:
+            self._stopped_at = time.monotonic()
+            self._ended.set()
+
+    def mark_ended(self) -> None:
+        """The page read the stream to its end or failure; there is nothing left to stop"""
+        self._ended.set()
+
+    def drain(self, events: Iterable[SSEEvent]) -> None:
+        """
+        Keep reading a stream the page has abandoned (iter_with_idle_ticks'
+        on_abandon, on its reader thread) until the terminal event or close(),
+        so stop() sees the backend's answer to the interrupt
+        """
+        try:
+            for event in events:
+                self.record(event)
+                if self._ended.is_set():
+                    break
+        except Exception:
+            # The stream was closed by stop() or failed; either way it is over
+            pass
+        finally:
+            self._ended.set()
+
+    def stop(self, reason: str = "User requested", deadline: float = STOP_DEADLINE,
+             report: Optional[StopReport] = None) -> StopReport:
+        """Interrupt the backend session (blocking), cancelling it if it has not stopped by the deadline"""
+        if report is None:
+            report = StopReport(self.session_id, reason, deadline)
+        self.report = report
+        try:
+            if report.session_id is None or self._ended.is_set():
+                return report
+            # MCPApiClient turns transport failures into ConnectionError, TimeoutError or a plain Exception
+            try:
+                self.client.interrupt_session(report.session_id, reason=report.reason, graceful=True)
+                report.sent = True
+            except Exception as e:
+                report.error = str(e)
+            if not self._ended.wait(deadline) and report.error is None:
+                report.forced = True
+            if report.forced or report.error:
+                try:
+                    self.client.cancel_session(report.session_id)
+                except Exception as e:
+                    report.error = report.error or str(e)
+            report.acknowledged_at = self._acknowledged_at
+            report.stopped_at = self._stopped_at
+        finally:
+            self.stream.close()
+            report.done.set()
+        return report
+
+
+class StreamControl:
+    """Active conversation streams per chat, and the reports of stopped ones"""
+
+    def __init__(self, deadline: float = STOP_DEADLINE):
+        self.deadline = deadline
+        self._active: Dict[str, StreamHandle] = {}
+        self._reports: Dict[str, StopReport] = {}
+        self._lock = threading.Lock()
+
+    def register(self, key: str, stream: ResumableEventStream, client) -> StreamHandle:
+        handle = StreamHandle(key, stream, client)
+        with self._lock:
+            self._active[key] = handle
+            self._reports.pop(key, None)
+        return handle
+
+    def release(self, handle: StreamHandle, finished: bool, reason: str = "User requested") -> None:
+        """
+        Called when the page stops reading a stream. A finished stream is closed;
+        an unfinished one is stopped on a background thread.
+        """
+        with self._lock:
+            if self._active.get(handle.key) is handle:
+                del self._active[handle.key]
+        if finished:
+            handle.stream.close()
+            return
+
+        # The page has stopped reading; the backend session is stopped in the background
+        report = StopReport(handle.session_id, reason, self.deadline)
+        with self._lock:
+            self._reports[handle.key] = report
+            while len(self._reports) > REPORTS_LIMIT:
+                del self._reports[next(iter(self._reports))]
+        threading.Thread(
+            target=handle.stop,
+            args=(reason, self.deadline, report),
+            name="stream-stop",
+            daemon=True
+        ).start()
+
+    def wait(self, key: str, timeout: Optional[float] = None) -> Optional[StopReport]:
+        """Block until the stop of a chat's last abandoned stream completes; None if there is none"""
+        with self._lock:
+            report = self._reports.get(key)
+        if report is None:
+            return None
+        report.done.wait(timeout)
+        return report
+
+    def take(self, key: str) -> Optional[StopReport]:
+        """Remove and return a chat's stop report once the stop has completed"""
+        with self._lock:
+            report = self._reports.get(key)
+            if report is None or not report.done.is_set():
+                return None
+            del self._reports[key]
+            return report
+
+    def active(self, key: str) -> Optional[StreamHandle]:
+        with self._lock:
+            return self._active.get(key)
+
+
+_control: Optional[StreamControl] = None
+_control_lock = threading.Lock()
+
+
+def get_stream_control() -> StreamControl:
+    """Process-wide stream control"""
+    global _control
+    with _control_lock:
+        if _control is None:
+            _control = StreamControl()
+        return _control
@@ -0,0 +1,136 @@
+"""
+Deadlines for conversation streams.
+
+Instead of one long request timeout, a stream has separate limits: connecting,
+waiting for the first event of each connection, the gap between events and the
+whole stream. The gap limit follows the backend's heartbeats: once heartbeats
+have been seen it is a number of missed heartbeat intervals, so a stuck stream
+is noticed within seconds while a long but healthy run is left alone.
+"""
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+
+from utils.sse import SSEEvent
+
+# Defaults (seconds) for agents without their own deadlines
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_FIRST_EVENT_TIMEOUT = 30.0
+DEFAULT_HEARTBEAT_INTERVAL = 10.0
+DEFAULT_MISSED_HEARTBEATS = 3
+DEFAULT_TOTAL_TIMEOUT = 900.0
+
+# Heartbeat intervals remembered for the gap limit (the largest is used)
+HEARTBEAT_SAMPLES = 4
+
+
+class StreamTimeout(requests.exceptions.Timeout):
+    """A stream deadline passed; final when the stream must not be resumed"""
+
+    def __init__(self, message: str, final: bool = False):
+        super().__init__(message)
+        self.final = final
+
+
+class StreamDeadlines:
+    """Deadline settings of a stream (seconds)"""
+
+    __slots__ = ("connect", "first_event", "heartbeat_interval", "missed_heartbeats", "total")
+
+    def __init__(self, connect: float = DEFAULT_CONNECT_TIMEOUT, first_event: float = DEFAULT_FIRST_EVENT_TIMEOUT,
+                 heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL,
+                 missed_heartbeats: int = DEFAULT_MISSED_HEARTBEATS, total: float = DEFAULT_TOTAL_TIMEOUT):
+        self.connect = connect
+        self.first_event = first_event
+        self.heartbeat_interval = heartbeat_interval  # Expected until heartbeats are observed
+        self.missed_heartbeats = missed_heartbeats
+        self.total = total
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "StreamDeadlines":
+        """Build from a (partial) dict such as an agent's 'deadlines' entry"""
+        config = config or {}
+        return cls(**{name: config[name] for name in cls.__slots__ if config.get(name) is not None})
+
+    @property
+    def idle_gap(self) -> float:
+        """Gap limit before any heartbeat has been observed"""
+        return self.heartbeat_interval * self.missed_heartbeats
+
+    def requests_timeout(self) -> Tuple[float, float]:
+        """(connect, read) timeout for requests; the read part is only a backstop for the tracker"""
+        return (self.connect, max(self.first_event, self.idle_gap))
+
+    def summary(self) -> str:
+        return (f"connect {self.connect:g}s, first event {self.first_event:g}s, "
+                f"{self.missed_heartbeats} missed heartbeats, total {self.total:g}s")
+
+
+class DeadlineTracker:
+    """
+    Deadline state of one stream across its connections. Fed with connection and
+    event notifications; expired() returns the StreamTimeout for the first passed deadline.
+    """
+
+    def __init__(self, deadlines: StreamDeadlines, clock: Callable[[], float] = time.monotonic):
+        self.deadlines = deadlines
+        self._clock = clock
+        self.started = clock()
+        self._connected_at: Optional[float] = None  # None while not connected (e.g. reconnect backoff)
+        self._last_event: Optional[float] = None
+        self._last_heartbeat: Optional[float] = None
+        self._heartbeat_intervals = deque(maxlen=HEARTBEAT_SAMPLES)
+
+    def connection_opened(self) -> None:
+        self._connected_at = self._clock()
+        self._last_event = None
+        self._last_heartbeat = None
+
+    def connection_closed(self) -> None:
+        self._connected_at = None
+
+    def event_received(self, event: SSEEvent) -> None:
+        now = self._clock()
+        self._last_event = now
+        if event.event == 'heartbeat':
+            if self._last_heartbeat is not None:
+                self._heartbeat_intervals.append(now - self._last_heartbeat)
+            self._last_heartbeat = now
+
+    @property
+    def heartbeat_interval(self) -> float:
+        """Observed heartbeat interval (the largest recent one), or the configured one"""
+        if self._heartbeat_intervals:
+            return max(self._heartbeat_intervals)
+        return self.deadlines.heartbeat_interval
+
+    @property
+    def idle_gap(self) -> float:
+        return self.heartbeat_interval * self.deadlines.missed_heartbeats
+
+    def _limits(self):
+        """(deadline time, error message, final) of each running deadline"""
+        deadlines = self.deadlines
+        yield (self.started + deadlines.total, f"Stream exceeded its total deadline of {deadlines.total:g}s", True)
+        if self._connected_at is None:
+            return
+        if self._last_event is None:
+            yield (self._connected_at + deadlines.first_event,
+                   f"No event within {deadlines.first_event:g}s of connecting", False)
+        else:
+            gap = self.idle_gap
+            yield (self._last_event + gap,
+                   f"No event for {gap:.1f}s ({deadlines.missed_heartbeats} missed heartbeats)", False)
+
+    def time_left(self) -> float:
+        """Seconds until the nearest deadline (negative once passed)"""
+        return min(at for at, _, _ in self._limits()) - self._clock()
+
+    def expired(self) -> Optional[StreamTimeout]:
+        now = self._clock()
+        for at, message, final in self._limits():
+            if now >= at:
+                return StreamTimeout(message, final)
+        return None
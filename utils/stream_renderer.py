@@ -0,0 +1,76 @@
+import time
+from typing import Callable, List
+
+import streamlit as st
+
+from utils.chat_events import SECTION_BREAK
+
+# Default upper bound on live-tail repaints per second
+DEFAULT_MAX_FPS = 10.0
+
+
+class StreamRenderer:
+    """
+    Frame-coalesced markdown renderer for a streamed chat response.
+
+    Chunks are buffered and the live tail is repainted at most max_fps times per
+    second. A SECTION_BREAK chunk freezes the current tail into its own element
+    and starts a new one below it, so finished steps, SQL blocks and result
+    previews are sent to the browser once instead of with every later chunk.
+    Must be created inside the container it renders into (e.g. st.chat_message).
+    """
+
+    def __init__(self, max_fps: float = DEFAULT_MAX_FPS, clock: Callable[[], float] = time.monotonic):
+        self._interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self._clock = clock
+        self._parts: List[str] = []
+        self._tail: List[str] = []
+        self._dirty = False
+        self._last_paint = float("-inf")
+        self._placeholder = st.empty()
+
+        # Render statistics for the response
+        self.frames = 0
+        self.sections = 0
+        self.bytes_sent = 0
+
+    def write(self, chunk: str) -> None:
+        """Add a chunk; an empty chunk only gives a pending frame the chance to paint"""
+        if chunk is SECTION_BREAK:
+            self.seal()
+            return
+        if chunk:
+            self._parts.append(chunk)
+            self._tail.append(chunk)
+            self._dirty = True
+        if self._dirty and self._clock() - self._last_paint >= self._interval:
+            self._paint()
+
+    def seal(self) -> None:
+        """Freeze the live tail into its own element and start a new tail"""
+        if not self._tail:
+            return
+        if self._dirty:
+            self._paint()
+        self._placeholder = st.empty()
+        self._tail = []
+        self.sections += 1
+
+    def close(self) -> str:
+        """Paint anything pending and return the full response text"""
+        if self._dirty:
+            self._paint()
+        return "".join(self._parts)
+
+    @property
+    def text(self) -> str:
+        """Full response text written so far"""
+        return "".join(self._parts)
+
+    def _paint(self) -> None:
+        markdown = "".join(self._tail)
+        self._placeholder.markdown(markdown)
+        self._dirty = False
+        self._last_paint = self._clock()
+        self.frames += 1
+        self.bytes_sent += len(markdown.encode("utf-8"))
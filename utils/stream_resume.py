@@ -0,0 +1,308 @@
+"""
+Resumable conversation streams.
+
+A conversation stream that drops before its terminal event is reopened for
+the same session with the Last-Event-ID of the last event received, after an
+exponential backoff (the server's SSE retry: field, when sent, is the base
+delay). A resume answered with 429 or a 5xx counts as another failed attempt
+and waits at least the response's Retry-After; other HTTP errors are final. Events the server replays are recognized by id and dropped, so
+consumers see every event once. Reconnects are bounded by a per-stream budget.
+With StreamDeadlines, a watchdog thread drops a stalled connection (which is
+then resumed like any other drop) and ends a stream that outlives its total deadline.
+"""
+import email.utils
+import json
+import random
+import socket
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Iterator, Optional
+
+import requests
+
+from utils.sse import SSEEvent, SSEParser, iter_sse_events
+from utils.stream_deadlines import DeadlineTracker, StreamDeadlines, StreamTimeout
+
+# Events after which the backend sends nothing more for the request
+TERMINAL_EVENTS = frozenset(['final', 'error', 'complete', 'timeout', 'interrupted'])
+
+# Synthetic event emitted before each reconnect attempt
+RECONNECTING_EVENT = 'reconnecting'
+
+# Reconnect policy defaults
+MAX_RECONNECTS = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 10.0
+
+# Event ids remembered for duplicate detection
+SEEN_IDS_LIMIT = 10000
+
+# Longest sleep of the deadline watchdog between checks
+WATCHDOG_MAX_WAIT = 1.0
+
+# Transport failures treated as a dropped stream
+STREAM_ERRORS = (
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+)
+
+
+def resumable_status(status: int) -> bool:
+    """Whether a resume request answered with this HTTP status is worth retrying (rate limited or server error)"""
+    return status == 429 or status >= 500
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delay-seconds or HTTP-date); None if absent or invalid"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def abort_response(response: requests.Response) -> None:
+    """Close a streaming response, also waking a read blocked on it in another thread"""
+    # Closing alone does not interrupt a blocked recv(); shutting the socket down does
+    connection = getattr(response.raw, '_connection', None)
+    sock = getattr(connection, 'sock', None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    response.close()
+
+
+class ResumeState:
+    """
+    Bookkeeping shared by the sync and async resumable streams: session id,
+    Last-Event-ID, replay detection and the reconnect budget.
+    """
+
+    def __init__(self, max_reconnects: int = MAX_RECONNECTS, backoff_base: float = BACKOFF_BASE,
+                 backoff_max: float = BACKOFF_MAX):
+        self.max_reconnects = max_reconnects
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session_id: Optional[str] = None
+        self.last_event_id = ""
+        self.retry_ms: Optional[int] = None
+        self.finished = False
+        self.reconnects = 0
+        self.replayed = 0
+        self._failures = 0  # Consecutive failed attempts, drives the backoff
+        self._seen = set()
+        self._seen_order = deque()
+        self._connection_id: Optional[str] = None
+        self._replaying = False
+
+    def new_connection(self) -> None:
+        """Reset per-connection state before reading a (re)opened stream"""
+        self._connection_id = None
+        self._replaying = False
+
+    def accept(self, event: SSEEvent) -> bool:
+        """Record an event; False if it is a replay of one already delivered"""
+        if event.retry is not None:
+            self.retry_ms = event.retry
+        # Events without their own id line inherit the previous id: they share its verdict
+        if event.id != self._connection_id:
+            self._connection_id = event.id
+            self._replaying = bool(event.id) and event.id in self._seen
+            if event.id and not self._replaying:
+                self._seen.add(event.id)
+                self._seen_order.append(event.id)
+                if len(self._seen_order) > SEEN_IDS_LIMIT:
+                    self._seen.discard(self._seen_order.popleft())
+        if self._replaying:
+            self.replayed += 1
+            return False
+
+        if event.id:
+            self.last_event_id = event.id
+        if event.event == 'connected' and self.session_id is None:
+            try:
+                self.session_id = event.json().get('sessionId')
+            except (ValueError, AttributeError):
+                pass
+        if event.event in TERMINAL_EVENTS:
+            self.finished = True
+        self._failures = 0
+        return True
+
+    @property
+    def can_resume(self) -> bool:
+        return (not self.finished and self.session_id is not None
+                and self.reconnects < self.max_reconnects)
+
+    def next_delay(self, retry_after: Optional[float] = None) -> float:
+        """Count a reconnect attempt and return the backoff before it (with jitter), at least retry_after"""
+        self.reconnects += 1
+        self._failures += 1
+        base = self.retry_ms / 1000.0 if self.retry_ms is not None else self.backoff_base
+        delay = min(self.backoff_max, base * (2 ** (self._failures - 1))) * random.uniform(0.5, 1.0)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def reconnecting_event(self, delay: float, error: Optional[BaseException]) -> SSEEvent:
+        """Synthetic event telling the consumer a reconnect is about to happen"""
+        return SSEEvent(RECONNECTING_EVENT, json.dumps({
+            'attempt': self.reconnects,
+            'max_attempts': self.max_reconnects,
+            'delay': round(delay, 2),
+            'last_event_id': self.last_event_id,
+            'error': str(error) if error else 'stream ended before completion'
+        }))
+
+
+class ResumableEventStream:
+    """
+    Iterator of SSEEvents over a conversation that survives dropped connections.
+
+    open_stream() starts the conversation; reopen(session_id, last_event_id)
+    resumes it. A reopen failing with 429 or a 5xx is retried like a dropped
+    connection. If the stream cannot be resumed (no session id yet, budget spent,
+    or the reopen fails with any other HTTP error) the last error propagates;
+    a stream that simply ends early without a resumable session just stops.
+    A passed deadline surfaces as StreamTimeout (a requests Timeout).
+    close() may be called from another thread and also interrupts a backoff wait.
+    """
+
+    def __init__(self, open_stream: Callable[[], requests.Response],
+                 reopen: Callable[[str, str], requests.Response],
+                 max_reconnects: int = MAX_RECONNECTS, backoff_base: float = BACKOFF_BASE,
+                 backoff_max: float = BACKOFF_MAX, deadlines: Optional[StreamDeadlines] = None):
+        self._open_stream = open_stream
+        self._reopen = reopen
+        self.state = ResumeState(max_reconnects, backoff_base, backoff_max)
+        self.deadlines = deadlines
+        self.tracker: Optional[DeadlineTracker] = None
+        self.response: Optional[requests.Response] = None
+        self.parser: Optional[SSEParser] = None
+        self.opened_at: Optional[float] = None  # time.monotonic() when the first response arrived
+        self._bytes_done = 0  # Bytes read on earlier connections
+        self._closed = threading.Event()
+        self._expired: Optional[StreamTimeout] = None
+
+    def __iter__(self) -> Iterator[SSEEvent]:
+        state = self.state
+        if self.deadlines is not None:
+            self.tracker = DeadlineTracker(self.deadlines)
+            threading.Thread(target=self._watch, name="sse-watchdog", daemon=True).start()
+        error = None
+        retry_after = None  # From the last failed reopen's Retry-After header
+        try:
+            response = self._open_stream()
+            self.opened_at = time.monotonic()
+            self._set_response(response)
+            while True:
+                if self.response is not None:
+                    try:
+                        state.new_connection()
+                        for event in iter_sse_events(self.response, self.parser):
+                            if self.tracker is not None:
+                                self.tracker.event_received(event)
+                            if state.accept(event):
+                                yield event
+                    except STREAM_ERRORS as e:
+                        error = e
+                    except Exception:
+                        # Reading a response closed from another thread fails in assorted ways
+                        if self._expired is None and not self._closed.is_set():
+                            raise
+                    if self._expired is not None:
+                        error, self._expired = self._expired, None
+                        if error.final:
+                            raise error
+                    if self.tracker is not None:
+                        self.tracker.connection_closed()
+                if self._closed.is_set() or state.finished:
+                    return
+                if not state.can_resume:
+                    if error is not None:
+                        raise error
+                    return
+
+                delay = state.next_delay(retry_after)
+                yield state.reconnecting_event(delay, error)
+                if self.tracker is not None:
+                    delay = max(0.0, min(delay, self.tracker.time_left()))
+                if self._closed.wait(delay):
+                    return
+                if self._expired is not None and self._expired.final:
+                    raise self._expired
+                error = None
+                retry_after = None
+                try:
+                    self._set_response(self._reopen(state.session_id, state.last_event_id))
+                except STREAM_ERRORS as e:
+                    # Counted against the budget; the loop retries or gives up
+                    error = e
+                    self._set_response(None)
+                except requests.exceptions.HTTPError as e:
+                    # Rate limiting and server errors are retried the same way; 404, 410 and the like are final
+                    if e.response is None or not resumable_status(e.response.status_code):
+                        raise
+                    error = e
+                    retry_after = parse_retry_after(e.response.headers.get('Retry-After'))
+                    self._set_response(None)
+        finally:
+            # Also runs when the consumer abandons the iterator early
+            self._closed.set()
+            self._set_response(None)
+
+    @property
+    def bytes_received(self) -> int:
+        """Stream bytes read over all connections"""
+        parser = self.parser
+        return self._bytes_done + (parser.bytes_received if parser is not None else 0)
+
+    def _set_response(self, response: Optional[requests.Response]) -> None:
+        if self.response is not None:
+            self.response.close()
+        self.response = response
+        if self.parser is not None:
+            self._bytes_done += self.parser.bytes_received
+        self.parser = SSEParser()
+        if response is None:
+            return
+        if self.tracker is not None:
+            self.tracker.connection_opened()
+        if self._closed.is_set():
+            response.close()
+
+    def _watch(self) -> None:
+        """Watchdog thread: drop the current connection once a deadline passes"""
+        tracker = self.tracker
+        while not self._closed.wait(min(WATCHDOG_MAX_WAIT, max(0.01, tracker.time_left()))):
+            expired = tracker.expired()
+            if expired is None or self._expired is not None:
+                continue
+            self._expired = expired
+            tracker.connection_closed()
+            response = self.response
+            if response is not None:
+                abort_response(response)
+            if expired.final:
+                return
+
+    def close(self) -> None:
+        """Stop reading: wake any backoff wait and close the current response"""
+        self._closed.set()
+        response = self.response
+        if response is not None:
+            abort_response(response)
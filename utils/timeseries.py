@@ -0,0 +1,136 @@
+"""
+Fixed-memory time series backed by NumPy ring buffers.
+
+A TieredSeries keeps recent samples at full resolution and, like a round-robin
+database, an archive tier where every `factor` samples are consolidated into one
+(per column: last, mean, min or max), so memory stays fixed while the covered
+time span grows by the factor. lttb() and minmax_downsample() reduce a series
+to a plotting budget.
+"""
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+# Consolidation of a bucket of archive rows, per column
+CONSOLIDATIONS = {
+    "last": lambda values: values[-1],
+    "mean": lambda values: np.nanmean(values, axis=0),
+    "min": lambda values: np.nanmin(values, axis=0),
+    "max": lambda values: np.nanmax(values, axis=0),
+}
+
+
+class RingBuffer:
+    """Latest `capacity` (time, row) samples in preallocated arrays"""
+
+    __slots__ = ("times", "values", "size", "_next")
+
+    def __init__(self, capacity: int, columns: int):
+        self.times = np.full(capacity, np.nan)
+        self.values = np.full((capacity, columns), np.nan)
+        self.size = 0
+        self._next = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self.times)
+
+    def append(self, t: float, row: Sequence[float]) -> None:
+        self.times[self._next] = t
+        self.values[self._next] = row
+        self._next = (self._next + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def last(self, n: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Copies of the latest n samples (all by default), oldest first"""
+        n = self.size if n is None else min(n, self.size)
+        index = (self._next - n + np.arange(n)) % self.capacity
+        return self.times[index], self.values[index]
+
+    @property
+    def nbytes(self) -> int:
+        return self.times.nbytes + self.values.nbytes
+
+
+class TieredSeries:
+    """Full-resolution recent samples plus a consolidated archive, in fixed memory"""
+
+    __slots__ = ("columns", "factor", "raw", "archive", "_reducers", "_pending")
+
+    def __init__(self, columns: Sequence[str], consolidation: Sequence[str], raw_capacity: int,
+                 factor: int, archive_capacity: int):
+        if len(consolidation) != len(columns):
+            raise ValueError("One consolidation per column is required")
+        if factor > raw_capacity:
+            raise ValueError("The consolidation factor cannot exceed the raw capacity")
+        self.columns = tuple(columns)
+        self.factor = factor
+        self.raw = RingBuffer(raw_capacity, len(columns))
+        self.archive = RingBuffer(archive_capacity, len(columns))
+        self._reducers = [CONSOLIDATIONS[name] for name in consolidation]
+        self._pending = 0  # Raw samples since the last archive row
+
+    def append(self, t: float, row: Sequence[float]) -> None:
+        self.raw.append(t, row)
+        self._pending += 1
+        if self._pending == self.factor:
+            times, values = self.raw.last(self.factor)
+            consolidated = [reduce(values[:, i]) for i, reduce in enumerate(self._reducers)]
+            self.archive.append(times[-1], consolidated)
+            self._pending = 0
+
+    def arrays(self, since: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(times, values) oldest first: archive rows older than the raw tier, then raw rows"""
+        raw_times, raw_values = self.raw.last()
+        archive_times, archive_values = self.archive.last()
+        if raw_times.size:
+            older = archive_times < raw_times[0]
+            archive_times, archive_values = archive_times[older], archive_values[older]
+        times = np.concatenate((archive_times, raw_times))
+        values = np.concatenate((archive_values, raw_values))
+        if since is not None:
+            keep = times >= since
+            times, values = times[keep], values[keep]
+        return times, values
+
+    @property
+    def nbytes(self) -> int:
+        return self.raw.nbytes + self.archive.nbytes
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Largest-Triangle-Three-Buckets: threshold points that keep the visual shape of (x, y)"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        following = slice(end, edges[i + 2]) if i + 2 < len(edges) else slice(n - 1, n)
+        next_x, next_y = x[following].mean(), y[following].mean()
+        # Point of this bucket forming the largest triangle with the previous pick and that average
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return x[selected], y[selected]
+
+
+def minmax_downsample(x: np.ndarray, y: np.ndarray, buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Minimum and maximum point of each of `buckets` equal slices (keeps spikes)"""
+    n = len(x)
+    if 2 * buckets >= n or buckets < 1:
+        return x, y
+    # Pad to a whole number of buckets with the last value, then take each row's extremes
+    size = -(-n // buckets)
+    padded = np.concatenate((y, np.repeat(y[-1:], size * buckets - n))).reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    index = np.unique(np.minimum(np.concatenate((
+        offsets + padded.argmin(axis=1),
+        offsets + padded.argmax(axis=1),
+    )), n - 1))
+    return x[index], y[index]
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+
+# Fields that define a tool; statistics and client activity change on every call and are diffed separately
+DEFINITION_KEYS = ("name", "description", "inputSchema")
+
+
+def _digest(value: Any) -> str:
+    """Stable content hash of a JSON value (key order independent)"""
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def tool_fingerprint(tool: Dict[str, Any]) -> str:
+    """Content hash of a tool definition: name, description, input schema and serving clients"""
+    definition = {key: tool.get(key) for key in DEFINITION_KEYS}
+    definition["clients"] = sorted(str(detail.get("serverName")) for detail in tool.get("clientDetails") or [])
+    return _digest(definition)
+
+
+def schema_fingerprint(tool: Dict[str, Any]) -> str:
+    """Content hash of a tool's input schema, the only input of its rendered schema"""
+    return _digest(tool.get("inputSchema") or {})
+
+
+def statistics_fingerprint(tool: Dict[str, Any]) -> str:
+    """Content hash of a tool's live statistics"""
+    return _digest(tool.get("statistics"))
+
+
+def definitions_digest(tool_hashes: Iterable[Tuple[str, str]]) -> str:
+    """Digest of a catalog's tool definitions: ordered (name, tool_fingerprint) pairs"""
+    return _digest(list(tool_hashes))
+
+
+class CatalogData(dict):
+    """
+    A decoded /mcp/tools body, carrying the digest of its tool definitions
+    (statistics excluded) so derived state can be keyed on this very snapshot
+    """
+
+    __slots__ = ("definitions_digest",)
+
+
+def catalog_definitions_digest(data: Dict[str, Any]) -> str:
+    """Definitions digest of a decoded catalog: the one computed with it, else computed from its tools"""
+    digest = getattr(data, "definitions_digest", None)
+    if digest is None:
+        digest = definitions_digest((tool.get("name", ""), tool_fingerprint(tool)) for tool in data.get("tools") or [])
+    return digest
+
+
+class CatalogDelta:
+    """Tools added, removed and changed between two catalog versions, and tools whose statistics moved"""
+
+    __slots__ = ("added", "removed", "changed", "stats_changed")
+
+    def __init__(self, added: List[str], removed: List[str], changed: List[str],
+                 stats_changed: Optional[List[str]] = None):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.stats_changed = stats_changed or []
+
+    def __bool__(self) -> bool:
+        """True when a tool definition changed (statistics alone do not count)"""
+        return bool(self.added or self.removed or self.changed)
+
+    def summary(self) -> str:
+        """Short human-readable description"""
+        parts = []
+        if self:
+            parts.append(f"{len(self.added)} added, {len(self.removed)} removed, {len(self.changed)} changed")
+        if self.stats_changed:
+            parts.append(f"new statistics for {len(self.stats_changed)}")
+        return "; ".join(parts) or "no changes"
+
+
+class ToolCatalog:
+    """
+    Validators and parsed state of the /mcp/tools catalog.
+
+    Keeps the ETag/Last-Modified validators for conditional requests and a hash
+    of the last body as a fallback when the backend sends neither. A 304 or an
+    identical body reuses the parsed catalog without decoding it again; a new
+    body bumps version and records which tool definitions changed and, apart
+    from those, which tools only have new statistics.
+    """
+
+    def __init__(self):
+        self.data: Optional[Dict[str, Any]] = None
+        self.version = 0
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.content_hash: Optional[str] = None
+        self.tool_hashes: Dict[str, str] = {}  # Definition fingerprint per tool name
+        self.schema_hashes: Dict[str, str] = {}  # Input schema fingerprint per tool name
+        self.stats_hashes: Dict[str, str] = {}
+        self.last_delta = CatalogDelta([], [], [])
+        self.stats = {"full": 0, "not_modified": 0, "unchanged_body": 0}
+        self._lock = threading.Lock()
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers that let the backend answer 304 Not Modified"""
+        headers = {}
+        if self.data is not None:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def update(self, response: requests.Response) -> Dict[str, Any]:
+        """Apply a /mcp/tools response and return the current parsed catalog"""
+        with self._lock:
+            if response.status_code == 304 and self.data is not None:
+                self.stats["not_modified"] += 1
+                return self.data
+
+            body = response.content
+            content_hash = hashlib.sha1(body).hexdigest()
+            self.etag = response.headers.get("ETag") or self.etag
+            self.last_modified = response.headers.get("Last-Modified") or self.last_modified
+
+            if content_hash == self.content_hash and self.data is not None:
+                self.stats["unchanged_body"] += 1
+                return self.data
+
+            data = CatalogData(json.loads(body))
+            tool_hashes = {}
+            schema_hashes = {}
+            stats_hashes = {}
+            ordered_hashes = []
+            for tool in data.get("tools") or []:
+                name = tool.get("name", "")
+                tool_hashes[name] = tool_fingerprint(tool)
+                ordered_hashes.append((name, tool_hashes[name]))
+                schema_hashes[name] = schema_fingerprint(tool)
+                stats_hashes[name] = statistics_fingerprint(tool)
+
+            old_hashes = self.tool_hashes
+            old_stats = self.stats_hashes
+            self.last_delta = CatalogDelta(
+                added=[name for name in tool_hashes if name not in old_hashes],
+                removed=[name for name in old_hashes if name not in tool_hashes],
+                changed=[name for name, digest in tool_hashes.items()
+                         if name in old_hashes and old_hashes[name] != digest],
+                stats_changed=[name for name, digest in stats_hashes.items()
+                               if name in old_stats and old_stats[name] != digest]
+            )
+            data.definitions_digest = definitions_digest(ordered_hashes)
+            self.data = data
+            self.tool_hashes = tool_hashes
+            self.schema_hashes = schema_hashes
+            self.stats_hashes = stats_hashes
+            self.content_hash = content_hash
+            self.version += 1
+            self.stats["full"] += 1
+            return data
@@ -0,0 +1,197 @@
+import heapq
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Field weights: a hit in the tool name counts more than one in the description
+FIELD_WEIGHTS = {
+    "name": 4.0,
+    "parameter": 2.0,
+    "server": 2.0,
+    "description": 1.0,
+}
+
+# Score multipliers by match kind
+EXACT, PREFIX, INFIX, FUZZY = 1.0, 0.8, 0.6, 0.5
+
+# Minimum trigram (Jaccard) similarity for a fuzzy token match
+FUZZY_THRESHOLD = 0.45
+
+# Recent query results kept per index (keystroke reruns repeat the same query)
+QUERY_CACHE_SIZE = 256
+
+_WORD = re.compile(r"[A-Za-z0-9]+")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, also splitting camelCase and snake_case identifiers"""
+    tokens = []
+    for word in _WORD.findall(text or ""):
+        lowered = word.lower()
+        tokens.append(lowered)
+        parts = _CAMEL.findall(word)
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts)
+    return tokens
+
+
+def _trigrams(token: str) -> Set[str]:
+    """Trigrams of a token padded with boundary markers"""
+    padded = f"${token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ToolSearchIndex:
+    """
+    Ranked search over MCP tools.
+
+    Indexes tool names, descriptions, input parameter names and clientDetails
+    server names into an inverted token index with per-field weights, plus a
+    trigram index over the vocabulary for infix and fuzzy (typo-tolerant) matches.
+    Build once per catalog version; search() touches only matching postings.
+    """
+
+    def __init__(self, tools: List[Dict[str, Any]]):
+        self.tools = tools
+        # token -> {tool position: best field weight}
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        # trigram -> vocabulary tokens containing it
+        self._trigram_tokens: Dict[str, Set[str]] = defaultdict(set)
+        self._token_trigram_count: Dict[str, int] = {}
+
+        for position, tool in enumerate(tools):
+            for field, text in self._fields(tool):
+                weight = FIELD_WEIGHTS[field]
+                for token in tokenize(text):
+                    postings = self._postings[token]
+                    if postings.get(position, 0.0) < weight:
+                        postings[position] = weight
+
+        for token in self._postings:
+            grams = _trigrams(token)
+            self._token_trigram_count[token] = len(grams)
+            for gram in grams:
+                self._trigram_tokens[gram].add(token)
+        self._vocabulary = sorted(self._postings)
+        self._query_cache: "OrderedDict[Tuple[str, Optional[int]], List[Tuple[Dict[str, Any], float]]]" = OrderedDict()
+        self._query_lock = threading.Lock()
+
+    @staticmethod
+    def _fields(tool: Dict[str, Any]):
+        """(field, text) pairs indexed for a tool"""
+        yield "name", tool.get("name", "")
+        yield "description", tool.get("description", "") or ""
+        input_schema = tool.get("inputSchema") or {}
+        properties = input_schema.get("properties") if isinstance(input_schema, dict) else None
+        if isinstance(properties, dict):
+            for prop_name in properties:
+                yield "parameter", prop_name
+        for client in tool.get("clientDetails") or []:
+            if isinstance(client, dict):
+                yield "server", client.get("serverName", "")
+
+    def _matches(self, term: str) -> Dict[str, float]:
+        """Vocabulary tokens matching one query term, with their match-kind multiplier"""
+        matches: Dict[str, float] = {}
+        if term in self._postings:
+            matches[term] = EXACT
+
+        # Prefix matches via binary search over the sorted vocabulary
+        vocabulary = self._vocabulary
+        lo, hi = 0, len(vocabulary)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if vocabulary[mid] < term:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < len(vocabulary) and vocabulary[lo].startswith(term):
+            matches.setdefault(vocabulary[lo], PREFIX)
+            lo += 1
+
+        if len(term) < 3:
+            return matches
+
+        # Count shared trigrams per candidate token
+        query_grams = _trigrams(term)
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in query_grams:
+            for token in self._trigram_tokens.get(gram, ()):
+                shared[token] += 1
+
+        # Any token containing the term shares at least one of its trigrams
+        for token, count in shared.items():
+            if token in matches:
+                continue
+            if term in token:
+                matches[token] = INFIX
+                continue
+            similarity = count / (len(query_grams) + self._token_trigram_count[token] - count)
+            if similarity >= FUZZY_THRESHOLD:
+                matches[token] = FUZZY * similarity
+        return matches
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Return (tool, score) pairs ranked by relevance.
+        Tools matching more query terms rank first, then by weighted score.
+        """
+        key = (query.strip().lower(), limit)
+        with self._query_lock:
+            cached = self._query_cache.get(key)
+            if cached is not None:
+                self._query_cache.move_to_end(key)
+                return cached
+
+        results = self._search(key[0], limit)
+        with self._query_lock:
+            self._query_cache[key] = results
+            if len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return results
+
+    def _search(self, query: str, limit: Optional[int]) -> List[Tuple[Dict[str, Any], float]]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return [(tool, 0.0) for tool in self.tools[:limit]]
+
+        scores: Dict[int, float] = {}
+        matched_terms: Dict[int, int] = {}
+        for term in terms:
+            best: Dict[int, float] = {}
+            for token, kind in self._matches(term).items():
+                for position, weight in self._postings[token].items():
+                    score = weight * kind
+                    if score > best.get(position, 0.0):
+                        best[position] = score
+            for position, score in best.items():
+                scores[position] = scores.get(position, 0.0) + score
+                matched_terms[position] = matched_terms.get(position, 0) + 1
+
+        def rank(position: int):
+            return (-matched_terms[position], -scores[position], position)
+
+        if limit is not None:
+            ranked = heapq.nsmallest(limit, scores, key=rank)
+        else:
+            ranked = sorted(scores, key=rank)
+        return [(self.tools[position], scores[position]) for position in ranked]
+
+
+# Most recently built index, reused until the catalog changes
+_cached_index: Optional[Tuple[Any, ToolSearchIndex]] = None
+_cached_index_lock = threading.Lock()
+
+
+def get_tool_index(tools: List[Dict[str, Any]], catalog_key: Any) -> ToolSearchIndex:
+    """Return the process-wide index for a catalog, rebuilding it only when catalog_key changes"""
+    global _cached_index
+    cached = _cached_index
+    if cached is not None and cached[0] == catalog_key:
+        return cached[1]
+    with _cached_index_lock:
+        if _cached_index is None or _cached_index[0] != catalog_key:
+            _cached_index = (catalog_key, ToolSearchIndex(tools))
+        return _cached_index[1]
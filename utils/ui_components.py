@@ -58,6 +58,24 @@ def auto_refresh_settings(key: str) -> int:
             interval = 0
     return interval if auto_refresh else 0
 
+def rerun_on_new_snapshot(key: str, poller, version: int) -> None:
+    """
+    Auto-refresh against the shared status poller: every interval chosen in
+    auto_refresh_settings, compare the snapshot version with the one rendered and
+    rerun the page only if it changed (the check itself never calls the backend)
+    """
+    interval = auto_refresh_settings(key)
+
+    @st.fragment(run_every=interval or None)
+    def watch():
+        snapshot = poller.snapshot()
+        if snapshot is not None and snapshot.version != version:
+            st.rerun()
+        if snapshot is not None:
+            st.caption(snapshot.summary())
+
+    watch()
+
 def error_message(error: Exception) -> None:
     """Display formatted error message"""
     st.error(f"❌ {str(error)}")
@@ -0,0 +1,76 @@
+"""
+Waterfall chart of a turn's span tree.
+
+Each span is one bar from its start to its end (seconds since the turn started),
+one row per span in tree order with the label indented by depth; milestones are
+drawn as points.
+"""
+from typing import Any, Sequence
+
+import altair as alt
+import pandas as pd
+import streamlit as st
+
+from utils.spans import MILESTONE
+
+# Bar colour per span kind
+KIND_COLORS = {
+    "turn": "#9e9e9e",
+    "level": "#7e57c2",
+    "step": "#1e88e5",
+    "tool": "#43a047",
+    "milestone": "#fb8c00",
+}
+
+# Pixel height of one row
+ROW_HEIGHT = 22
+
+
+def waterfall_frame(rows: Sequence[Sequence[Any]]) -> pd.DataFrame:
+    """Span rows (kind, name, label, depth, start, end) as a chart frame"""
+    frame = pd.DataFrame(list(rows), columns=["kind", "name", "label", "depth", "start", "end"])
+    # Row labels must be unique for the y axis; the row number keeps them apart and in order
+    frame["row"] = [f"{i:03d} {'  ' * depth}{label}" for i, (depth, label) in enumerate(zip(frame["depth"], frame["label"]))]
+    frame["duration"] = frame["end"] - frame["start"]
+    return frame
+
+
+def render_waterfall(rows: Sequence[Sequence[Any]], key: str) -> None:
+    """Draw the waterfall of one turn"""
+    if not rows:
+        st.caption("No spans recorded for this turn")
+        return
+    frame = waterfall_frame(rows)
+    y = alt.Y(
+        "row:N",
+        sort=None,
+        title=None,
+        axis=alt.Axis(labelExpr="substring(datum.value, 4)", labelLimit=320)
+    )
+    color = alt.Color(
+        "kind:N",
+        scale=alt.Scale(domain=list(KIND_COLORS), range=list(KIND_COLORS.values())),
+        legend=alt.Legend(orient="bottom", title=None)
+    )
+    tooltip = [
+        alt.Tooltip("label:N", title="Span"),
+        alt.Tooltip("kind:N", title="Kind"),
+        alt.Tooltip("start:Q", title="Start (s)", format=".3f"),
+        alt.Tooltip("duration:Q", title="Duration (s)", format=".3f"),
+    ]
+    base = alt.Chart(frame)
+    bars = base.transform_filter(alt.datum.kind != MILESTONE).mark_bar(height=ROW_HEIGHT - 6).encode(
+        x=alt.X("start:Q", title="Seconds since the request"),
+        x2="end:Q",
+        y=y,
+        color=color,
+        tooltip=tooltip
+    )
+    marks = base.transform_filter(alt.datum.kind == MILESTONE).mark_point(filled=True, size=60).encode(
+        x="start:Q",
+        y=y,
+        color=color,
+        tooltip=tooltip
+    )
+    chart = (bars + marks).properties(height=ROW_HEIGHT * len(frame))
+    st.altair_chart(chart, use_container_width=True, key=key)